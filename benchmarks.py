@@ -0,0 +1,286 @@
+'''
+This module is a benchmark suite for the \code{graph} package.  It builds
+graphs from several families in \code {graph.instances} at increasing
+sizes and measures the time and peak memory taken by construction,
+traversals, spanning trees and each invariant on them.
+
+Usage:
+\begin{verbatim}
+    python benchmarks.py run [--quick] [--output results.json]
+    python benchmarks.py compare old.json new.json [--threshold 1.25]
+\end{verbatim}
+The \code {run} command writes its measurements as JSON.  The
+\code {compare} command reads two such files and reports every case whose
+time grew by more than the threshold factor, exiting with status $1$ if
+there are any.
+'''
+
+import argparse
+import gc
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+from graph import algorithms, graph, instances, invariants, subgraphs
+
+# Each family maps a name to the function that builds a member of the
+# family from a size parameter, and the sizes to try, in the full and in
+# the quick run.
+
+FAMILIES = [
+    ('hypercube', instances.hypercube, [4, 6, 8, 10], [3, 5]),
+    ('grid', lambda k: instances.gridGraph(k, k), [4, 8, 16, 32], [3, 6]),
+    ('complete', instances.completeGraph, [8, 16, 32, 64], [4, 8]),
+    ('petersen', lambda k: instances.generalizedPetersenGraph(k, 2),
+     [5, 50, 500, 5000], [5, 50]),
+    ('random', lambda k: instances.randomGraph(k, 4.0 / k, seed=k),
+     [100, 1000, 10000, 100000], [50, 200]),
+]
+
+
+def consume(iterable):
+    '''
+    Runs through \code {iterable}, discarding its items.
+    '''
+    for item in iterable:
+        pass
+
+
+# Each operation is a name, the function that performs it on a graph, and
+# the largest order of graph it is run on (None for no limit), so that the
+# slow symbolic invariants are only measured on small graphs.
+
+OPERATIONS = [
+    ('adjacencyLists', graph.adjacencyLists, None),
+    ('DFS', lambda G: consume(algorithms.DFS(G)), None),
+    ('BFS', lambda G: consume(algorithms.BFS(G)), None),
+    ('components', lambda G: consume(subgraphs.components(G)), 5000),
+    ('Kruskal', algorithms.Kruskal, None),
+    ('Prim', algorithms.Prim, None),
+    ('order', invariants.order, None),
+    ('size', invariants.size, None),
+    ('degreeSequence', lambda G: list(invariants.degreeSequence(G)), None),
+    ('minDegree', invariants.minDegree, None),
+    ('maxDegree', invariants.maxDegree, None),
+    ('is_regular', invariants.is_regular, None),
+    ('is_connected', invariants.is_connected, None),
+    ('is_tree', invariants.is_tree, None),
+    ('is_complete', invariants.is_complete, None),
+    ('is_empty', invariants.is_empty, None),
+    ('is_triangleFree', invariants.is_triangleFree, 64),
+    ('numberOfTriangles', invariants.numberOfTriangles, 64),
+    ('eigenvalues', invariants.eigenvalues, 16),
+    ('report', invariants.report, None),
+]
+
+
+def fresh(G):
+    '''
+    Returns a copy of $G$ with nothing remembered, so that memoized
+    invariants are measured from scratch.
+    '''
+    return graph.Graph(vertices=G.vertices,
+                       edges=[tuple(e) for e in G.edges],
+                       directed=graph.is_directed(G))
+
+
+def peakMemory():
+    '''
+    Returns the peak resident set size of this process, in kilobytes.
+    '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return peak
+
+
+def measure(function, argument, minimumTime=0.2, repeats=3):
+    '''
+    Returns the best time, over \code {repeats} rounds, of one call of
+    \code {function(argument())}, where each round makes as many calls as
+    fit in \code {minimumTime} seconds.  The time spent in
+    \code {argument} is not counted.
+    '''
+    best = None
+    calls = 1
+    for i in xrange(repeats):
+        total = 0.0
+        count = 0
+        while count < calls or total < minimumTime and count < 1000:
+            x = argument()
+            gc.disable()
+            start = time.time()
+            function(x)
+            total += time.time() - start
+            gc.enable()
+            count += 1
+        calls = count
+        if best is None or total / count < best:
+            best = total / count
+    return best
+
+
+def runCase(family, size, operation, connection):
+    '''
+    Measures one operation on one graph, sending a dict of results back
+    through \code {connection}.  This runs in a child process, so that
+    the peak memory it reports belongs to this case alone.
+    '''
+    build = dict((f[0], f[1]) for f in FAMILIES)[family]
+    result = {'family': family, 'size': size, 'operation': operation}
+    try:
+        before = peakMemory()
+        if operation == 'construction':
+            seconds = measure(lambda x: build(size), lambda: None,
+                              repeats=1)
+            G = build(size)
+        else:
+            G = build(size)
+            function = dict((o[0], o[1]) for o in OPERATIONS)[operation]
+            before = peakMemory()
+            seconds = measure(function, lambda: fresh(G))
+        result.update(order=invariants.order(G), edges=invariants.size(G),
+                      seconds=seconds, peakKB=peakMemory() - before)
+    except Exception, error:
+        result['error'] = '%s: %s' % (error.__class__.__name__, error)
+    connection.send(result)
+    connection.close()
+
+
+def cases(quick=False, families=None, operations=None):
+    '''
+    This is a generator that yields the \code {(family, size, operation)}
+    triples to measure.
+    '''
+    for (name, build, sizes, quickSizes) in FAMILIES:
+        if families and name not in families:
+            continue
+        for size in (quickSizes if quick else sizes):
+            if not operations or 'construction' in operations:
+                yield name, size, 'construction', None
+            for (operation, function, limit) in OPERATIONS:
+                if operations and operation not in operations:
+                    continue
+                yield name, size, operation, limit
+
+
+def run(quick=False, families=None, operations=None, timeout=300,
+        out=sys.stderr):
+    '''
+    Runs the benchmarks, each in its own process, and returns the results
+    as a dict ready to be written as JSON.  A case that takes longer than
+    \code {timeout} seconds is stopped and recorded as such.
+    '''
+    results = []
+    orders = {}
+    for (family, size, operation, limit) in cases(quick, families,
+                                                   operations):
+        if limit is not None and orders.get((family, size), 0) > limit:
+            continue
+        receiver, sender = multiprocessing.Pipe(False)
+        child = multiprocessing.Process(target=runCase,
+                                        args=(family, size, operation,
+                                              sender))
+        child.start()
+        if receiver.poll(timeout):
+            result = receiver.recv()
+        else:
+            child.terminate()
+            result = {'family': family, 'size': size,
+                      'operation': operation, 'error': 'timeout'}
+        child.join()
+        if 'order' in result:
+            orders[(family, size)] = result['order']
+        results.append(result)
+        if out is not None:
+            out.write('%-10s %6s %-18s %s\n' % (
+                family, size, operation,
+                result.get('error') or '%.6fs %dKB' % (result['seconds'],
+                                                       result['peakKB'])))
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results}
+
+
+def compare(old, new, threshold=1.25):
+    '''
+    Returns the list of regressions between the benchmark results
+    \code {old} and \code {new}: one \code {(family, size, operation,
+    oldSeconds, newSeconds)} tuple for each case that got slower by more
+    than a factor of \code {threshold}, or that failed in \code {new} but
+    not in \code {old}.
+    '''
+
+    def key(result):
+        '''
+        Identifies the case a result belongs to.
+        '''
+        return (result['family'], result['size'], result['operation'])
+
+    before = dict((key(r), r) for r in old['results'])
+    regressions = []
+    for result in new['results']:
+        previous = before.get(key(result))
+        if previous is None or 'error' in previous:
+            continue
+        if 'error' in result:
+            regressions.append(key(result) + (previous['seconds'], None))
+        elif result['seconds'] > threshold * previous['seconds']:
+            regressions.append(key(result) + (previous['seconds'],
+                                              result['seconds']))
+    return regressions
+
+
+def main(arguments):
+    '''
+    Runs the command line interface.
+    '''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command')
+    runner = commands.add_parser('run', help='run the benchmarks')
+    runner.add_argument('--quick', action='store_true',
+                        help='use only the smallest sizes')
+    runner.add_argument('--family', action='append', dest='families',
+                        help='only benchmark this family')
+    runner.add_argument('--operation', action='append', dest='operations',
+                        help='only benchmark this operation')
+    runner.add_argument('--timeout', type=float, default=300,
+                        help='seconds allowed for each case')
+    runner.add_argument('--output', default='bench_output.json',
+                        help='file to write the results to')
+    comparer = commands.add_parser('compare',
+                                   help='compare two sets of results')
+    comparer.add_argument('old')
+    comparer.add_argument('new')
+    comparer.add_argument('--threshold', type=float, default=1.25,
+                          help='slowdown factor counted as a regression')
+    options = parser.parse_args(arguments)
+
+    if options.command == 'run':
+        results = run(options.quick, options.families, options.operations,
+                      options.timeout)
+        f = open(options.output, 'w')
+        try:
+            json.dump(results, f, indent=1, sort_keys=True)
+        finally:
+            f.close()
+        return 0
+
+    old = json.load(open(options.old))
+    new = json.load(open(options.new))
+    regressions = compare(old, new, options.threshold)
+    for (family, size, operation, before, after) in regressions:
+        if after is None:
+            print '%s %s %s: now fails' % (family, size, operation)
+        else:
+            print '%s %s %s: %.6fs -> %.6fs (x%.2f)' % (
+                family, size, operation, before, after, after / before)
+    return int(bool(regressions))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
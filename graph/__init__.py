@@ -2,11 +2,60 @@
 The \emph {graph} module is a comprehensive graph theory library for
 Python that integrates well with \code{sympy}.  The eventual goal is
 to get the module included in the \code {sympy} distribution.
+
+Importing the package only loads the graph data structure itself.  Each
+submodule (\code {graph.algorithms}, \code {graph.invariants} and so on)
+is imported the first time it is used, so that short-lived programs pay
+only for what they need.
 '''
 
+import os
+import sys
+import types
+
 from graph import *
-import algorithms
-import instances
-import invariants
-import operations
-import subgraphs
+
+submodules = ['algorithms', 'approx', 'batch', 'cache', 'coloring',
+              'directed', 'graphlets', 'instances', 'isomorphism',
+              'invariants', 'mapped', 'matching', 'operations', 'profiling',
+              'readwrite', 'sharded', 'spectral', 'subgraphs']
+
+
+class LazyPackage(types.ModuleType):
+    '''
+    This object stands in for the package in \code {sys.modules}, importing
+    each submodule when it is first looked up as an attribute.
+    '''
+
+    def __getattr__(self, name):
+        if name in submodules:
+            __import__('%s.%s' % (self.__name__, name))
+            return sys.modules['%s.%s' % (self.__name__, name)]
+        raise AttributeError("'module' object has no attribute '%s'" % name)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(submodules))
+
+
+def installLazyPackage():
+    '''
+    Replaces this module in \code {sys.modules} by a \code {LazyPackage}
+    with the same contents.
+    '''
+    module = sys.modules[__name__]
+    package = LazyPackage(__name__, __doc__)
+    package.__dict__.update(module.__dict__)
+
+    # Python clears the globals of a module when the module object is
+    # freed, and the functions defined here still use them, so we keep
+    # the original module alive.
+
+    package.__dict__['_module'] = module
+    sys.modules[__name__] = package
+
+
+installLazyPackage()
+
+if os.environ.get('GRAPH_PROFILE'):
+    from profiling import enableFromEnvironment
+    enableFromEnvironment()
@@ -6,6 +6,7 @@ some utility data structures.
 import collections
 import heapq
 import graph
+import profiling
 
 
 class __Unspecified(object):
@@ -116,6 +117,142 @@ class UnionFind(object):
             rank[xRoot] += 1
 
 
+class ConnectivityTracker(object):
+    '''
+    This object keeps track of the components of a graph $G$ as it is
+    built, so that asking whether $G$ is connected, how many components it
+    has or whether two vertices are in the same component takes amortized
+    $\mathcal{O}(\alpha (n))$ time rather than a traversal of $G$.  It is
+    attached to $G$ by \code {G.trackConnectivity()}, after which the
+    methods of $G$ that add vertices and edges merge components in a
+    \code {UnionFind}.  Directions of edges are ignored, so a directed
+    graph is tracked by its weak components.
+
+    Deleting an edge may split a component, which a union find cannot
+    undo, so any deletion (or any change to $G$ not made through its
+    methods) only marks the components as stale; they are rebuilt from
+    $G$ the next time they are asked for.
+    '''
+
+    def __init__(self, G):
+        self.graph = G
+        self.rebuild()
+
+    def stamp(self):
+        '''
+        Returns what must be unchanged in the graph for the components to
+        be up to date, as in \code {G.memo}.
+        '''
+        G = self.graph
+        return (G.version, len(G.vertices), len(G.edges))
+
+    def rebuild(self):
+        '''
+        Finds the components of the graph afresh.
+        '''
+        self.sets = UnionFind()
+        self.count = 0
+        self.stale = False
+        self.__current = None
+        self.verticesAdded(self.graph.vertices)
+        self.edgesAdded(self.graph.edges)
+
+    def changedBefore(self, before):
+        '''
+        Marks the components as stale, and returns True, if the graph had
+        changed unnoticed before an addition, \code {before} being its
+        stamp just before it.
+        '''
+        if before is not None and before != self.__current:
+            self.removed()
+        return self.stale
+
+    def verticesAdded(self, vertices, before=None):
+        '''
+        Notes that the new vertices \code {vertices} have been added to the
+        graph, whose stamp was \code {before} just before.  Vertices
+        already noted are passed over.
+        '''
+        if self.changedBefore(before):
+            return
+        parent = self.sets.parent
+        for v in vertices:
+            if v not in parent:
+                self.sets.makeSet(v)
+                self.count += 1
+        self.__current = self.stamp()
+
+    def edgesAdded(self, edges, before=None):
+        '''
+        Notes that the edges \code {edges}, between vertices already
+        noted, have been added to the graph, whose stamp was
+        \code {before} just before.
+        '''
+        if self.changedBefore(before):
+            return
+        find = self.sets.find
+        for e in edges:
+            x = find(e[0])
+            y = find(e[1])
+            if x != y:
+                self.sets.union(x, y)
+                self.count -= 1
+        self.__current = self.stamp()
+
+    def removed(self):
+        '''
+        Notes that a vertex or an edge has been removed.
+        '''
+        self.stale = True
+
+    def update(self):
+        '''
+        Rebuilds the components if they are stale.
+        '''
+        if self.stale or self.__current != self.stamp():
+            self.rebuild()
+
+    def numberOfComponents(self):
+        '''
+        Returns the number of components of the graph.
+        '''
+        self.update()
+        return self.count
+
+    def is_connected(self):
+        '''
+        Returns True if the graph is connected, otherwise False.
+        '''
+        return self.numberOfComponents() <= 1
+
+    def componentOf(self, v):
+        '''
+        Returns a vertex standing for the component containing $v$: two
+        vertices are in the same component if and only if they give the
+        same vertex, until the graph next changes.
+        '''
+        self.update()
+        return self.sets.find(v)
+
+    def connected(self, u, v):
+        '''
+        Returns True if $u$ and $v$ are in the same component, otherwise
+        False.
+        '''
+        return self.componentOf(u) == self.componentOf(v)
+
+    def components(self):
+        '''
+        Returns the components of the graph, as a list of lists of
+        vertices.
+        '''
+        self.update()
+        members = collections.defaultdict(list)
+        for v in self.graph.vertices:
+            members[self.sets.find(v)].append(v)
+        return members.values()
+
+
 MinusInfinity = float('-inf')
 Infinity = float('+inf')
 
@@ -141,6 +278,7 @@ def DFS(G, start=unspecified):
             yield w
             visited.add(w)
             stack.extend(neighbors[w])
+    profiling.count('vertices visited', len(visited))
 
 
 def BFS(G, start=unspecified):
@@ -148,79 +286,368 @@ def BFS(G, start=unspecified):
     This is a generator that yields the vertices of $G$ in the order
     they are encountered during a breadth-first search of $G$ starting at the
     vertex \code {start} (if specified), or starting at some arbitrary vertex
-    in \code {G.vertices} if not specified.
+    in \code {G.vertices} if not specified.  An out-of-core graph (see
+    \code {graph.is_outOfCore}) searches itself.
     '''
     if start is unspecified:
         start = arbitraryElementOf(G.vertices)
 
+    if graph.is_outOfCore(G):
+        for v in G.BFS(start):
+            yield v
+        return
+
     neighbors = graph.adjacencyLists(G)
 
-    reached = collections.deque()
-    searched = set()
+    reached = collections.deque([start])
+    seen = set([start])
 
-    reached.append(start)
-    while not reached.empty():
+    while reached:
         v = reached.popleft()
         yield v
         for w in neighbors[v]:
-            if w not in searched and w not in reached:
+            if w not in seen:
+                seen.add(w)
                 reached.append(w)
-        searched.add(v)
+    profiling.count('vertices visited', len(seen))
 
 
-def Prim(G, root=unspecified):
+def edgeWeights(G, weight=None):
+    '''
+    Returns a sequence whose $i$-th entry is the weight of
+    \code {G.edges[i]}.  \code {weight} may be the name of a column of
+    \code {G.edgeData}, a sequence of weights, or (more slowly) a function
+    of an edge.  If it is not given, the weights are the
+    \code {'weight'} column if $G$ has one, or those stored with a
+    \code {mapped.MappedGraph}, and otherwise all $1$.
+    '''
+    data = getattr(G, 'edgeData', None)
+    if weight is None:
+        if data is not None and 'weight' in data:
+            return data['weight']
+        if getattr(G, 'weights', None) is not None:
+            return G.weights
+        return [1] * len(G.edges)
+    if isinstance(weight, basestring):
+        if data is None or weight not in data:
+            raise KeyError("The edges have no attribute %r." % weight)
+        return data[weight]
+    if callable(weight):
+        return [weight(e) for e in G.edges]
+    if len(weight) != len(G.edges):
+        raise ValueError("There must be exactly one weight per edge.")
+    return weight
+
+
+def incidenceLists(G, directed=None):
     '''
-    Returns the edges of a minimum-weight spanning tree of $G$,
-    starting from the vertex \code {root} (if specified).
+    Returns the list of vertices of $G$ and the list \code {incident},
+    where \code {incident[i]} lists a pair \code {(j, k)} for each edge
+    \code {G.edges[k]} from vertex $i$ to vertex $j$ (by position), both
+    ends of an undirected edge listing it.  If \code {directed} is False,
+    every edge is taken to be undirected.
+    '''
+    vertices = list(G.vertices)
+    index = dict((v, i) for (i, v) in enumerate(vertices))
+    incident = [[] for v in vertices]
+    if directed is None:
+        directed = graph.is_directed(G)
+    for (k, e) in enumerate(G.edges):
+        i = index[e[0]]
+        j = index[e[1]]
+        incident[i].append((j, k))
+        if not directed:
+            incident[j].append((i, k))
+    return vertices, incident
+
+
+def Prim(G, root=unspecified, weight=None):
+    '''
+    Returns the edges of a minimum-weight spanning tree of the component
+    of $G$ containing the vertex \code {root} (if specified), as a list of
+    pairs \code {(v, parent)}, one for each vertex other than the root.
+    The weights are found by \code {edgeWeights(G, weight)}, and the
+    directions of edges are ignored.  A heap holds the edges leaving the
+    tree, so this takes $\mathcal{O}(m \log n)$ time.
     '''
     if root is unspecified:
         root = arbitraryElementOf(G.vertices)
-    key = {}
-    Pi = {}
-    adj = graph.adjacencyLists(G)
-    for u in G.vertices:
-        key[u] = Infinity
-        Pi[u] = None
-    key[root] = 0
-    Q = PriorityQueue(G.vertices)
-    while Q:
-        u = Q.extract_min()
-        for v in adj[u]:
-            if v in Q and G.weight((u, v)) < key[v]:
-                Pi[v] = u
-                key[v] = G.weight((u, v))
-    return [(v, Pi[v]) for v in G.vertices if v is not root]
+    weights = edgeWeights(G, weight)
+    vertices, incident = incidenceLists(G, directed=False)
+    start = vertices.index(root)
+    inTree = [False] * len(vertices)
+    tree = []
+    heap = [(0, start, None)]
+    pops = 0
+    while heap:
+        (w, i, parent) = heapq.heappop(heap)
+        pops += 1
+        if inTree[i]:
+            continue
+        inTree[i] = True
+        if parent is not None:
+            tree.append((vertices[i], vertices[parent]))
+        for (j, k) in incident[i]:
+            if not inTree[j]:
+                heapq.heappush(heap, (weights[k], j, i))
+    profiling.count('heap operations', 2 * pops - 1)
+    return tree
 
 
 def Kruskal(G, weight=None):
     '''
-    Returns the vertices of a minimum-weight spanning tree of $G$
-    obtained by the algorithm of Kruskal.
+    Returns the edges of a minimum-weight spanning forest of $G$ obtained
+    by the algorithm of Kruskal, as a set of pairs.  The weights are found
+    by \code {edgeWeights(G, weight)}; the edges are sorted by looking
+    them up in the column of weights directly, with no call of a Python
+    function per edge.
     '''
-    if weight is None:
-        def weight(edge): return 1
+    weights = edgeWeights(G, weight)
+    edges = G.edges
     T = set([])
     U = UnionFind()
-    Q = PriorityQueue([(weight(e), tuple(e)) for e in G.edges])
     for v in G.vertices:
         U.makeSet(v)
-
-    while Q:
-
-        # pylint complains that we don't use the variable \code{w},
-        # but it's really only there so we can unpack the (weight, edge)
-        # tuple extracted from the queue in a nice way.  The following
-        # comment is to silence pylint's complaining:
-
-        # pylint: disable-msg=W0612
-
-        (w, (u, v)) = Q.extract_min()
+    for k in sorted(xrange(len(edges)), key=weights.__getitem__):
+        e = edges[k]
+        u, v = e[0], e[1]
         if U.find(u) != U.find(v):
             T.add((u, v))
             U.union(u, v)
+    profiling.count('edges considered', len(edges))
+    profiling.count('unions', len(T))
     return T
 
 
+def Dijkstra(G, source, weight=None):
+    '''
+    Returns the pair of dicts \code {(distance, previous)} found by the
+    algorithm of Dijkstra from the vertex \code {source}:
+    \code {distance[v]} is the length of a shortest path from
+    \code {source} to $v$, for each vertex $v$ it can reach, and
+    \code {previous[v]} is the vertex before $v$ on such a path.  The
+    weights, found by \code {edgeWeights(G, weight)}, may not be negative.
+    Edges of a directed graph are followed forward only.
+    '''
+    weights = edgeWeights(G, weight)
+    if len(weights) and min(weights) < 0:
+        raise ValueError("Edge weights may not be negative.")
+    vertices, incident = incidenceLists(G)
+    start = vertices.index(source)
+    best = {start: 0}
+    previous = {}
+    done = set()
+    heap = [(0, start)]
+    pushes = 1
+    while heap:
+        (d, i) = heapq.heappop(heap)
+        if i in done:
+            continue
+        done.add(i)
+        for (j, k) in incident[i]:
+            candidate = d + weights[k]
+            if j not in best or candidate < best[j]:
+                best[j] = candidate
+                previous[j] = i
+                heapq.heappush(heap, (candidate, j))
+                pushes += 1
+    profiling.count('heap operations', 2 * pushes)
+    distance = dict((vertices[i], d) for (i, d) in best.iteritems())
+    return distance, dict((vertices[j], vertices[i])
+                          for (j, i) in previous.iteritems())
+
+
+def degeneracyOrderOfLists(neighbors):
+    '''
+    Returns the pair \code {(order, core)} for the graph on the vertices
+    $0, 1, \dots, n - 1$ in which \code {neighbors[v]} is the set of
+    vertices adjacent to $v$.  \code {core[v]} is the core number of $v$,
+    the largest $k$ such that $v$ lies in a subgraph of minimum degree
+    $k$, and \code {order} lists the vertices in a \emph {degeneracy
+    ordering}: by nondecreasing core number, each vertex $v$ having at
+    most \code {core[v]} neighbors among the vertices after it.
+
+    This is the bucket algorithm of Batagelj and Zaversnik: the vertices
+    are kept sorted by remaining degree in a single array, with the start
+    of each degree's block recorded, so that taking a vertex and lowering
+    the degrees of its neighbors takes constant time per edge, and the
+    whole ordering takes $\mathcal{O}(n + m)$ time.
+    '''
+    n = len(neighbors)
+    degree = [len(ws) for ws in neighbors]
+    top = max(degree) if n else 0
+    start = [0] * (top + 1)
+    for d in degree:
+        start[d] += 1
+    total = 0
+    for d in xrange(top + 1):
+        start[d], total = total, total + start[d]
+    position = [0] * n
+    order = [0] * n
+    for v in xrange(n):
+        position[v] = start[degree[v]]
+        order[position[v]] = v
+        start[degree[v]] += 1
+    for d in xrange(top, 0, -1):
+        start[d] = start[d - 1]
+    if n:
+        start[0] = 0
+
+    # Taking the vertices in order, each neighbor with a larger remaining
+    # degree moves to the front of its block, and the block boundary
+    # moves past it, putting it in the block below.
+
+    for i in xrange(n):
+        v = order[i]
+        for u in neighbors[v]:
+            if degree[u] > degree[v]:
+                du = degree[u]
+                pu = position[u]
+                pw = start[du]
+                w = order[pw]
+                if u != w:
+                    order[pu] = w
+                    position[w] = pu
+                    order[pw] = u
+                    position[u] = pw
+                start[du] += 1
+                degree[u] -= 1
+    return order, degree
+
+
+def undirectedNeighborSets(G):
+    '''
+    Returns the list of vertices of $G$ and the list of sets of positions
+    of the neighbors of each, ignoring the directions of edges, loops and
+    parallel edges.
+    '''
+    vertices = list(G.vertices)
+    index = dict((v, i) for (i, v) in enumerate(vertices))
+    neighbors = [set() for v in vertices]
+    for e in G.edges:
+        i = index[e[0]]
+        j = index[e[1]]
+        if i != j:
+            neighbors[i].add(j)
+            neighbors[j].add(i)
+    return vertices, neighbors
+
+
+def degeneracyOrdering(G):
+    '''
+    Returns the list of vertices of $G$ in a degeneracy ordering (see
+    \code {degeneracyOrderOfLists}), ignoring the directions of edges.
+    No vertex has more later neighbors in this ordering than the
+    degeneracy of $G$, the least $k$ such that every subgraph of $G$ has a
+    vertex of degree at most $k$.
+    '''
+    vertices, neighbors = undirectedNeighborSets(G)
+    order, core = degeneracyOrderOfLists(neighbors)
+    return [vertices[i] for i in order]
+
+
+def coreNumbers(G):
+    '''
+    Returns the dict giving the core number of each vertex of $G$ (see
+    \code {degeneracyOrderOfLists}), ignoring the directions of edges.
+    The vertices of core number at least $k$ induce the \emph {$k$-core}
+    of $G$, its largest subgraph of minimum degree $k$, and the largest
+    core number is the degeneracy of $G$.
+    '''
+    vertices, neighbors = undirectedNeighborSets(G)
+    order, core = degeneracyOrderOfLists(neighbors)
+    return dict(zip(vertices, core))
+
+
+def colorSort(rows, candidates):
+    '''
+    Colors the vertices of the bitset \code {candidates} greedily, each
+    color class being an independent set found by repeatedly taking the
+    lowest vertex not adjacent to those already taken.  Returns the list
+    of vertices in order of color, and the list of their colors.
+    '''
+    order = []
+    colors = []
+    color = 0
+    uncolored = candidates
+    while uncolored:
+        color += 1
+        available = uncolored
+        while available:
+            low = available & -available
+            v = low.bit_length() - 1
+            available &= ~rows[v] & ~low
+            uncolored ^= low
+            order.append(v)
+            colors.append(color)
+    return order, colors
+
+
+def bitsetMaximumClique(rows):
+    '''
+    Returns the list of positions of the vertices of a largest clique of
+    the undirected graph whose bit-packed adjacency matrix is
+    \code {rows} (see \code {graph.adjacencyBitsets}).
+
+    This is the branch and bound search of Tomita and Seki: the
+    candidates for extending the current clique are colored greedily, and
+    since a clique has at most one vertex of each color, a branch is cut
+    off as soon as the number of colors left cannot beat the best clique
+    found.  The candidate sets are bitsets, so narrowing them to the
+    neighbors of a new vertex is a single \emph {and}.  The vertices are
+    first renumbered in the reverse of a degeneracy ordering (see
+    \code {degeneracyOrderOfLists}), so that the greedy colorings, which
+    take vertices in numerical order, start from the densest part of the
+    graph and use few colors.  No clique has more vertices than one more
+    than the degeneracy, so the search stops if it finds one that large.
+    '''
+    n = len(rows)
+    neighbors = []
+    for row in rows:
+        ws = []
+        while row:
+            low = row & -row
+            ws.append(low.bit_length() - 1)
+            row ^= low
+        neighbors.append(ws)
+    order, core = degeneracyOrderOfLists(neighbors)
+    order.reverse()
+    bound = max(core) + 1 if n else 0
+    position = [0] * n
+    for (i, v) in enumerate(order):
+        position[v] = i
+    rows = []
+    for v in order:
+        renumbered = 0
+        for w in neighbors[v]:
+            renumbered |= 1 << position[w]
+        rows.append(renumbered)
+    best = []
+
+    def expand(clique, candidates):
+        '''
+        Tries every extension of \code {clique} by the vertices of the
+        bitset \code {candidates}.
+        '''
+        order, colors = colorSort(rows, candidates)
+        for k in xrange(len(order) - 1, -1, -1):
+            if len(clique) + colors[k] <= len(best) or len(best) == bound:
+                return
+            v = order[k]
+            clique.append(v)
+            narrowed = candidates & rows[v]
+            if narrowed:
+                expand(clique, narrowed)
+            elif len(clique) > len(best):
+                best[:] = clique
+            clique.pop()
+            candidates &= ~(1 << v)
+
+    expand([], (1 << n) - 1)
+    profiling.count('vertices', n)
+    return [order[i] for i in best]
+
+
 def bridges(G):
     '''
     See West, p. 23., Theorem 1.2.14. :
@@ -0,0 +1,481 @@
+'''
+The \code{approx} module estimates invariants of graphs too large to
+compute them exactly, by random sampling.  Each estimate is an
+\code {Estimate}, carrying a confidence interval and the number of samples
+it took, and each estimator takes a budget of samples, so that accuracy
+can be traded for time; if a \code {precision} is also given, sampling
+stops as soon as the interval is within that fraction of the estimate.
+
+The estimators only need the degree and the neighbors of a vertex, so they
+work on any graph, and on graphs with \code {degree} and \code {neighbors}
+methods of their own (\code {mapped.MappedGraph},
+\code {sharded.ShardedGraph}) they never hold the edges in memory.  They
+assume a simple undirected graph.
+'''
+
+import bisect
+import collections
+import math
+import random
+from array import array
+
+from graph import adjacencyLists
+
+DEFAULT_SAMPLES = 10000
+DEFAULT_CONFIDENCE = 0.95
+
+# Samples are drawn in batches of this many between checks of the
+# precision reached.
+
+BATCH = 256
+
+# The number of resamplings of the sources used for the interval of the
+# effective diameter.
+
+BOOTSTRAP_ROUNDS = 200
+
+
+class Estimate(object):
+    '''
+    This object is an estimate \code {value} of some quantity, which lies
+    between \code {low} and \code {high} with probability (about)
+    \code {confidence}, found from \code {samples} samples.
+    '''
+
+    def __init__(self, value, low, high, confidence, samples):
+        self.value = value
+        self.low = low
+        self.high = high
+        self.confidence = confidence
+        self.samples = samples
+
+    def __float__(self):
+        return float(self.value)
+
+    def __contains__(self, x):
+        return self.low <= x <= self.high
+
+    def __repr__(self):
+        return 'Estimate(%g, [%g, %g] at %g%%, %d samples)' % (
+            self.value, self.low, self.high, 100 * self.confidence,
+            self.samples)
+
+    def scaled(self, factor):
+        '''
+        Returns the estimate of \code {factor} times the quantity.
+        '''
+        return Estimate(self.value * factor, self.low * factor,
+                        self.high * factor, self.confidence, self.samples)
+
+
+def normalQuantile(p):
+    '''
+    Returns the $x$ at which the standard normal distribution function is
+    $p$, by bisection.
+    '''
+    low, high = -40.0, 40.0
+    for step in xrange(100):
+        middle = (low + high) / 2
+        if 0.5 * (1 + math.erf(middle / math.sqrt(2))) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def zScore(confidence):
+    '''
+    Returns the number of standard deviations on either side of the mean
+    that a normal variable falls within with probability
+    \code {confidence}.
+    '''
+    return normalQuantile(0.5 + confidence / 2)
+
+
+def proportionEstimate(successes, trials, confidence):
+    '''
+    Returns the estimate of a probability from \code {successes} out of
+    \code {trials}, with the interval of Wilson, which stays within
+    $[0, 1]$ and behaves well for small counts.
+    '''
+    if not trials:
+        return Estimate(0.0, 0.0, 1.0, confidence, 0)
+    z = zScore(confidence)
+    p = float(successes) / trials
+    scale = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / scale
+    spread = z / scale * math.sqrt(p * (1 - p) / trials +
+                                   z * z / (4.0 * trials * trials))
+    return Estimate(p, max(0.0, centre - spread), min(1.0, centre + spread),
+                    confidence, trials)
+
+
+def meanEstimate(total, squares, count, confidence):
+    '''
+    Returns the estimate of a mean from the sum and the sum of squares of
+    \code {count} samples, with the interval of the central limit
+    theorem.
+    '''
+    if not count:
+        return Estimate(0.0, float('-inf'), float('inf'), confidence, 0)
+    mean = float(total) / count
+    variance = 0.0
+    if count > 1:
+        variance = max(0.0, (squares - count * mean * mean) / (count - 1))
+    spread = zScore(confidence) * math.sqrt(variance / count)
+    return Estimate(mean, mean - spread, mean + spread, confidence, count)
+
+
+def precise(estimate, precision):
+    '''
+    Returns True if \code {estimate} is within the relative
+    \code {precision} asked for (never, if none was).
+    '''
+    if precision is None:
+        return False
+    return (estimate.high - estimate.low) / 2 <= \
+        precision * abs(estimate.value)
+
+
+class NeighborAccess(object):
+    '''
+    This object gives the estimators the vertices of $G$, their degrees
+    and their neighbors, from the \code {degree} and \code {neighbors}
+    methods of $G$ if it has them, and otherwise from adjacency lists
+    made once.  It also samples vertices in proportion to a weight of
+    their degree.
+    '''
+
+    def __init__(self, G):
+        self.vertices = G.vertices
+        if hasattr(G, 'degree') and hasattr(G, 'neighbors'):
+            self.degree = G.degree
+            self.neighbors = G.neighbors
+        else:
+            lists = adjacencyLists(G)
+            self.degree = lambda v: len(lists[v])
+            self.neighbors = lists.__getitem__
+        self.__cumulative = {}
+
+    def vertex(self, rng):
+        '''
+        Returns a vertex chosen uniformly at random.
+        '''
+        return self.vertices[rng.randrange(len(self.vertices))]
+
+    def cumulative(self, weight):
+        '''
+        Returns the array of running totals of \code {weight} of the
+        degrees of the vertices, made in one pass the first time.
+        '''
+        if weight not in self.__cumulative:
+            totals = array('d')
+            total = 0.0
+            for v in self.vertices:
+                total += weight(self.degree(v))
+                totals.append(total)
+            self.__cumulative[weight] = totals
+        return self.__cumulative[weight]
+
+    def weightedVertex(self, weight, rng):
+        '''
+        Returns a vertex chosen with probability proportional to
+        \code {weight} of its degree.
+        '''
+        totals = self.cumulative(weight)
+        i = bisect.bisect_right(totals, rng.random() * totals[-1])
+        return self.vertices[min(i, len(totals) - 1)]
+
+
+def wedges(d):
+    '''
+    Returns the number of paths of length two through a vertex of
+    degree $d$.
+    '''
+    return d * (d - 1) / 2
+
+
+def ends(d):
+    '''
+    Returns the number of ends of edges at a vertex of degree $d$.
+    '''
+    return d
+
+
+def sampleWedge(access, v, rng):
+    '''
+    Returns True if a path of length two through $v$, chosen at random,
+    is closed by an edge into a triangle.
+    '''
+    neighbors = access.neighbors(v)
+    i, j = rng.sample(xrange(len(neighbors)), 2)
+    u = neighbors[i]
+    w = neighbors[j]
+    return w in set(access.neighbors(u))
+
+
+def transitivityEstimate(G, samples=DEFAULT_SAMPLES,
+                         confidence=DEFAULT_CONFIDENCE, precision=None,
+                         seed=None, access=None):
+    '''
+    Returns an \code {Estimate} of the transitivity (global clustering
+    coefficient) of $G$: the fraction of paths of length two that are
+    closed into triangles.  Paths are sampled uniformly, by choosing
+    their middle vertex in proportion to the number of paths through it,
+    and the fraction closed is a proportion.
+    '''
+    rng = random.Random(seed)
+    access = access or NeighborAccess(G)
+    if not len(access.vertices) or not access.cumulative(wedges)[-1]:
+        return Estimate(0.0, 0.0, 0.0, confidence, 0)
+    closed = 0
+    drawn = 0
+    while drawn < samples:
+        for k in xrange(min(BATCH, samples - drawn)):
+            closed += sampleWedge(access, access.weightedVertex(wedges, rng),
+                                  rng)
+            drawn += 1
+        estimate = proportionEstimate(closed, drawn, confidence)
+        if precise(estimate, precision):
+            break
+    return estimate
+
+
+def triangleEstimate(G, samples=DEFAULT_SAMPLES,
+                     confidence=DEFAULT_CONFIDENCE, precision=None,
+                     method='wedge', seed=None):
+    '''
+    Returns an \code {Estimate} of the number of triangles of $G$, by one
+    of two methods.  With \code {method = 'wedge'}, the transitivity is
+    estimated by \code {transitivityEstimate}, and each triangle closes
+    three of the $W$ paths of length two, so there are about $tW/3$.
+    With \code {method = 'edge'}, edges are sampled uniformly and the
+    common neighbors of their ends counted; each triangle has three
+    edges, so there are $m/3$ times the mean count.  The first is better
+    when triangles are rare at high degree vertices, the second when
+    degrees are small.
+    '''
+    access = NeighborAccess(G)
+    if method == 'wedge':
+        estimate = transitivityEstimate(G, samples, confidence, precision,
+                                        seed, access)
+        if not len(access.vertices):
+            return estimate
+        return estimate.scaled(access.cumulative(wedges)[-1] / 3.0)
+    if method != 'edge':
+        raise ValueError("There is no method %r." % (method,))
+    rng = random.Random(seed)
+    if not len(access.vertices) or not access.cumulative(ends)[-1]:
+        return Estimate(0.0, 0.0, 0.0, confidence, 0)
+    m = access.cumulative(ends)[-1] / 2
+    total = squares = 0.0
+    drawn = 0
+    while drawn < samples:
+        for k in xrange(min(BATCH, samples - drawn)):
+
+            # A uniform edge is a uniform end of an edge, whose vertex is
+            # chosen in proportion to its degree.
+
+            u = access.weightedVertex(ends, rng)
+            neighbors = access.neighbors(u)
+            w = neighbors[rng.randrange(len(neighbors))]
+            common = len(set(neighbors) & set(access.neighbors(w)))
+            total += common
+            squares += common * common
+            drawn += 1
+        estimate = meanEstimate(total, squares, drawn, confidence)
+        if precise(estimate, precision):
+            break
+    return estimate.scaled(m / 3.0)
+
+
+def averageClusteringEstimate(G, samples=DEFAULT_SAMPLES,
+                              confidence=DEFAULT_CONFIDENCE,
+                              precision=None, seed=None):
+    '''
+    Returns an \code {Estimate} of the average over the vertices of $G$ of
+    their local clustering coefficients, the fraction of pairs of their
+    neighbors that are adjacent (taken to be $0$ for vertices of degree
+    less than $2$).  For a uniformly chosen vertex, a uniformly chosen
+    pair of its neighbors is adjacent with probability equal to the
+    average, so it is estimated as a proportion.
+    '''
+    rng = random.Random(seed)
+    access = NeighborAccess(G)
+    if not len(access.vertices):
+        return Estimate(0.0, 0.0, 0.0, confidence, 0)
+    closed = 0
+    drawn = 0
+    while drawn < samples:
+        for k in xrange(min(BATCH, samples - drawn)):
+            v = access.vertex(rng)
+            if access.degree(v) >= 2:
+                closed += sampleWedge(access, v, rng)
+            drawn += 1
+        estimate = proportionEstimate(closed, drawn, confidence)
+        if precise(estimate, precision):
+            break
+    return estimate
+
+
+def distanceCounts(access, source):
+    '''
+    Returns the list whose $d$-th entry is the number of vertices at
+    distance $d$ from \code {source}, found by breadth-first search.
+    '''
+    seen = set([source])
+    level = [source]
+    counts = [1]
+    while level:
+        following = []
+        for v in level:
+            for w in access.neighbors(v):
+                if w not in seen:
+                    seen.add(w)
+                    following.append(w)
+        if following:
+            counts.append(len(following))
+        level = following
+    return counts
+
+
+def quantileDistance(counts, quantile):
+    '''
+    Returns the distance within which the fraction \code {quantile} of
+    the pairs of distinct vertices counted in \code {counts} (a list of
+    numbers of pairs at each distance) lie, interpolating linearly
+    between whole distances as is usual for the effective diameter.
+    '''
+    pairs = sum(counts[1:])
+    if not pairs:
+        return 0.0
+    target = quantile * pairs
+    within = 0
+    for d in xrange(1, len(counts)):
+        if within + counts[d] >= target:
+            return d - 1 + float(target - within) / counts[d]
+        within += counts[d]
+    return float(len(counts) - 1)
+
+
+def distanceEstimates(G, sources=100, confidence=DEFAULT_CONFIDENCE,
+                      quantile=0.9, seed=None):
+    '''
+    Returns a dict with \code {Estimate}s of the average distance between
+    vertices of $G$ joined by paths (key \code {'averageDistance'}) and of
+    its effective diameter (key \code {'effectiveDiameter'}), the distance
+    within which the fraction \code {quantile} of such pairs lie.
+
+    A breadth-first search is made from each of \code {sources} vertices
+    chosen uniformly at random.  The average distance is the total of
+    the distances found over the number of pairs, a ratio whose interval
+    comes from the central limit theorem; the interval of the effective
+    diameter comes from resampling the sources.
+    '''
+    rng = random.Random(seed)
+    access = NeighborAccess(G)
+    if not len(access.vertices):
+        raise ValueError("The null graph has no distances.")
+    found = [distanceCounts(access, access.vertex(rng))
+             for k in xrange(sources)]
+    totals = [sum([d * c for (d, c) in enumerate(counts)])
+              for counts in found]
+    pairs = [sum(counts[1:]) for counts in found]
+    if not sum(pairs):
+        zero = Estimate(0.0, 0.0, 0.0, confidence, sources)
+        return {'averageDistance': zero, 'effectiveDiameter': zero}
+
+    # The variance of a ratio of sums is that of the sum of the
+    # differences of its terms from the ratio, scaled by the mean pairs.
+
+    ratio = float(sum(totals)) / sum(pairs)
+    spread = 0.0
+    if sources > 1:
+        residuals = [t - ratio * p for (t, p) in zip(totals, pairs)]
+        variance = sum([r * r for r in residuals]) / (sources - 1)
+        meanPairs = float(sum(pairs)) / sources
+        spread = zScore(confidence) * math.sqrt(variance / sources) / \
+            meanPairs
+    average = Estimate(ratio, ratio - spread, ratio + spread, confidence,
+                       sources)
+
+    def pooled(chosen):
+        '''
+        Returns the counts of pairs at each distance from the sources
+        \code {chosen}.
+        '''
+        counts = collections.defaultdict(int)
+        for i in chosen:
+            for (d, c) in enumerate(found[i]):
+                counts[d] += c
+        return [counts[d] for d in xrange(max(counts) + 1)]
+
+    value = quantileDistance(pooled(xrange(sources)), quantile)
+    resampled = sorted([quantileDistance(pooled([rng.randrange(sources)
+                                                 for k in xrange(sources)]),
+                                         quantile)
+                        for r in xrange(BOOTSTRAP_ROUNDS)])
+    cut = int((1 - confidence) / 2 * BOOTSTRAP_ROUNDS)
+    diameter = Estimate(value, min(value, resampled[cut]),
+                        max(value, resampled[-1 - cut]), confidence, sources)
+    return {'averageDistance': average, 'effectiveDiameter': diameter}
+
+
+def averageDistanceEstimate(G, sources=100, confidence=DEFAULT_CONFIDENCE,
+                            seed=None):
+    '''
+    Returns the \code {Estimate} of the average distance of $G$ made by
+    \code {distanceEstimates}.
+    '''
+    return distanceEstimates(G, sources, confidence,
+                             seed=seed)['averageDistance']
+
+
+def effectiveDiameterEstimate(G, sources=100, quantile=0.9,
+                              confidence=DEFAULT_CONFIDENCE, seed=None):
+    '''
+    Returns the \code {Estimate} of the effective diameter of $G$ made by
+    \code {distanceEstimates}.
+    '''
+    return distanceEstimates(G, sources, confidence, quantile,
+                             seed)['effectiveDiameter']
+
+
+def degreeSketch(G, samples=DEFAULT_SAMPLES, confidence=DEFAULT_CONFIDENCE,
+                 quantiles=(0.5, 0.9, 0.99), seed=None):
+    '''
+    Returns a sketch of the degree distribution of $G$ from the degrees
+    of \code {samples} vertices chosen uniformly at random, as a dict
+    with the keys:
+    \begin{description}
+        \item [\code {mean}] an \code {Estimate} of the mean degree;
+        \item [\code {quantiles}] a dict mapping each of
+        \code {quantiles} to the degree below which that fraction of the
+        sampled vertices lie;
+        \item [\code {bins}] a list of triples \code {(low, high,
+        fraction)}, where \code {fraction} is an \code {Estimate} of the
+        fraction of vertices whose degree is at least \code {low} and less
+        than \code {high}, for \code {low} $0$ and the powers of $2$.
+    \end{description}
+    '''
+    rng = random.Random(seed)
+    access = NeighborAccess(G)
+    if not len(access.vertices):
+        raise ValueError("The null graph has no vertex degrees.")
+    sampled = sorted([access.degree(access.vertex(rng))
+                      for k in xrange(samples)])
+    mean = meanEstimate(sum(sampled), sum([d * d for d in sampled]),
+                        samples, confidence)
+    bounds = [0, 1]
+    while bounds[-1] <= sampled[-1]:
+        bounds.append(2 * bounds[-1])
+    bins = []
+    for (low, high) in zip(bounds, bounds[1:]):
+        inside = bisect.bisect_left(sampled, high) - \
+            bisect.bisect_left(sampled, low)
+        bins.append((low, high, proportionEstimate(inside, samples,
+                                                   confidence)))
+    return {'mean': mean, 'bins': bins,
+            'quantiles': dict((q, sampled[min(samples - 1,
+                                              int(q * samples))])
+                              for q in quantiles)}
@@ -0,0 +1,248 @@
+'''
+The \code{batch} module computes the same invariants of many graphs at
+once, sharing the graphs out among a pool of worker processes.  Each graph
+is sent to the workers as an array of integers giving the positions of the
+ends of its edges, which is much smaller and quicker to pickle than its
+\code {Edge} objects, and the graphs are sent in chunks whose size adapts
+to the time the invariants take, so that cheap invariants of small graphs
+are not swamped by the cost of communication while expensive ones still
+spread evenly over the workers.
+'''
+
+import itertools
+import multiprocessing
+import threading
+import time
+import Queue
+from array import array
+
+import graph
+import invariants as invariantsModule
+
+# The chunks are sized so that each takes a worker about this many seconds.
+
+CHUNK_SECONDS = 0.05
+
+MAX_CHUNK = 4096
+
+# The number of chunks kept waiting for each worker.
+
+CHUNKS_PER_WORKER = 2
+
+
+def encodeGraph(G):
+    '''
+    Returns $G$ as a tuple \code {(vertices, directed, edges)}: the list of
+    vertices (or just their number, if they are $0, 1, \dots, n - 1$),
+    whether $G$ is directed, and the positions in that list of the ends of
+    each edge in turn, packed as a string of machine integers.
+    '''
+    vertices = list(G.vertices)
+    n = len(vertices)
+    if vertices == range(n):
+        index = None
+        vertices = n
+    else:
+        index = dict((v, i) for (i, v) in enumerate(vertices))
+    ends = array('l')
+    for e in G.edges:
+        if index is None:
+            ends.append(e[0])
+            ends.append(e[1])
+        else:
+            ends.append(index[e[0]])
+            ends.append(index[e[1]])
+    return (vertices, graph.is_directed(G), ends.tostring())
+
+
+def decodeGraph(encoded):
+    '''
+    Returns the graph encoded by \code {encodeGraph}.
+    '''
+    vertices, directed, packed = encoded
+    if isinstance(vertices, (int, long)):
+        vertices = range(vertices)
+    ends = array('l')
+    ends.fromstring(packed)
+    G = graph.Graph(vertices=vertices, directed=directed)
+    G.addEdges((vertices[ends[k]], vertices[ends[k + 1]])
+               for k in xrange(0, len(ends), 2))
+    return G
+
+
+def resolveInvariants(names):
+    '''
+    Returns the list of functions named by \code {names}, each of which is
+    either a function or the name of a function in
+    \code {graph.invariants}.
+    '''
+    functions = []
+    for name in names:
+        if isinstance(name, basestring):
+            function = getattr(invariantsModule, name, None)
+            if not callable(function):
+                raise ValueError("There is no invariant called %r." % name)
+            name = function
+        functions.append(name)
+    return functions
+
+
+def initializeBatchWorker(functions):
+    '''
+    Stores the invariants to compute in a worker process.
+    '''
+    global workerFunctions
+    workerFunctions = functions
+
+
+def evaluateChunk(task):
+    '''
+    Computes the invariants of a chunk of encoded graphs, returning
+    \code {(start, values, seconds, error)}: the position of the first
+    graph of the chunk, the list of tuples of values, the time taken and
+    the exception raised, if any.  The exception is returned rather than
+    raised, since \code {multiprocessing} would otherwise lose it.
+    '''
+    start, chunk = task
+    began = time.time()
+    try:
+        values = []
+        for encoded in chunk:
+            G = decodeGraph(encoded)
+            values.append(tuple([f(G) for f in workerFunctions]))
+    except Exception, error:
+        return (start, None, time.time() - began, error)
+    return (start, values, time.time() - began, None)
+
+
+def chunkSize(secondsPerGraph, target=CHUNK_SECONDS):
+    '''
+    Returns the number of graphs to put in a chunk, given the time each
+    graph has been taking.
+    '''
+    if secondsPerGraph <= 0:
+        return MAX_CHUNK
+    return max(1, min(MAX_CHUNK, int(target / secondsPerGraph)))
+
+
+def evaluateInPool(graphs, functions, workers, target):
+    '''
+    This is a generator that yields \code {(i, values)} for the $i$-th
+    graph of \code {graphs}, in the order in which the workers finish.
+    '''
+    source = enumerate(graphs)
+    finished = Queue.Queue()
+    pool = multiprocessing.Pool(workers, initializeBatchWorker, (functions,))
+    try:
+        size = 1
+        secondsPerGraph = None
+        inFlight = 0
+        exhausted = False
+        while True:
+            while not exhausted and inFlight < CHUNKS_PER_WORKER * workers:
+                chunk = list(itertools.islice(source, size))
+                if not chunk:
+                    exhausted = True
+                    break
+                task = (chunk[0][0], [encodeGraph(G) for (i, G) in chunk])
+                pool.apply_async(evaluateChunk, (task,),
+                                 callback=finished.put)
+                inFlight += 1
+            if not inFlight:
+                break
+
+            # We wait with a timeout, since an untimed wait on a queue
+            # cannot be interrupted from the keyboard.
+
+            while True:
+                try:
+                    start, values, seconds, error = finished.get(True, 1)
+                    break
+                except Queue.Empty:
+                    pass
+            inFlight -= 1
+            if error is not None:
+                raise error
+            for (k, value) in enumerate(values):
+                yield start + k, value
+
+            # The estimate of the time per graph is a running average, so
+            # that one unusual chunk does not upset the chunk size.
+
+            perGraph = seconds / len(values)
+            if secondsPerGraph is None:
+                secondsPerGraph = perGraph
+            else:
+                secondsPerGraph = (secondsPerGraph + perGraph) / 2
+            size = chunkSize(secondsPerGraph, target)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def mapInvariants(graphs, invariants, workers=None, ordered=True,
+                  chunkSeconds=CHUNK_SECONDS):
+    '''
+    This is a generator that computes the invariants \code {invariants}
+    (functions, or names of functions in \code {graph.invariants}) of each
+    graph produced by the iterable \code {graphs}, using \code {workers}
+    processes (by default, one for each processor).
+
+    If \code {ordered} is true, it yields, for each graph in turn, the
+    tuple of the values of the invariants; otherwise, it yields a pair
+    \code {(i, values)} for the $i$-th graph as soon as its values are
+    known.  Graphs are read from \code {graphs} only as the workers become
+    free, so it may be a generator of arbitrarily many graphs.  Functions
+    passed as invariants must be defined at the top level of a module, so
+    that the workers can find them.
+    '''
+    functions = resolveInvariants(invariants)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if workers <= 1:
+        results = ((i, tuple([f(G) for f in functions]))
+                   for (i, G) in enumerate(graphs))
+    else:
+        results = evaluateInPool(graphs, functions, workers, chunkSeconds)
+
+    if not ordered:
+        for result in results:
+            yield result
+        return
+
+    waiting = {}
+    following = 0
+    for (i, values) in results:
+        waiting[i] = values
+        while following in waiting:
+            yield waiting.pop(following)
+            following += 1
+
+
+def mapInvariantsAsync(graphs, invariants, callback, workers=None,
+                       chunkSeconds=CHUNK_SECONDS):
+    '''
+    Computes invariants as \code {mapInvariants} does, but in the
+    background, calling \code {callback(i, values)} for the $i$-th graph
+    as soon as its values are known.  Returns the (started) thread doing
+    the work; its \code {error} attribute is set to any exception raised.
+    An event loop can pass a callback that hands the results back to it.
+    '''
+
+    def work():
+        '''
+        Runs the computation, delivering results to \code {callback}.
+        '''
+        try:
+            for (i, values) in mapInvariants(graphs, invariants, workers,
+                                             False, chunkSeconds):
+                callback(i, values)
+        except Exception, error:
+            thread.error = error
+
+    thread = threading.Thread(target=work)
+    thread.daemon = True
+    thread.error = None
+    thread.start()
+    return thread
@@ -0,0 +1,213 @@
+'''
+The \code{cache} module lets us avoid recomputing graph invariants.  Since
+an invariant takes the same value on isomorphic graphs, its value can be
+remembered for an isomorphism class rather than for a particular graph.
+We look graphs up by their Weisfeiler--Lehman fingerprint, and confirm
+every hit by comparing canonical forms, so a fingerprint collision can
+never produce a wrong answer.
+'''
+
+import copy
+import os
+import cPickle as pickle
+from collections import OrderedDict
+
+from isomorphism import weisfeilerLehmanHash, canonicalForm
+
+
+class InvariantCache(object):
+    '''
+    This object is a least-recently-used cache of invariant values, keyed
+    by the name of the invariant, its extra arguments and the fingerprint
+    of the graph.  At most \code {maxsize} keys are kept.  If \code {path}
+    is given, the cache is loaded from that file (if it exists) when it is
+    created, and \code {save} writes it back.
+    '''
+
+    def __init__(self, maxsize=1024, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __touch(self, key):
+        '''
+        Marks \code {key} as the most recently used key.
+        '''
+        self.__entries[key] = self.__entries.pop(key)
+
+    def get(self, name, G, args=()):
+        '''
+        Returns the pair \code {(found, value)}, where \code {found} is True
+        if the value of the invariant \code {name} (with extra arguments
+        \code {args}) is known for a graph isomorphic to $G$.
+        '''
+        key = (name, args, weisfeilerLehmanHash(G))
+        if key in self.__entries:
+            form = canonicalForm(G)
+            for (otherForm, value) in self.__entries[key]:
+                if otherForm == form:
+                    self.__touch(key)
+                    self.hits += 1
+                    return True, copy.deepcopy(value)
+        self.misses += 1
+        return False, None
+
+    def put(self, name, G, value, args=()):
+        '''
+        Records that the invariant \code {name} (with extra arguments
+        \code {args}) takes the value \code {value} on $G$.
+        '''
+        key = (name, args, weisfeilerLehmanHash(G))
+        form = canonicalForm(G)
+        bucket = self.__entries.pop(key, [])
+        bucket = [(f, v) for (f, v) in bucket if f != form]
+        bucket.append((form, copy.deepcopy(value)))
+        self.__entries[key] = bucket
+        while len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+
+    def clear(self):
+        '''
+        Forgets every cached value.
+        '''
+        self.__entries.clear()
+        self.hits = self.misses = 0
+
+    def load(self, path=None):
+        '''
+        Replaces the contents of the cache by those saved in the file
+        \code {path} (by default, the file given when the cache was made).
+        '''
+        f = open(path or self.path, 'rb')
+        try:
+            self.__entries = OrderedDict(pickle.load(f))
+        finally:
+            f.close()
+
+    def save(self, path=None):
+        '''
+        Writes the cache to the file \code {path} (by default, the file
+        given when the cache was made).  The file is written under a
+        temporary name first, so an interrupted save never leaves a
+        truncated cache behind.
+        '''
+        path = path or self.path
+        temporary = '%s.%d.tmp' % (path, os.getpid())
+        f = open(temporary, 'wb')
+        try:
+            pickle.dump(self.__entries.items(), f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        os.rename(temporary, path)
+
+
+# The cache used by the invariants decorated with \code {isomorphismCached}.
+# It is None (and the decorated functions behave exactly as if they were
+# not decorated) until \code {enableInvariantCache} is called.
+
+invariantCache = None
+
+
+def enableInvariantCache(maxsize=1024, path=None):
+    '''
+    Turns on caching of the expensive invariants, returning the
+    \code {InvariantCache} that will hold their values.
+    '''
+    global invariantCache
+    invariantCache = InvariantCache(maxsize=maxsize, path=path)
+    return invariantCache
+
+
+def disableInvariantCache():
+    '''
+    Turns off caching of the expensive invariants.
+    '''
+    global invariantCache
+    invariantCache = None
+
+
+def isomorphismCached(function):
+    '''
+    Decorates the invariant \code {function} so that, while the invariant
+    cache is enabled, its values are looked up in and stored to the cache.
+    Any extra positional arguments must be hashable.
+    '''
+    name = function.__name__
+
+    def cached(G, *args):
+        '''
+        Looks up the value of the invariant before computing it.
+        '''
+        cache = invariantCache
+        if cache is None:
+            return function(G, *args)
+        found, value = cache.get(name, G, args)
+        if found:
+            return value
+        value = function(G, *args)
+        if value is not NotImplemented:
+            cache.put(name, G, value, args)
+        return value
+
+    cached.__name__ = name
+    cached.__module__ = function.__module__
+    cached.__doc__ = function.__doc__
+    return cached
+
+
+def memoized(function):
+    '''
+    Decorates the function \code {function} of a graph so that its values
+    are remembered with the graph itself (see \code {graph.Graph.memo}),
+    keyed by the function and its extra arguments, which must be hashable.
+    The remembered values are forgotten as soon as the graph changes.
+    Objects that do not provide a \code {memo} method are passed straight
+    through to \code {function}.
+
+    A remembered dict, list or set is handed out as a fresh (shallow)
+    copy, so that changing it cannot change later answers; the values in
+    it, like any other value returned, must not be changeable.
+    '''
+    name = function.__name__
+
+    def cached(G, *args):
+        '''
+        Looks up the value of the function before computing it.
+        '''
+        try:
+            memo = G.memo()
+        except AttributeError:
+            return function(G, *args)
+        key = (name, args)
+        try:
+            value = memo[key]
+        except KeyError:
+            value = memo[key] = function(G, *args)
+        if isinstance(value, (dict, list, set)):
+            return copy.copy(value)
+        return value
+
+    cached.__name__ = name
+    cached.__module__ = function.__module__
+    cached.__doc__ = function.__doc__
+    return cached
+
+
+def memoizedValue(G, function, *args):
+    '''
+    Returns the value of the memoized function \code {function} on $G$ if
+    it has already been computed since $G$ last changed, otherwise None.
+    This lets one invariant take advantage of another without forcing it
+    to be computed.
+    '''
+    try:
+        return G.memo().get((function.__name__, args))
+    except AttributeError:
+        return None
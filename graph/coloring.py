@@ -0,0 +1,775 @@
+'''
+The \code{coloring} module colors the vertices and the edges of graphs.
+A proper vertex coloring gives adjacent vertices different colors; the
+least number of colors needed is the \emph {chromatic number}
+$\chi(G)$, which lies between the clique number and one more than the
+degeneracy.  Vertex colorings are returned as dicts mapping each vertex
+to its color, $0, 1, 2, \dots$, directions of edges and parallel edges
+are ignored, and graphs with loops are refused.
+
+A proper edge coloring gives adjacent edges different colors; the least
+number of colors needed is the \emph {edge chromatic number} $\chi'(G)$.
+By the theorem of Vizing, $\chi'(G)$ is either $\Delta(G)$ (the graph is
+of \emph {class 1}) or $\Delta(G) + 1$ (\emph {class 2}) for a simple
+graph, and by the theorem of K\"onig it is $\Delta(G)$ for a bipartite
+graph.
+
+Colorings are returned as lists of colors $0, 1, 2, \dots$ aligned with
+\code {G.edges}, so that \code {colors[i]} is the color of
+\code {G.edges[i]}.  Directions of edges are ignored, and since only
+simple graphs are covered by the theorem of Vizing, loops and parallel
+edges are refused.
+'''
+
+import collections
+import random
+
+from algorithms import bitsetMaximumClique, degeneracyOrderOfLists
+from algorithms import undirectedNeighborSets
+from matching import bipartitionOfLists, hopcroftKarpOfLists
+
+# The number of colorings by \code {misraGries}, with the edges taken in
+# random orders, that \code {edgeColoring} tries to bring down to
+# $\Delta$ colors before searching exhaustively.
+
+RECOLORING_ROUNDS = 20
+
+# The number of times \code {kempeRecoloring} tries to recolor an edge.
+
+KEMPE_TRIES = 50
+
+# The number of steps the exhaustive search of \code {edgeColoring} may
+# take before it gives up, and the largest number of edges of a component
+# it searches at all.
+
+SEARCH_BUDGET = 100000
+SEARCH_EDGES = 300
+
+
+def edgePairs(G):
+    '''
+    Returns the number of vertices of $G$ and the list of pairs of
+    positions in \code {G.vertices} of the ends of each edge in turn,
+    raising \code {ValueError} if $G$ has loops or parallel edges.
+    '''
+    index = dict((v, i) for (i, v) in enumerate(G.vertices))
+    pairs = []
+    seen = set()
+    n = len(index)
+    for e in G.edges:
+        i = index[e[0]]
+        j = index[e[1]]
+        if i == j:
+            raise ValueError("Only graphs without loops are edge colored.")
+        key = min(i, j) * n + max(i, j)
+        if key in seen:
+            raise ValueError("Only graphs without parallel edges are edge "
+                             "colored.")
+        seen.add(key)
+        pairs.append((i, j))
+    return n, pairs
+
+
+def neighborsOfPairs(n, pairs):
+    '''
+    Returns the list of lists of neighbors of each of the $n$ vertices of
+    the graph with edges \code {pairs}.
+    '''
+    neighbors = [[] for v in xrange(n)]
+    for (i, j) in pairs:
+        neighbors[i].append(j)
+        neighbors[j].append(i)
+    return neighbors
+
+
+def misraGries(n, pairs):
+    '''
+    Returns a proper coloring with at most $\Delta + 1$ colors of the
+    edges \code {pairs} of a simple graph on $n$ vertices, by the
+    algorithm of Misra and Gries, in $\mathcal{O}(nm)$ time.
+
+    Each edge $uv$ is colored in turn.  A \emph {fan} of $u$ is a list of
+    neighbors $v = f_0, f_1, \dots, f_k$ of $u$ such that the color of
+    $uf_{i + 1}$ is missing at $f_i$.  We take a maximal fan, a color $c$
+    missing at $u$ and a color $d$ missing at $f_k$, swap $c$ and $d$
+    along the path of edges so colored from $u$, and then shift the
+    colors of the fan down to the first $f_j$ at which $d$ is missing,
+    which frees $d$ for the edge $uf_j$.
+    '''
+    neighbors = neighborsOfPairs(n, pairs)
+    colorOf = [{} for v in xrange(n)]
+    edgeAt = [{} for v in xrange(n)]
+
+    def assign(x, y, c):
+        '''
+        Gives the edge $xy$ the color $c$.
+        '''
+        colorOf[x][y] = colorOf[y][x] = c
+        edgeAt[x][c] = y
+        edgeAt[y][c] = x
+
+    def unassign(x, y):
+        '''
+        Takes the color off the edge $xy$, returning it.
+        '''
+        c = colorOf[x].pop(y)
+        del colorOf[y][x]
+        del edgeAt[x][c]
+        del edgeAt[y][c]
+        return c
+
+    def missing(x):
+        '''
+        Returns the least color missing at $x$.
+        '''
+        c = 0
+        while c in edgeAt[x]:
+            c += 1
+        return c
+
+    for (u, v) in pairs:
+        fan = [v]
+        inFan = set(fan)
+        extended = True
+        while extended:
+            extended = False
+            for w in neighbors[u]:
+                if w not in inFan and w in colorOf[u] and \
+                   colorOf[u][w] not in edgeAt[fan[-1]]:
+                    fan.append(w)
+                    inFan.add(w)
+                    extended = True
+                    break
+        c = missing(u)
+        d = missing(fan[-1])
+
+        # Swap $c$ and $d$ along the path from $u$, which starts with the
+        # edge colored $d$, since $c$ is missing at $u$.
+
+        path = []
+        x = u
+        color = d
+        while color in edgeAt[x]:
+            y = edgeAt[x][color]
+            path.append((x, y, color))
+            x = y
+            color = c if color == d else d
+        for (x, y, color) in path:
+            unassign(x, y)
+        for (x, y, color) in path:
+            assign(x, y, c if color == d else d)
+
+        # The fan may be cut short by the swap; we shift it up to the
+        # first vertex at which $d$ is missing.
+
+        end = 0
+        while d in edgeAt[fan[end]]:
+            end += 1
+            if end == len(fan) or colorOf[u].get(fan[end]) in \
+               edgeAt[fan[end - 1]]:
+                raise AssertionError("The fan has no end.")
+        for i in xrange(end):
+            assign(u, fan[i], unassign(u, fan[i + 1]))
+        assign(u, fan[end], d)
+
+    return [colorOf[i][j] for (i, j) in pairs]
+
+
+def eulerSplit(ends, edges):
+    '''
+    Splits the list \code {edges} of (numbers of) edges of a bipartite
+    multigraph in which every vertex has even degree into two lists, each
+    with half of the edges at every vertex, by following closed trails and
+    putting their edges alternately into one list and the other.  The
+    ends of edge $e$ are \code {ends[e]}.
+    '''
+    incident = collections.defaultdict(list)
+    for e in edges:
+        incident[ends[e][0]].append(e)
+        incident[ends[e][1]].append(e)
+    used = set()
+    halves = ([], [])
+    for start in incident.keys():
+        trail = incident[start]
+        while trail:
+            x = start
+            parity = 0
+            while True:
+                following = incident[x]
+                while following and following[-1] in used:
+                    following.pop()
+                if not following:
+                    break
+                e = following.pop()
+                used.add(e)
+                halves[parity].append(e)
+                parity = 1 - parity
+                a, b = ends[e]
+                x = b if x == a else a
+            while trail and trail[-1] in used:
+                trail.pop()
+    return halves
+
+
+def perfectMatchingOfEdges(ends, edges):
+    '''
+    Returns a list of edges from \code {edges} making a perfect matching
+    of the regular bipartite multigraph they form, whose left vertices are
+    the first ends in \code {ends}, found by \code {hopcroftKarpOfLists}.
+    '''
+    lefts = {}
+    rights = {}
+    between = {}
+    for e in edges:
+        a, b = ends[e]
+        i = lefts.setdefault(a, len(lefts))
+        j = rights.setdefault(b, len(rights))
+        between.setdefault((i, j), e)
+    adjacent = [[] for i in xrange(len(lefts))]
+    for (i, j) in between:
+        adjacent[i].append(j)
+    matchLeft = hopcroftKarpOfLists(adjacent, len(rights))
+    return [between[(i, j)] for (i, j) in enumerate(matchLeft)]
+
+
+def bipartiteEdgeColoringOfLists(side, pairs):
+    '''
+    Returns a proper coloring with $\Delta$ colors of the edges
+    \code {pairs} of a bipartite graph whose vertices are on the sides
+    given by \code {side}.
+
+    The vertices of each side are first packed into groups of total
+    degree at most $\Delta$, and then edges are added between groups
+    that fall short, until every group has degree exactly $\Delta$.  The
+    colorings of this regular multigraph give colorings of the original
+    graph.  A regular bipartite multigraph of even degree splits into two
+    of half the degree by \code {eulerSplit}; one of odd degree has a
+    perfect matching, which is given a color of its own.  So the
+    coloring takes $\mathcal{O}(m \log \Delta)$ time, besides the
+    matchings, of which there is at most one for each halving.
+    '''
+    m = len(pairs)
+    if not m:
+        return []
+    degree = [0] * len(side)
+    for (i, j) in pairs:
+        degree[i] += 1
+        degree[j] += 1
+    delta = max(degree)
+
+    group = [0] * len(side)
+    loads = ([], [])
+    for v in xrange(len(side)):
+        if not degree[v]:
+            continue
+        load = loads[side[v]]
+        if not load or load[-1] + degree[v] > delta:
+            load.append(0)
+        load[-1] += degree[v]
+        group[v] = len(load) - 1
+    count = max(len(loads[0]), len(loads[1]))
+    ends = []
+    for (i, j) in pairs:
+        if side[i]:
+            i, j = j, i
+        ends.append((group[i], count + group[j]))
+    shortfall = [[delta - x for x in load] + [delta] * (count - len(load))
+                 for load in loads]
+    i = j = 0
+    while i < count and j < count:
+        if not shortfall[0][i]:
+            i += 1
+        elif not shortfall[1][j]:
+            j += 1
+        else:
+            ends.append((i, count + j))
+            shortfall[0][i] -= 1
+            shortfall[1][j] -= 1
+
+    colors = [None] * len(ends)
+    stack = [(range(len(ends)), delta, 0)]
+    while stack:
+        edges, d, first = stack.pop()
+        if not edges:
+            continue
+        if d == 1:
+            for e in edges:
+                colors[e] = first
+        elif d % 2:
+            matched = perfectMatchingOfEdges(ends, edges)
+            for e in matched:
+                colors[e] = first
+            matched = set(matched)
+            stack.append(([e for e in edges if e not in matched], d - 1,
+                          first + 1))
+        else:
+            halves = eulerSplit(ends, edges)
+            stack.append((halves[0], d / 2, first))
+            stack.append((halves[1], d / 2, first + d / 2))
+    return colors[:m]
+
+
+def coloringWithColors(n, pairs, k, budget=None):
+    '''
+    Returns a proper coloring with at most $k$ colors of the edges
+    \code {pairs} of a simple graph on $n$ vertices, or None if there is
+    none, by backtracking.  The edge with the fewest colors left is
+    colored next; the edges at a vertex of largest degree are given their
+    colors to begin with, and a color not yet used anywhere is only tried
+    once, since all such colors are alike.  This takes exponential time,
+    and is meant for deciding the class of small graphs; if
+    \code {budget} is given, \code {ValueError} is raised once that many
+    edges have been colored without settling the matter.
+    '''
+    m = len(pairs)
+    steps = [0]
+    colors = [None] * m
+    used = [0] * n
+    full = (1 << k) - 1
+    incident = [[] for v in xrange(n)]
+    for (e, (i, j)) in enumerate(pairs):
+        incident[i].append(e)
+        incident[j].append(e)
+    hub = max(xrange(n), key=lambda v: len(incident[v])) if n else None
+    if hub is not None and len(incident[hub]) > k:
+        return None
+
+    def assign(e, c):
+        '''
+        Gives edge $e$ the color $c$.
+        '''
+        colors[e] = c
+        used[pairs[e][0]] |= 1 << c
+        used[pairs[e][1]] |= 1 << c
+
+    def unassign(e):
+        '''
+        Takes the color off edge $e$.
+        '''
+        c = colors[e]
+        colors[e] = None
+        used[pairs[e][0]] &= ~(1 << c)
+        used[pairs[e][1]] &= ~(1 << c)
+
+    uncolored = set(xrange(m))
+    highest = -1
+    if hub is not None:
+        for (c, e) in enumerate(incident[hub]):
+            assign(e, c)
+            uncolored.discard(e)
+            highest = c
+
+    def search(highest):
+        '''
+        Colors the remaining edges, the colors up to \code {highest}
+        having been used, returning True if it succeeds.
+        '''
+        if not uncolored:
+            return True
+        best = None
+        for e in uncolored:
+            free = full & ~(used[pairs[e][0]] | used[pairs[e][1]])
+            choices = bin(free).count('1')
+            if best is None or choices < best[0]:
+                best = (choices, e, free)
+                if choices <= 1:
+                    break
+        choices, e, free = best
+        uncolored.discard(e)
+        for c in xrange(min(k, highest + 2)):
+            if free & (1 << c):
+                steps[0] += 1
+                if budget is not None and steps[0] > budget:
+                    raise ValueError("The search for an edge coloring with "
+                                     "%d colors took more than %d steps."
+                                     % (k, budget))
+                assign(e, c)
+                if search(max(highest, c)):
+                    return True
+                unassign(e)
+        uncolored.add(e)
+        return False
+
+    if search(highest):
+        return colors
+    return None
+
+
+def kempeRecoloring(n, pairs, colors, k, rng):
+    '''
+    Tries to recolor the edges given the color $k$ in the proper coloring
+    \code {colors} of the edges \code {pairs} of a simple graph on $n$
+    vertices of maximum degree at most $k$, using only the colors below
+    $k$.  Returns the new coloring, or None if it fails.
+
+    For each edge $uv$ of color $k$, there are colors $a$ missing at $u$
+    and $b$ missing at $v$.  If some color is missing at both, $uv$ takes
+    it; otherwise the \emph {Kempe chain} of edges colored $a$ and $b$
+    from $v$ has its two colors swapped, which frees $a$ at $v$ unless the
+    chain ends at $u$.  If every such chain ends at $u$, a chain from $u$
+    or $v$ in one missing color and one random other color is swapped,
+    changing the colors missing there, and the edge is tried again, up to
+    \code {KEMPE_TRIES} times.
+    '''
+    colors = list(colors)
+    edgeAt = [{} for v in xrange(n)]
+    for (e, (i, j)) in enumerate(pairs):
+        edgeAt[i][colors[e]] = edgeAt[j][colors[e]] = e
+
+    def recolor(edges, swapped):
+        '''
+        Gives each of the edges \code {edges} the color \code {swapped}
+        maps its color to.
+        '''
+        for e in edges:
+            for v in pairs[e]:
+                del edgeAt[v][colors[e]]
+        for e in edges:
+            colors[e] = swapped[colors[e]]
+            for v in pairs[e]:
+                edgeAt[v][colors[e]] = e
+
+    def chain(x, a, b):
+        '''
+        Returns the edges of the path from $x$ colored alternately $a$ and
+        $b$, beginning with $a$, and the vertex it ends at.
+        '''
+        path = []
+        color = a
+        while color in edgeAt[x]:
+            e = edgeAt[x][color]
+            path.append(e)
+            x = pairs[e][1] if pairs[e][0] == x else pairs[e][0]
+            color = b if color == a else a
+        return path, x
+
+    def clear(e):
+        '''
+        Tries once to give the edge $e$ a color below $k$, returning True
+        if it succeeds.
+        '''
+        u, v = pairs[e]
+        freeU = [c for c in xrange(k) if c not in edgeAt[u]]
+        freeV = [c for c in xrange(k) if c not in edgeAt[v]]
+        common = [c for c in freeU if c not in edgeAt[v]]
+        if common:
+            recolor([e], {k: common[0]})
+            return True
+        choices = [(a, b) for a in freeU for b in freeV]
+        rng.shuffle(choices)
+        for (a, b) in choices:
+            path, end = chain(v, a, b)
+            if end != u:
+                recolor(path, {a: b, b: a})
+                recolor([e], {k: a})
+                return True
+
+        # The end $x$ of a chain in a color $b$ missing at $x$ and another
+        # color $a$ is the end of a whole chain, so swapping it keeps the
+        # coloring proper.
+
+        x = rng.choice([u, v])
+        b = rng.choice(freeU if x == u else freeV)
+        a = rng.choice([c for c in edgeAt[x] if c != k])
+        recolor(chain(x, a, b)[0], {a: b, b: a})
+        return False
+
+    for e in [e for (e, c) in enumerate(colors) if c == k]:
+        for attempt in xrange(KEMPE_TRIES):
+            if clear(e):
+                break
+        else:
+            return None
+    return colors
+
+
+def componentsOfPairs(n, pairs):
+    '''
+    Returns the lists of (numbers of) edges of the components of the graph
+    on $n$ vertices with edges \code {pairs}.
+    '''
+    neighbors = neighborsOfPairs(n, pairs)
+    component = [None] * n
+    for root in xrange(n):
+        if component[root] is not None:
+            continue
+        component[root] = root
+        stack = [root]
+        while stack:
+            for w in neighbors[stack.pop()]:
+                if component[w] is None:
+                    component[w] = root
+                    stack.append(w)
+    edges = collections.defaultdict(list)
+    for (e, (i, j)) in enumerate(pairs):
+        edges[component[i]].append(e)
+    return edges.values()
+
+
+def misraGriesColoring(G):
+    '''
+    Returns a proper coloring of the edges of $G$ with at most
+    $\Delta(G) + 1$ colors, found by \code {misraGries}.
+    '''
+    n, pairs = edgePairs(G)
+    return misraGries(n, pairs)
+
+
+def bipartiteEdgeColoring(G):
+    '''
+    Returns a proper coloring of the edges of the bipartite graph $G$ with
+    $\Delta(G)$ colors, found by \code {bipartiteEdgeColoringOfLists},
+    raising \code {ValueError} if $G$ is not bipartite.
+    '''
+    n, pairs = edgePairs(G)
+    side = bipartitionOfLists(neighborsOfPairs(n, pairs))
+    if side is None:
+        raise ValueError("The graph is not bipartite.")
+    return bipartiteEdgeColoringOfLists(side, pairs)
+
+
+def reducibleEdges(n, pairs, delta):
+    '''
+    Returns the list of (numbers of) edges of the \emph {core} of the
+    graph on $n$ vertices with edges \code {pairs}, and the list of the
+    other edges in the order they were taken away.  An edge $uv$ is taken
+    away while $d(u) + d(v) \leq \Delta + 1$, which leaves at most
+    $\Delta - 1$ edges next to it; so any coloring of the core with
+    $\Delta$ colors extends to the whole graph, putting the edges back
+    in the reverse order, and the core needs $\Delta$ colors only if the
+    graph does.  Pendant paths and trees, for example, are taken away.
+    '''
+    degree = [0] * n
+    incident = [[] for v in xrange(n)]
+    for (e, (i, j)) in enumerate(pairs):
+        degree[i] += 1
+        degree[j] += 1
+        incident[i].append(e)
+        incident[j].append(e)
+    present = [True] * len(pairs)
+    removed = []
+    stack = range(len(pairs))
+    while stack:
+        e = stack.pop()
+        i, j = pairs[e]
+        if present[e] and degree[i] + degree[j] <= delta + 1:
+            present[e] = False
+            removed.append(e)
+            degree[i] -= 1
+            degree[j] -= 1
+            stack.extend([f for f in incident[i] + incident[j]
+                          if present[f]])
+    return [e for e in xrange(len(pairs)) if present[e]], removed
+
+
+def classOneColoring(n, pairs, delta):
+    '''
+    Returns a proper coloring with $\Delta$ colors of the edges
+    \code {pairs} of a simple graph on $n$ vertices of maximum degree
+    $\Delta$, or None if there is none (see \code {edgeColoring}).  The
+    core left by \code {reducibleEdges} is colored, and the other edges
+    are then given, in turn, the least color not used next to them.
+    '''
+    core, removed = reducibleEdges(n, pairs, delta)
+    corePairs = [pairs[e] for e in core]
+    found = None
+    rng = random.Random(0)
+    order = range(len(corePairs))
+    colors = misraGries(n, corePairs)
+    for attempt in xrange(RECOLORING_ROUNDS + 1):
+        if not colors or max(colors) < delta:
+            found = colors
+            break
+        found = kempeRecoloring(n, corePairs, colors, delta, rng)
+        if found is not None:
+            break
+        rng.shuffle(order)
+        shuffled = misraGries(n, [corePairs[e] for e in order])
+        colors = [None] * len(corePairs)
+        for (e, c) in zip(order, shuffled):
+            colors[e] = c
+    if found is None:
+        if len(corePairs) > SEARCH_EDGES:
+            raise ValueError("A core with %d edges is too large to search "
+                             "for an edge coloring with %d colors."
+                             % (len(corePairs), delta))
+        found = coloringWithColors(n, corePairs, delta, SEARCH_BUDGET)
+        if found is None:
+            return None
+    colors = [None] * len(pairs)
+    used = [set() for v in xrange(n)]
+    for (e, c) in zip(core, found):
+        colors[e] = c
+        used[pairs[e][0]].add(c)
+        used[pairs[e][1]].add(c)
+    for e in reversed(removed):
+        i, j = pairs[e]
+        c = 0
+        while c in used[i] or c in used[j]:
+            c += 1
+        colors[e] = c
+        used[i].add(c)
+        used[j].add(c)
+    return colors
+
+
+def edgeColoring(G):
+    '''
+    Returns a proper coloring of the edges of $G$ with $\chi'(G)$ colors.
+
+    Each component is colored on its own.  A bipartite component is
+    colored with $\Delta$ colors by \code {bipartiteEdgeColoringOfLists}.
+    Otherwise the coloring of \code {misraGries} settles the matter if it
+    uses only $\Delta$ colors, or if the component is \emph {overfull},
+    with more than $\Delta \lfloor n/2 \rfloor$ edges, so that each color
+    class, a matching, is too small for $\Delta$ colors to suffice.
+    Otherwise the edges that never decide the class are taken away by
+    \code {reducibleEdges}, and \code {kempeRecoloring} tries to clear
+    the last color from a coloring of the core that is left by
+    \code {misraGries}, and from \code {RECOLORING_ROUNDS} more, made with
+    the edges in random orders.  Only if all these fail is a coloring of
+    the core with $\Delta$ colors searched for by
+    \code {coloringWithColors}, and \code {ValueError} is raised if the
+    core has more than \code {SEARCH_EDGES} edges or the search takes
+    more than \code {SEARCH_BUDGET} steps.
+    '''
+    n, pairs = edgePairs(G)
+    colors = [None] * len(pairs)
+    for edges in componentsOfPairs(n, pairs):
+        vertices = sorted(set([v for e in edges for v in pairs[e]]))
+        position = dict((v, i) for (i, v) in enumerate(vertices))
+        local = [(position[pairs[e][0]], position[pairs[e][1]])
+                 for e in edges]
+        degree = [0] * len(vertices)
+        for (i, j) in local:
+            degree[i] += 1
+            degree[j] += 1
+        delta = max(degree)
+        side = bipartitionOfLists(neighborsOfPairs(len(vertices), local))
+        if side is not None:
+            found = bipartiteEdgeColoringOfLists(side, local)
+        else:
+            found = misraGries(len(vertices), local)
+            if max(found) == delta and \
+               len(local) <= delta * (len(vertices) / 2):
+                found = classOneColoring(len(vertices), local,
+                                         delta) or found
+        for (e, c) in zip(edges, found):
+            colors[e] = c
+    return colors
+
+
+def greedyColoringOfLists(neighbors, order):
+    '''
+    Returns the list of colors given to the vertices of the graph with
+    adjacency lists \code {neighbors} by taking them in the order
+    \code {order} and giving each the least color not already given to a
+    neighbor.  In the reverse of a degeneracy ordering, each vertex has at
+    most $d$ neighbors before it, so at most $d + 1$ colors are used.
+    '''
+    colors = [None] * len(neighbors)
+    for v in order:
+        taken = set([colors[w] for w in neighbors[v]])
+        c = 0
+        while c in taken:
+            c += 1
+        colors[v] = c
+    return colors
+
+
+def vertexColoringWithColors(neighbors, k, clique=()):
+    '''
+    Returns a proper coloring with at most $k$ colors of the vertices of
+    the graph with adjacency lists \code {neighbors}, or None if there is
+    none, by backtracking.  The vertices of \code {clique}, which must be
+    pairwise adjacent, are given their colors to begin with; after that
+    the vertex whose neighbors have the most different colors is colored
+    next (the rule of Br\'elaz), and a color not yet used anywhere is only
+    tried once, since all such colors are alike.  This takes exponential
+    time in the worst case.
+    '''
+    n = len(neighbors)
+    colors = [None] * n
+    counts = [[0] * k for v in xrange(n)]
+    saturation = [0] * n
+    if len(clique) > k:
+        return None
+
+    def assign(v, c):
+        '''
+        Gives vertex $v$ the color $c$.
+        '''
+        colors[v] = c
+        for w in neighbors[v]:
+            if not counts[w][c]:
+                saturation[w] += 1
+            counts[w][c] += 1
+
+    def unassign(v):
+        '''
+        Takes the color off vertex $v$.
+        '''
+        c = colors[v]
+        colors[v] = None
+        for w in neighbors[v]:
+            counts[w][c] -= 1
+            if not counts[w][c]:
+                saturation[w] -= 1
+
+    uncolored = set(xrange(n))
+    for (c, v) in enumerate(clique):
+        assign(v, c)
+        uncolored.discard(v)
+
+    def search(highest):
+        '''
+        Colors the remaining vertices, the colors up to \code {highest}
+        having been used, returning True if it succeeds.
+        '''
+        if not uncolored:
+            return True
+        v = max(uncolored,
+                key=lambda u: (saturation[u], len(neighbors[u])))
+        uncolored.discard(v)
+        for c in xrange(min(highest + 2, k)):
+            if not counts[v][c]:
+                assign(v, c)
+                if search(max(highest, c)):
+                    return True
+                unassign(v)
+        uncolored.add(v)
+        return False
+
+    if search(len(clique) - 1):
+        return colors
+    return None
+
+
+def vertexColoring(G):
+    '''
+    Returns a proper coloring of the vertices of $G$ with $\chi(G)$
+    colors, raising \code {ValueError} if $G$ has a loop.
+
+    A greedy coloring in the reverse of a degeneracy ordering (see
+    \code {algorithms.degeneracyOrderOfLists}) uses at most $d + 1$ colors,
+    and a largest clique (see \code {algorithms.bitsetMaximumClique})
+    needs as many colors as it has vertices.  If these bounds differ,
+    colorings with each number of colors in between are searched for by
+    \code {vertexColoringWithColors}, beginning with the largest clique.
+    '''
+    for e in G.edges:
+        if e[0] == e[1]:
+            raise ValueError("Only graphs without loops are vertex colored.")
+    vertices, neighbors = undirectedNeighborSets(G)
+    neighbors = [sorted(ws) for ws in neighbors]
+    order, core = degeneracyOrderOfLists(neighbors)
+    colors = greedyColoringOfLists(neighbors, reversed(order))
+    colorCount = max(colors) + 1 if colors else 0
+    rows = [sum([1 << w for w in ws]) for ws in neighbors]
+    clique = bitsetMaximumClique(rows)
+    for k in xrange(len(clique), colorCount):
+        found = vertexColoringWithColors(neighbors, k, clique)
+        if found is not None:
+            colors = found
+            break
+    return dict(zip(vertices, colors))
@@ -0,0 +1,220 @@
+'''
+The \code{directed} module implements algorithms on directed graphs:
+strongly connected components, topological sorting, the condensation of a
+digraph and reachability in either direction.
+
+Every function works on the out- and in-neighbor lists of the graph,
+numbered by position in \code {G.vertices} (see \code {inOutLists}).
+They are built once and remembered with the graph, so following edges
+backwards costs the same as following them forwards.  All of the
+algorithms are iterative, taking $\mathcal{O}(n + m)$ time with no
+recursion, so they run on graphs of millions of vertices.  An undirected
+graph is treated as the digraph with both directions of each edge.
+'''
+
+import collections
+
+import graph
+from cache import memoized
+
+
+@memoized
+def inOutLists(G):
+    '''
+    Returns the triple \code {(vertices, successors, predecessors)}, where
+    \code {vertices} lists the vertices of $G$, and \code {successors[i]}
+    and \code {predecessors[i]} list the positions of the vertices with an
+    edge from and to \code {vertices[i]}.  The result is remembered with
+    $G$, so it is made of tuples, which cannot be changed.
+    '''
+    vertices = list(G.vertices)
+    index = dict((v, i) for (i, v) in enumerate(vertices))
+    successors = [[] for v in vertices]
+    predecessors = [[] for v in vertices]
+    directed = graph.is_directed(G)
+    for e in G.edges:
+        i = index[e[0]]
+        j = index[e[1]]
+        successors[i].append(j)
+        predecessors[j].append(i)
+        if not directed:
+            successors[j].append(i)
+            predecessors[i].append(j)
+    return (tuple(vertices), tuple(map(tuple, successors)),
+            tuple(map(tuple, predecessors)))
+
+
+def inAdjacencyLists(G):
+    '''
+    Returns the dict mapping each vertex $v$ of $G$ to the list of
+    vertices with an edge to $v$: the counterpart of
+    \code {graph.adjacencyLists}, which lists the vertices with an edge
+    from $v$.
+    '''
+    vertices, successors, predecessors = inOutLists(G)
+    return dict((v, [vertices[j] for j in predecessors[i]])
+                for (i, v) in enumerate(vertices))
+
+
+def reachable(G, source, reverse=False):
+    '''
+    Returns the set of vertices that can be reached from the vertex
+    \code {source} along directed paths, or, if \code {reverse} is True,
+    that can reach \code {source}.
+    '''
+    vertices, successors, predecessors = inOutLists(G)
+    following = predecessors if reverse else successors
+    start = vertices.index(source)
+    seen = set([start])
+    stack = [start]
+    while stack:
+        for j in following[stack.pop()]:
+            if j not in seen:
+                seen.add(j)
+                stack.append(j)
+    return set(vertices[i] for i in seen)
+
+
+def componentsOfLists(successors):
+    '''
+    Returns the strongly connected components of the digraph on
+    $0, 1, \dots, n - 1$ with out-neighbor lists \code {successors}, as a
+    list of lists of vertices, by the algorithm of Tarjan.  A component
+    is listed only after every component it has an edge to, so the list
+    is in reverse topological order.
+
+    The recursion of the usual statement of the algorithm is replaced by
+    an explicit stack of the vertices being explored, together with how
+    far each has got through its list of successors.
+    '''
+    n = len(successors)
+    unvisited = -1
+    number = [unvisited] * n
+    low = [0] * n
+    onStack = [False] * n
+    stack = []
+    components = []
+    counter = 0
+    for root in xrange(n):
+        if number[root] != unvisited:
+            continue
+        number[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        onStack[root] = True
+        path = [root]
+        progress = [0]
+        while path:
+            v = path[-1]
+            p = progress[-1]
+            following = successors[v]
+            if p < len(following):
+                progress[-1] = p + 1
+                w = following[p]
+                if number[w] == unvisited:
+                    number[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    onStack[w] = True
+                    path.append(w)
+                    progress.append(0)
+                elif onStack[w] and number[w] < low[v]:
+                    low[v] = number[w]
+                continue
+
+            # Every successor of $v$ has been explored, so we return to
+            # its parent, and if $v$ is the first vertex of its component
+            # to have been reached, the component is on top of the stack.
+
+            path.pop()
+            progress.pop()
+            if path and low[v] < low[path[-1]]:
+                low[path[-1]] = low[v]
+            if low[v] == number[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    onStack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
+def stronglyConnectedComponents(G):
+    '''
+    Returns the strongly connected components of $G$ -- the maximal sets
+    of vertices each of which can reach every other along directed paths
+    -- as a list of lists of vertices, in reverse topological order (see
+    \code {componentsOfLists}).
+    '''
+    vertices, successors, predecessors = inOutLists(G)
+    return [[vertices[i] for i in component]
+            for component in componentsOfLists(successors)]
+
+
+def topologicalOrderOfLists(successors, predecessors):
+    '''
+    Returns a list of $0, 1, \dots, n - 1$ in which every edge goes from
+    an earlier vertex to a later one, by the algorithm of Kahn: vertices
+    with no remaining edges into them are taken one at a time, removing
+    their edges.  Returns None if there is a directed cycle, in which case
+    some vertices are never freed.
+    '''
+    n = len(successors)
+    remaining = [len(ws) for ws in predecessors]
+    ready = collections.deque([v for v in xrange(n) if not remaining[v]])
+    order = []
+    while ready:
+        v = ready.popleft()
+        order.append(v)
+        for w in successors[v]:
+            remaining[w] -= 1
+            if not remaining[w]:
+                ready.append(w)
+    if len(order) < n:
+        return None
+    return order
+
+
+def topologicalSort(G):
+    '''
+    Returns the list of vertices of the directed graph $G$ in an order in
+    which every edge goes from an earlier vertex to a later one, raising
+    \code {ValueError} if $G$ has a directed cycle, so that there is no
+    such order.
+    '''
+    vertices, successors, predecessors = inOutLists(G)
+    order = topologicalOrderOfLists(successors, predecessors)
+    if order is None:
+        raise ValueError("The graph has a directed cycle.")
+    return [vertices[i] for i in order]
+
+
+def condensation(G):
+    '''
+    Returns the pair \code {(C, components)}: \code {components} is the
+    list of strongly connected components of $G$ (see
+    \code {stronglyConnectedComponents}), and \code {C} is the directed
+    acyclic graph on $0, 1, \dots, k - 1$ with an edge from $i$ to $j$
+    whenever $G$ has an edge from a vertex of \code {components[i]} to a
+    vertex of \code {components[j]}, for $i \neq j$.  The numbering is a
+    reverse topological order of \code {C}.
+    '''
+    vertices, successors, predecessors = inOutLists(G)
+    components = componentsOfLists(successors)
+    k = len(components)
+    which = [0] * len(vertices)
+    for (c, component) in enumerate(components):
+        for v in component:
+            which[v] = c
+    keys = set()
+    for (v, ws) in enumerate(successors):
+        c = which[v]
+        for w in ws:
+            if which[w] != c:
+                keys.add(c * k + which[w])
+    C = graph.Graph(vertices=xrange(k), directed=True)
+    C.addEdges(divmod(key, k) for key in sorted(keys))
+    return C, [[vertices[i] for i in component] for component in components]
@@ -2,9 +2,18 @@
 The \code{graph} module implements the graph data structure itself,
 as well as functions for converting graph structures to and from
 the adjacency list and adjacency matrix representations.
+
+Importing \code {sympy} takes far longer than everything else in this
+package put together, so it is only imported, inside the functions below,
+the first time one of them needs a matrix.
 '''
 
-import sympy
+from array import array
+
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from StringIO import StringIO
 
 
 class Edge (object):
@@ -59,12 +68,168 @@ class Edge (object):
             return False
 
 
+class AttributeTable(object):
+    '''
+    This object stores named attributes of the edges (or the vertices) of
+    a graph in columns: each attribute is an \code {array} of machine
+    numbers whose $i$-th entry belongs to the $i$-th edge (or vertex).  A
+    weight then costs $8$ bytes per edge as a double, or $4$ as a float,
+    rather than a dict entry, and whole columns can be read or written by
+    single calls into C.
+
+    \code {table[name]} is the column itself, so \code {table[name][i]}
+    reads or writes the attribute of item $i$ in constant time.  Columns
+    are made with \code {add} or \code {set}; their type codes are those
+    of the \code {array} module: \code {'d'} for doubles, \code {'f'} for
+    floats and \code {'l'} for integers.
+    '''
+
+    def __init__(self, length=0):
+        self.length = length
+        self.columns = {}
+        self.defaults = {}
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def add(self, name, typecode='d', default=0):
+        '''
+        Adds the column \code {name}, with every entry \code {default},
+        unless there is already a column of that name.  Returns the
+        column.
+        '''
+        if name not in self.columns:
+            self.columns[name] = array(typecode, [default]) * self.length
+            self.defaults[name] = default
+        return self.columns[name]
+
+    def set(self, name, values, typecode=None):
+        '''
+        Replaces the column \code {name} by the numbers in the iterable
+        \code {values}, one for each item, in the type \code {typecode}
+        (by default, that of the existing column, or doubles).
+        '''
+        if typecode is None:
+            column = self.columns.get(name)
+            typecode = column.typecode if column is not None else 'd'
+        column = array(typecode, values)
+        if len(column) != self.length:
+            raise ValueError("Expected %d values, got %d."
+                             % (self.length, len(column)))
+        self.columns[name] = column
+        self.defaults.setdefault(name, 0)
+
+    def get(self, name, indices):
+        '''
+        Returns an \code {array} of the values of the column \code {name}
+        at the positions listed in \code {indices}.
+        '''
+        column = self.columns[name]
+        return array(column.typecode, map(column.__getitem__, indices))
+
+    def remove(self, name):
+        '''
+        Removes the column \code {name}.
+        '''
+        del self.columns[name]
+        del self.defaults[name]
+
+    def extend(self, count):
+        '''
+        Makes room for \code {count} new items at the end of every column,
+        filling in the defaults.
+        '''
+        if count:
+            for (name, column) in self.columns.iteritems():
+                column.extend(array(column.typecode,
+                                    [self.defaults[name]]) * count)
+            self.length += count
+
+    def delete(self, i):
+        '''
+        Removes the entries of item $i$ from every column.
+        '''
+        for column in self.columns.itervalues():
+            del column[i]
+        self.length -= 1
+
+    def keep(self, indices):
+        '''
+        Keeps only the entries of the items at the positions listed in
+        \code {indices}, in that order.
+        '''
+        for name in self.columns:
+            self.columns[name] = self.get(name, indices)
+        self.length = len(indices)
+
+    def resize(self, length):
+        '''
+        Pads every column with defaults, or cuts it short, to
+        \code {length} entries.
+        '''
+        if length > self.length:
+            self.extend(length - self.length)
+        elif length < self.length:
+            for column in self.columns.itervalues():
+                del column[length:]
+            self.length = length
+
+
+def markOf(items):
+    '''
+    Returns the length and the last item of the list \code {items}, by
+    which \code {moved} tells whether its items have moved since.
+    '''
+    if not items:
+        return (0, None)
+    return (len(items), items[-1])
+
+
+def moved(items, mark):
+    '''
+    Returns True if the items of the list \code {items} may have moved
+    since it had the mark \code {mark} (see \code {markOf}): if it is
+    shorter than it was, or its last item then is no longer in its place.
+    Items appended since then do not count as moves.
+    '''
+    length, last = mark
+    return len(items) < length or \
+        (length > 0 and items[length - 1] is not last)
+
+
 class Graph (object):
     '''
     This object implements the mathematical definition of a graph.  That
     is, a graph $G = (V, E)$ consists of a finite set $V$, called the
     \emph {vertex set} of $G$, and a set $E$ (called the \emph {edge set}
     of $G$) of pairs of distinct vertices from $V$
+
+    Every change made through the methods below, or by assigning to
+    \code {vertices} or \code {edges}, increases \code {G.version} by one.
+    Values computed from the graph and remembered with it (see
+    \code {memo}) are discarded whenever the version changes.
+
+    Attributes of the edges and vertices, such as weights, are kept in
+    the \code {AttributeTable}s \code {G.edgeData} and
+    \code {G.vertexData}, aligned with \code {G.edges} and
+    \code {G.vertices}: \code {G.edgeData['weight'][i]} is the weight of
+    \code {G.edges[i]}.  The methods below keep the columns aligned as
+    edges and vertices come and go.  Assigning to \code {vertices} or
+    \code {edges} discards the attributes; edges appended to
+    \code {edges} in place get default attributes.  Any other change to
+    the lists in place that moves their items, such as a deletion, leaves
+    no way to tell which attributes belong to which items, so all the
+    attributes of that list are discarded when it is next noticed.
+
+    If \code {G.trackConnectivity()} has been called, the components of
+    the graph are kept up to date as it is built, in \code {G.tracker}
+    (see \code {algorithms.ConnectivityTracker}).
     '''
 
     def __init__(self, vertices=None, edges=None, directed=False):
@@ -73,16 +238,525 @@ class Graph (object):
         if edges is None:
             edges = []
 
-        self.vertices = list(set(vertices))
+        self.version = 0
+        self.directed = directed
+        self.tracker = None
+        self.__memo = {}
+        self.__memoStamp = None
+
+        vertexSet = set(vertices)
+        self.__vertexSet = vertexSet
+        self.__vertices = list(vertexSet)
 
+        # We validate and build the edge list in a single pass, checking
+        # membership against a set rather than the vertex list, so that
+        # construction is linear in the size of the input and \code {edges}
+        # may be any iterable, including a generator.
+
+        self.__edges = []
+        append = self.__edges.append
         for e in edges:
-            if e[0] not in self.vertices or \
-               e[1] not in self.vertices or \
-               len(e) != 2:
+            if len(e) != 2 or \
+               e[0] not in vertexSet or \
+               e[1] not in vertexSet:
                 raise TypeError("%(edge)s is not a valid edge."
                                 % {'edge': e})
+            append(Edge(e[0], e[1], directed=directed))
+
+        self.__edgeData = AttributeTable(len(self.__edges))
+        self.__vertexData = AttributeTable(len(self.__vertices))
+        self.__edgeMark = markOf(self.__edges)
+        self.__vertexMark = markOf(self.__vertices)
 
-        self.edges = [Edge(e[0], e[1], directed=directed) for e in edges]
+    def __getVertices(self):
+        return self.__vertices
+
+    def __setVertices(self, vertices):
+        self.__vertices = list(vertices)
+        self.__vertexSet = set(self.__vertices)
+        self.__vertexData = AttributeTable(len(self.__vertices))
+        self.__vertexMark = markOf(self.__vertices)
+        self.version += 1
+        if self.tracker is not None:
+            self.tracker.removed()
+
+    vertices = property(__getVertices, __setVertices)
+
+    def __getEdges(self):
+        return self.__edges
+
+    def __setEdges(self, edges):
+        self.__edges = list(edges)
+        self.__edgeData = AttributeTable(len(self.__edges))
+        self.__edgeMark = markOf(self.__edges)
+        self.version += 1
+        if self.tracker is not None:
+            self.tracker.removed()
+
+    edges = property(__getEdges, __setEdges)
+
+    @property
+    def edgeData(self):
+        '''
+        The \code {AttributeTable} of the edges.
+        '''
+        if moved(self.__edges, self.__edgeMark):
+            self.__edgeData = AttributeTable(len(self.__edges))
+        self.__edgeData.resize(len(self.__edges))
+        self.__edgeMark = markOf(self.__edges)
+        return self.__edgeData
+
+    @property
+    def vertexData(self):
+        '''
+        The \code {AttributeTable} of the vertices.
+        '''
+        if moved(self.__vertices, self.__vertexMark):
+            self.__vertexData = AttributeTable(len(self.__vertices))
+        self.__vertexData.resize(len(self.__vertices))
+        self.__vertexMark = markOf(self.__vertices)
+        return self.__vertexData
+
+    def __hasVertex(self, v):
+        '''
+        Returns True if $v$ is a vertex of the graph.  The vertex set is
+        rebuilt if \code {vertices} has been changed in place.
+        '''
+        if len(self.__vertexSet) != len(self.__vertices):
+            self.__vertexSet = set(self.__vertices)
+        return v in self.__vertexSet
+
+    def addVertex(self, v):
+        '''
+        Adds the vertex $v$ to the graph, if it is not already there.
+        '''
+        if not self.__hasVertex(v):
+            before = self.__trackerStamp()
+            self.__vertices.append(v)
+            self.__vertexSet.add(v)
+            self.vertexData.extend(1)
+            self.version += 1
+            if self.tracker is not None:
+                self.tracker.verticesAdded([v], before)
+
+    def __trackerStamp(self):
+        '''
+        Returns the stamp of the graph (see
+        \code {algorithms.ConnectivityTracker.stamp}) if its connectivity
+        is tracked, otherwise None.
+        '''
+        if self.tracker is None:
+            return None
+        return self.tracker.stamp()
+
+    def addEdge(self, u, v, **attributes):
+        '''
+        Adds an edge joining $u$ and $v$ to the graph, first adding $u$ and
+        $v$ as vertices if need be.  Keyword arguments give attributes of
+        the new edge, such as \code {weight = 2.5}; a column of doubles is
+        made for any attribute that has none.
+        '''
+        self.addVertex(u)
+        self.addVertex(v)
+        before = self.__trackerStamp()
+        data = self.edgeData
+        self.__edges.append(Edge(u, v, directed=self.directed))
+        data.extend(1)
+        for (name, value) in attributes.iteritems():
+            data.add(name)[-1] = value
+        self.version += 1
+        if self.tracker is not None:
+            self.tracker.edgesAdded([(u, v)], before)
+
+    def addEdges(self, edges):
+        '''
+        Adds each edge in the iterable \code {edges} (of pairs of
+        vertices) to the graph, adding any new endpoints as vertices.
+        The edges are consumed one at a time, so \code {edges} may be a
+        generator over a source far larger than memory.
+        '''
+        vertices = self.__vertices
+        if len(self.__vertexSet) != len(vertices):
+            self.__vertexSet = set(vertices)
+        vertexSet = self.__vertexSet
+        vertexData = self.vertexData
+        edgeData = self.edgeData
+        firstVertex = len(vertices)
+        firstEdge = len(self.__edges)
+        before = self.__trackerStamp()
+        append = self.__edges.append
+        directed = self.directed
+        try:
+            for (u, v) in edges:
+                if u not in vertexSet:
+                    vertexSet.add(u)
+                    vertices.append(u)
+                if v not in vertexSet:
+                    vertexSet.add(v)
+                    vertices.append(v)
+                append(Edge(u, v, directed=directed))
+        finally:
+            vertexData.resize(len(vertices))
+            edgeData.resize(len(self.__edges))
+            self.version += 1
+            if self.tracker is not None:
+                self.tracker.verticesAdded(vertices[firstVertex:], before)
+                self.tracker.edgesAdded(self.__edges[firstEdge:])
+
+    def removeEdge(self, u, v):
+        '''
+        Removes an edge joining $u$ and $v$ from the graph, raising
+        \code {ValueError} if there is no such edge.
+        '''
+        data = self.edgeData
+        i = self.__edges.index(Edge(u, v, directed=self.directed))
+        del self.__edges[i]
+        data.delete(i)
+        self.__edgeMark = markOf(self.__edges)
+        self.version += 1
+        if self.tracker is not None:
+            self.tracker.removed()
+
+    def removeVertex(self, v):
+        '''
+        Removes the vertex $v$ and every edge incident with it from the
+        graph, raising \code {ValueError} if $v$ is not a vertex.
+        '''
+        vertexData = self.vertexData
+        edgeData = self.edgeData
+        i = self.__vertices.index(v)
+        del self.__vertices[i]
+        vertexData.delete(i)
+        self.__vertexSet.discard(v)
+        kept = [k for (k, e) in enumerate(self.__edges)
+                if e[0] != v and e[1] != v]
+        self.__edges = [self.__edges[k] for k in kept]
+        edgeData.keep(kept)
+        self.__vertexMark = markOf(self.__vertices)
+        self.__edgeMark = markOf(self.__edges)
+        self.version += 1
+        if self.tracker is not None:
+            self.tracker.removed()
+
+    def trackConnectivity(self):
+        '''
+        Attaches a \code {ConnectivityTracker} to the graph, if it has
+        none, and returns it.  From then on \code {is_connected},
+        \code {numberOfComponents} and the queries of the tracker take
+        amortized $\mathcal{O}(\alpha (n))$ time while the graph only
+        grows.
+        '''
+        if self.tracker is None:
+            from algorithms import ConnectivityTracker
+            self.tracker = ConnectivityTracker(self)
+        return self.tracker
+
+    def memo(self):
+        '''
+        Returns the dict in which values computed from the graph are
+        remembered.  It is emptied whenever the graph changes.  Changes
+        made to the \code {vertices} or \code {edges} lists in place,
+        rather than through the methods of the graph, do not advance the
+        version, but any that change the number of vertices or edges are
+        still noticed.
+        '''
+        stamp = (self.version, len(self.__vertices), len(self.__edges))
+        if stamp != self.__memoStamp:
+            self.__memo = {}
+            self.__memoStamp = stamp
+        return self.__memo
+
+
+def bitCount(x):
+    '''
+    Returns the number of bits set in the nonnegative integer $x$.
+    '''
+    return bin(x).count('1')
+
+
+class BitsetEdges(object):
+    '''
+    This object is the read-only sequence of edges of a
+    \code {BitsetGraph}, which makes \code {Edge} objects only as they are
+    asked for.
+    '''
+
+    def __init__(self, G):
+        self.__graph = G
+        self.__list = None
+        self.__version = None
+
+    def __len__(self):
+        return self.__graph.size
+
+    def __iter__(self):
+        G = self.__graph
+        vertices = G.vertices
+        directed = G.directed
+        for (i, row) in enumerate(G.rows):
+            offset = 0
+            if not directed:
+                offset = i + 1
+                row >>= offset
+            while row:
+                low = row & -row
+                j = offset + low.bit_length() - 1
+                yield Edge(vertices[i], vertices[j], directed=directed)
+                row ^= low
+
+    def __getitem__(self, i):
+        # Asking for the first edge is common (see \code {is_directed}),
+        # so it is found without listing the others.
+
+        if i == 0 and self.__graph.size:
+            return iter(self).next()
+        if self.__version != self.__graph.version:
+            self.__list = list(self)
+            self.__version = self.__graph.version
+        return self.__list[i]
+
+    def __contains__(self, e):
+        G = self.__graph
+        try:
+            return G.adjacent(e[0], e[1])
+        except (KeyError, IndexError, TypeError):
+            return False
+
+
+class BitsetGraph(object):
+    '''
+    This object is a simple graph stored as its bit-packed adjacency
+    matrix (see \code {adjacencyBitsets}): \code {rows[i]} is an integer
+    whose bit $j$ is set if and only if there is an edge from
+    \code {vertices[i]} to \code {vertices[j]}.  For a dense graph on up
+    to a few thousand vertices this takes far less memory than a list of
+    \code {Edge} objects, and intersecting neighborhoods, as in counting
+    triangles or searching for cliques, becomes a bitwise \emph {and} of
+    two rows.
+
+    A \code {BitsetGraph} has the same \code {vertices}, \code {edges},
+    \code {version} and \code {memo} as a \code {Graph}, and the same
+    methods for changing it, so the invariants and searches that only
+    look at the structure take it as well.  Its \code {edges} are made
+    from the rows when they are asked for.  Unlike a \code {Graph}, it
+    cannot hold loops, parallel edges or attributes, and does not track
+    its connectivity: adding an edge that is already there does nothing,
+    and \code {toGraph} gives a \code {Graph} where the rest is needed.
+    '''
+
+    def __init__(self, vertices=None, edges=None, directed=False):
+        self.version = 0
+        self.directed = directed
+        self.size = 0
+        self.rows = []
+        self.__vertices = []
+        self.__index = {}
+        self.__memo = {}
+        self.__memoStamp = None
+        self.__edges = BitsetEdges(self)
+        for v in vertices or []:
+            self.__add(v)
+        for e in edges or []:
+            if len(e) != 2 or e[0] not in self.__index or \
+               e[1] not in self.__index:
+                raise TypeError("%(edge)s is not a valid edge."
+                                % {'edge': e})
+            self.__join(e[0], e[1])
+
+    @classmethod
+    def fromBitsets(cls, vertices, rows, directed=False):
+        '''
+        Returns the graph on the list \code {vertices} whose bit-packed
+        adjacency matrix is \code {rows}.
+        '''
+        G = cls(vertices=vertices, directed=directed)
+        if len(rows) != len(G.vertices):
+            raise ValueError("There must be one row for each vertex.")
+        G.rows = [row & ~(1 << i) for (i, row) in enumerate(rows)]
+        G.size = sum(bitCount(row) for row in G.rows)
+        if not directed:
+            G.size /= 2
+        return G
+
+    @property
+    def vertices(self):
+        '''
+        The list of vertices, in the order of the rows.
+        '''
+        return self.__vertices
+
+    @property
+    def edges(self):
+        '''
+        The sequence of edges.
+        '''
+        return self.__edges
+
+    def __add(self, v):
+        '''
+        Adds the vertex $v$, if it is new, returning its position.
+        '''
+        try:
+            return self.__index[v]
+        except KeyError:
+            i = self.__index[v] = len(self.__vertices)
+            self.__vertices.append(v)
+            self.rows.append(0)
+            return i
+
+    def __join(self, u, v):
+        '''
+        Adds the edge from $u$ to $v$, which must be vertices.
+        '''
+        i = self.__index[u]
+        j = self.__index[v]
+        if i == j:
+            raise TypeError("%(edge)s is not a valid edge: a BitsetGraph "
+                            "has no loops." % {'edge': (u, v)})
+        if not self.rows[i] >> j & 1:
+            self.rows[i] |= 1 << j
+            if not self.directed:
+                self.rows[j] |= 1 << i
+            self.size += 1
+
+    def position(self, v):
+        '''
+        Returns the position of the vertex $v$ in \code {vertices}.
+        '''
+        return self.__index[v]
+
+    def adjacent(self, u, v):
+        '''
+        Returns True if there is an edge from $u$ to $v$.
+        '''
+        return bool(self.rows[self.__index[u]] >> self.__index[v] & 1)
+
+    def neighbors(self, v):
+        '''
+        Returns the list of vertices adjacent to (or, in a directed graph,
+        from) the vertex $v$.
+        '''
+        row = self.rows[self.__index[v]]
+        vertices = self.__vertices
+        result = []
+        while row:
+            low = row & -row
+            result.append(vertices[low.bit_length() - 1])
+            row ^= low
+        return result
+
+    def degree(self, v):
+        '''
+        Returns the number of neighbors of the vertex $v$.
+        '''
+        return bitCount(self.rows[self.__index[v]])
+
+    def adjacencyLists(self):
+        '''
+        Returns the adjacency lists of the graph, as
+        \code {adjacencyLists} would.
+        '''
+        return dict((v, self.neighbors(v)) for v in self.__vertices)
+
+    def adjacencyBitsets(self):
+        '''
+        Returns a copy of the bit-packed adjacency matrix of the graph.
+        '''
+        return list(self.rows)
+
+    def addVertex(self, v):
+        '''
+        Adds the vertex $v$ to the graph, if it is not already there.
+        '''
+        if v not in self.__index:
+            self.__add(v)
+            self.version += 1
+
+    def addEdge(self, u, v):
+        '''
+        Adds an edge joining $u$ and $v$ to the graph, first adding $u$ and
+        $v$ as vertices if need be.
+        '''
+        self.__add(u)
+        self.__add(v)
+        self.__join(u, v)
+        self.version += 1
+
+    def addEdges(self, edges):
+        '''
+        Adds each edge in the iterable \code {edges} (of pairs of
+        vertices) to the graph, adding any new endpoints as vertices.
+        '''
+        for (u, v) in edges:
+            self.__add(u)
+            self.__add(v)
+            self.__join(u, v)
+        self.version += 1
+
+    def removeEdge(self, u, v):
+        '''
+        Removes the edge joining $u$ and $v$ from the graph, raising
+        \code {ValueError} if there is no such edge.
+        '''
+        if u not in self.__index or v not in self.__index or \
+           not self.adjacent(u, v):
+            raise ValueError("There is no edge %s." % (Edge(u, v),))
+        i = self.__index[u]
+        j = self.__index[v]
+        self.rows[i] &= ~(1 << j)
+        if not self.directed:
+            self.rows[j] &= ~(1 << i)
+        self.size -= 1
+        self.version += 1
+
+    def removeVertex(self, v):
+        '''
+        Removes the vertex $v$ and every edge incident with it from the
+        graph, raising \code {ValueError} if $v$ is not a vertex.  The
+        column of $v$ is cut out of every row, so this takes time
+        proportional to the size of the matrix.
+        '''
+        if v not in self.__index:
+            raise ValueError("%r is not a vertex." % (v,))
+        k = self.__index.pop(v)
+        row = self.rows.pop(k)
+        del self.__vertices[k]
+        low = (1 << k) - 1
+        removed = bitCount(row)
+        for (i, other) in enumerate(self.rows):
+            if self.directed and other >> k & 1:
+                removed += 1
+            self.rows[i] = (other & low) | (other >> (k + 1) << k)
+        for u in self.__vertices[k:]:
+            self.__index[u] -= 1
+        self.size -= removed
+        self.version += 1
+
+    def memo(self):
+        '''
+        Returns the dict in which values computed from the graph are
+        remembered (see \code {Graph.memo}).
+        '''
+        if self.version != self.__memoStamp:
+            self.__memo = {}
+            self.__memoStamp = self.version
+        return self.__memo
+
+    def toGraph(self):
+        '''
+        Returns a \code {Graph} with the same vertices and edges.
+        '''
+        return Graph(vertices=self.__vertices, edges=self.edges,
+                     directed=self.directed)
+
+
+def toBitsetGraph(G):
+    '''
+    Returns a \code {BitsetGraph} with the same vertices and edges as $G$
+    (whose loops and parallel edges are dropped).
+    '''
+    return BitsetGraph.fromBitsets(list(G.vertices), adjacencyBitsets(G),
+                                   directed=is_directed(G))
 
 
 def fromAdjacencyMatrix(M):
@@ -90,6 +764,7 @@ def fromAdjacencyMatrix(M):
     Constructs a graph $G$ from the matrix $M$.  If $M$ is symmetric, we
     assume the graph $G$ returned is undirected, otherwise $G$ is directed.
     '''
+    import sympy
     M = sympy.matrices.Matrix(M)
     if M != M.transpose():
         directed = True
@@ -105,6 +780,7 @@ def adjacencyMatrix(G):
     '''
     Returns the adjacency matrix of the graph $G$.
     '''
+    import sympy
     n = len(G.vertices)
     M = sympy.zeros(n)
     for edge in G.edges:
@@ -128,23 +804,59 @@ def incidenceMatrix(G):
     def b(i, j):
         return G.vertices[i] in G.edges[j]
 
+    import sympy
     return sympy.matrices.Matrix(n, m, b)
 
 
-def fromAdjacencyLists(Ls):
+def symmetricPairs(pairs):
+    '''
+    This is a generator that yields the undirected edges listed by the
+    pairs $(v, u)$ from \code {pairs}, in which an edge may appear twice,
+    once from each end, but is yielded only once.  Only edges that have
+    been seen from one end but not yet from the other are kept in the
+    index, so for a symmetric listing the index shrinks again as the
+    second ends turn up.
+    '''
+    pending = set()
+    for (v, u) in pairs:
+        if (u, v) in pending:
+            pending.remove((u, v))
+        else:
+            pending.add((v, u))
+            yield (v, u)
+
+
+def fromAdjacencyLists(Ls, directed=False):
     '''
     Constructs a graph $G$ from a the sequence of two-element sequences
     of the form \code { (v, (u_1, u_2, ... u_k) )}, indicating that the
-    vertex $v$ is adjacent to each of $u_1, u_2, \dots, u_k$.
+    vertex $v$ is adjacent to each of $u_1, u_2, \dots, u_k$.  A dict
+    such as the one returned by \code {adjacencyLists} is accepted too.
+
+    \code {Ls} may be any iterable, such as a generator reading from a
+    file; it is consumed one entry at a time and its edges are loaded
+    into the graph as they are found.  In an undirected graph, an edge
+    may be listed under one of its ends or under both.
     '''
-    Ls = dict(Ls)
-    vertices = []
-    edges = []
-    for v, neighbors in Ls:
-        vertices.append(v)
-        for u in neighbors:
-            edges.append((u, v))
-    return Graph(vertices=vertices, edges=edges)
+    if hasattr(Ls, 'iteritems'):
+        Ls = Ls.iteritems()
+    G = Graph(directed=directed)
+
+    def pairs():
+        '''
+        Generates a pair for each neighbor listed.
+        '''
+        addVertex = G.addVertex
+        for v, neighbors in Ls:
+            addVertex(v)
+            for u in neighbors:
+                yield (v, u)
+
+    if directed:
+        G.addEdges(pairs())
+    else:
+        G.addEdges(symmetricPairs(pairs()))
+    return G
 
 
 def adjacencyLists(G):
@@ -154,24 +866,99 @@ def adjacencyLists(G):
     each \code {v} in \code {G.vertices}, we have that
     \code {adjacencies [v]} is a list of all the vertices adjacent
     to \code {v} in the graph $G$.
+
+    Graph-like objects that keep their own adjacency structure (such as
+    \code {mapped.MappedGraph}) may supply it through an
+    \code {adjacencyLists} method of their own.
     '''
-    adjacencies = {}
-    for v in G.vertices:
-        adjacencies[v] = []
-        for edge in [e for e in G.edges if v in e]:
-            if edge.directed:
-                if edge[0] == v:
-                    adjacencies[v].append(edge[1])
-            else:
-                u = [x for x in edge if x != v][0]
-                adjacencies[v].append(u)
+    if hasattr(G, 'adjacencyLists'):
+        return G.adjacencyLists()
+
+    adjacencies = dict((v, []) for v in G.vertices)
+    for edge in G.edges:
+        u, v = edge[0], edge[1]
+        adjacencies[u].append(v)
+        if not edge.directed:
+            adjacencies[v].append(u)
 
     return adjacencies
 
 
+def adjacencyBitsets(G):
+    '''
+    Returns the adjacency matrix of $G$ in bit-packed form, as a list
+    \code {rows} of integers: bit $j$ of \code {rows[i]} is set if and only
+    if there is an edge from \code {G.vertices[i]} to \code {G.vertices[j]}.
+    Boolean matrix operations then become bitwise operations on whole rows.
+    Graph-like objects that keep these rows themselves (such as
+    \code {BitsetGraph}) may supply them through an
+    \code {adjacencyBitsets} method of their own.
+    '''
+    if hasattr(G, 'adjacencyBitsets'):
+        return G.adjacencyBitsets()
+
+    index = dict((v, i) for (i, v) in enumerate(G.vertices))
+    rows = [0] * len(G.vertices)
+    for edge in G.edges:
+        i = index[edge[0]]
+        j = index[edge[1]]
+        rows[i] |= 1 << j
+        if not edge.directed:
+            rows[j] |= 1 << i
+    return rows
+
+
+def is_directed(G):
+    '''
+    Returns True if $G$ is directed, otherwise False.  This is the
+    \code {directed} flag of $G$ if it has one; otherwise it is read from
+    the edges, and a graph with no edges is considered undirected.
+    '''
+    directed = getattr(G, 'directed', None)
+    if directed is not None:
+        return bool(directed)
+    return bool(G.edges) and G.edges[0].directed
+
+
+def is_outOfCore(G):
+    '''
+    Returns True if $G$ declares itself out of core, by a true
+    \code {outOfCore} attribute, so that its own methods must be used in
+    place of those that hold its edges in memory (see \code {sharded}).
+    '''
+    return getattr(G, 'outOfCore', False) is True
+
+
+def edgeKeys(G, index):
+    '''
+    Returns a sorted \code {array} of integers, one for each edge of $G$.
+    Here \code {index} is a dict numbering the vertices of $G$ (and
+    possibly others) by $0, 1, \dots, n - 1$.  The edge from $v_i$ to
+    $v_j$ is encoded as $in + j$; undirected edges are first put in the
+    canonical order $i \leq j$, so that equal edges get equal keys.
+    Two such arrays built from the same \code {index} can be compared
+    directly, without allocating any \code {Edge} objects.
+    '''
+    n = len(index)
+    keys = []
+    append = keys.append
+    for e in G.edges:
+        i = index[e[0]]
+        j = index[e[1]]
+        if j < i and not e.directed:
+            i, j = j, i
+        append(i * n + j)
+    keys.sort()
+    return array('l', keys)
+
+
 def dotString(G):
     '''
     Returns a string suitable for passing to the \code {dot} program from
-    the \code {graphviz} graph drawing toolkit.
+    the \code {graphviz} graph drawing toolkit.  To write a large graph
+    straight to a file, see \code {readwrite.writeDot}.
     '''
-    return NotImplemented
+    import readwrite
+    out = StringIO()
+    readwrite.writeDot(G, out)
+    return out.getvalue()
@@ -0,0 +1,287 @@
+'''
+The \code{graphlets} module lists and counts small subgraphs: the cliques
+on $k$ vertices, and the \emph {graphlets}, the graphs induced by the sets
+of $3$ or $4$ vertices.
+
+Rather than try every set of $k$ vertices, we orient each edge from the
+end that comes first in a degeneracy ordering (see
+\code {algorithms.degeneracyOrderOfLists}) to the other.  Every clique
+then has exactly one vertex from which all of its other vertices can be
+reached forward, and each vertex has at most $d$ forward neighbors, where
+$d$ is the degeneracy of the graph.  Growing cliques by intersecting
+forward neighborhoods lists the $k$-cliques in
+$\mathcal{O}(m d^{k - 2})$ time.  Directions of edges, loops and parallel
+edges are ignored throughout.
+'''
+
+from itertools import combinations, permutations
+
+from algorithms import degeneracyOrderOfLists, undirectedNeighborSets
+from combinatorics import binomial
+
+# The graphlets on $3$ and $4$ vertices, each given by its name and its
+# edges on the vertices $0, 1, \dots, k - 1$.  The names of the connected
+# ones follow \code {graph.instances}.
+
+GRAPHLETS = {
+    3: [('empty', []),
+        ('edge', [(0, 1)]),
+        ('path', [(0, 1), (1, 2)]),
+        ('triangle', [(0, 1), (1, 2), (0, 2)])],
+    4: [('empty', []),
+        ('edge', [(0, 1)]),
+        ('twoEdges', [(0, 1), (2, 3)]),
+        ('pathAndVertex', [(0, 1), (1, 2)]),
+        ('triangleAndVertex', [(0, 1), (1, 2), (0, 2)]),
+        ('path', [(0, 1), (1, 2), (2, 3)]),
+        ('claw', [(0, 1), (0, 2), (0, 3)]),
+        ('cycle', [(0, 1), (1, 2), (2, 3), (0, 3)]),
+        ('paw', [(0, 1), (1, 2), (0, 2), (2, 3)]),
+        ('kite', [(0, 1), (1, 2), (2, 3), (0, 3), (0, 2)]),
+        ('complete', [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)])],
+}
+
+
+def forwardNeighbors(neighbors):
+    '''
+    Returns the list of sets of forward neighbors of each vertex: those
+    adjacent to it that come after it in a degeneracy ordering.
+    '''
+    order, core = degeneracyOrderOfLists(neighbors)
+    rank = [0] * len(order)
+    for (i, v) in enumerate(order):
+        rank[v] = i
+    return [set([w for w in ws if rank[w] > rank[v]])
+            for (v, ws) in enumerate(neighbors)]
+
+
+def cliquesOfLists(forward, k):
+    '''
+    This is a generator that yields each $k$-clique of the graph with
+    forward neighbor sets \code {forward} once, as a tuple of vertices.
+    '''
+
+    def extend(clique, candidates, remaining):
+        '''
+        Yields the cliques made by adding \code {remaining} vertices
+        from \code {candidates} to \code {clique}.
+        '''
+        if remaining == 1:
+            for w in candidates:
+                yield clique + (w,)
+            return
+        for w in candidates:
+            narrowed = candidates & forward[w]
+            if len(narrowed) >= remaining - 1:
+                for found in extend(clique + (w,), narrowed, remaining - 1):
+                    yield found
+
+    for v in xrange(len(forward)):
+        if k == 1:
+            yield (v,)
+        elif len(forward[v]) >= k - 1:
+            for found in extend((v,), forward[v], k - 1):
+                yield found
+
+
+def countCliquesOfLists(forward, k):
+    '''
+    Returns the number of $k$-cliques of the graph with forward neighbor
+    sets \code {forward}, as \code {cliquesOfLists} would list them but
+    without making the last level of tuples.
+    '''
+
+    def count(candidates, remaining):
+        '''
+        Counts the ways of choosing \code {remaining} more vertices from
+        \code {candidates}.
+        '''
+        if remaining == 1:
+            return len(candidates)
+        total = 0
+        for w in candidates:
+            narrowed = candidates & forward[w]
+            if len(narrowed) >= remaining - 1:
+                total += count(narrowed, remaining - 1)
+        return total
+
+    if k == 1:
+        return len(forward)
+    return sum([count(ws, k - 1) for ws in forward if len(ws) >= k - 1])
+
+
+def cliques(G, k):
+    '''
+    This is a generator that yields each set of $k$ pairwise adjacent
+    vertices of $G$ once, as a tuple.
+    '''
+    if k < 1:
+        raise ValueError("A clique has at least one vertex.")
+    vertices, neighbors = undirectedNeighborSets(G)
+    for clique in cliquesOfLists(forwardNeighbors(neighbors), k):
+        yield tuple([vertices[i] for i in clique])
+
+
+def numberOfCliques(G, k):
+    '''
+    Returns the number of sets of $k$ pairwise adjacent vertices of $G$.
+    '''
+    if k < 1:
+        raise ValueError("A clique has at least one vertex.")
+    vertices, neighbors = undirectedNeighborSets(G)
+    return countCliquesOfLists(forwardNeighbors(neighbors), k)
+
+
+def shapeKey(edges, k):
+    '''
+    Returns a key for the graph on $0, 1, \dots, k - 1$ with the given
+    edges that is the same for isomorphic graphs, by trying every
+    relabeling.  This is only meant for tiny graphs.
+    '''
+    return min([tuple(sorted([tuple(sorted((p[u], p[v])))
+                              for (u, v) in edges]))
+                for p in permutations(range(k))])
+
+
+# \code {containments[k][(H, F)]} is the number of subgraphs of the
+# graphlet $F$ on all $k$ of its vertices that are isomorphic to the
+# graphlet $H$.  They are found by brute force the first time they are
+# needed.
+
+containments = {}
+
+
+def containmentsOf(k):
+    '''
+    Returns the table of containments between the graphlets on $k$
+    vertices.
+    '''
+    if k not in containments:
+        keys = dict((name, shapeKey(edges, k))
+                    for (name, edges) in GRAPHLETS[k])
+        table = {}
+        for (host, hostEdges) in GRAPHLETS[k]:
+            for (name, edges) in GRAPHLETS[k]:
+                table[(name, host)] = len([
+                    subset for subset in combinations(hostEdges, len(edges))
+                    if shapeKey(subset, k) == keys[name]])
+        containments[k] = table
+    return containments[k]
+
+
+def triangleStatistics(neighbors, forward):
+    '''
+    Returns the number of triangles, the list of the numbers of triangles
+    at each vertex, and a dict giving the number of triangles at each edge
+    $ij$ with $i < j$, keyed by $in + j$.
+    '''
+    n = len(neighbors)
+    total = 0
+    atVertex = [0] * n
+    atEdge = dict.fromkeys([i * n + j for i in xrange(n)
+                            for j in neighbors[i] if i < j], 0)
+    for v in xrange(n):
+        for w in forward[v]:
+            for x in forward[v] & forward[w]:
+                total += 1
+                atVertex[v] += 1
+                atVertex[w] += 1
+                atVertex[x] += 1
+                for (i, j) in [(v, w), (v, x), (w, x)]:
+                    if j < i:
+                        i, j = j, i
+                    atEdge[i * n + j] += 1
+    return total, atVertex, atEdge
+
+
+def numberOfFourCycles(neighbors):
+    '''
+    Returns the number of $4$-cycles of the graph, by the method of Chiba
+    and Nishizeki: each cycle is found once, from its vertex of highest
+    degree $v$, as two paths $vuw$ through vertices of lower degree to the
+    opposite vertex $w$.  This takes $\mathcal{O}(a m)$ time, where $a$ is
+    the arboricity.
+    '''
+    n = len(neighbors)
+    order = sorted(xrange(n), key=lambda v: (-len(neighbors[v]), v))
+    rank = [0] * n
+    for (i, v) in enumerate(order):
+        rank[v] = i
+    paths = [0] * n
+    cycles = 0
+    for v in order:
+        reached = []
+        for u in neighbors[v]:
+            if rank[u] > rank[v]:
+                for w in neighbors[u]:
+                    if rank[w] > rank[v]:
+                        if not paths[w]:
+                            reached.append(w)
+                        paths[w] += 1
+        for w in reached:
+            cycles += paths[w] * (paths[w] - 1) / 2
+            paths[w] = 0
+    return cycles
+
+
+def subgraphCounts(neighbors, k):
+    '''
+    Returns a dict giving, for each graphlet on $k$ vertices, the number
+    of its copies as a (not necessarily induced) subgraph on $k$ vertices
+    of the graph, each found from counts of degrees, triangles, cycles
+    and cliques.
+    '''
+    n = len(neighbors)
+    degree = [len(ws) for ws in neighbors]
+    m = sum(degree) / 2
+    wedges = sum([binomial(d, 2) for d in degree])
+    forward = forwardNeighbors(neighbors)
+    triangles, atVertex, atEdge = triangleStatistics(neighbors, forward)
+    if k == 3:
+        return {'empty': binomial(n, 3), 'edge': m * (n - 2),
+                'path': wedges, 'triangle': triangles}
+
+    # A path $abcd$ has middle edge $bc$, and $a$ and $d$ are any other
+    # neighbors of $b$ and $c$, except that they may not be the same
+    # vertex, which happens once for each triangle at the edge.
+
+    paths = sum([(degree[i] - 1) * (degree[j] - 1)
+                 for i in xrange(n) for j in neighbors[i] if i < j])
+    return {'empty': binomial(n, 4),
+            'edge': m * binomial(n - 2, 2),
+            'twoEdges': binomial(m, 2) - wedges,
+            'pathAndVertex': wedges * (n - 3),
+            'triangleAndVertex': triangles * (n - 3),
+            'path': paths - 3 * triangles,
+            'claw': sum([binomial(d, 3) for d in degree]),
+            'cycle': numberOfFourCycles(neighbors),
+            'paw': sum([t * (d - 2) for (t, d) in zip(atVertex, degree)]),
+            'kite': sum([binomial(t, 2) for t in atEdge.itervalues()]),
+            'complete': countCliquesOfLists(forward, 4)}
+
+
+def graphletCounts(G, k=4):
+    '''
+    Returns a dict mapping the name of each graphlet on $k$ vertices
+    ($k$ is $3$ or $4$; see \code {GRAPHLETS}) to the number of sets of
+    $k$ vertices of $G$ that induce it.  The counts add up to
+    ${n \choose k}$.
+
+    We count the copies of each graphlet as a subgraph, which only takes
+    degrees, triangles, $4$-cycles and $4$-cliques, and then recover the
+    induced counts: the copies of a graphlet $H$ are the induced copies of
+    $H$ plus, for each denser graphlet $F$, the induced copies of $F$ times
+    the number of copies of $H$ in $F$, so the induced counts follow from
+    the densest graphlet down.
+    '''
+    if k not in GRAPHLETS:
+        raise ValueError("Graphlets are only counted on 3 or 4 vertices.")
+    vertices, neighbors = undirectedNeighborSets(G)
+    copies = subgraphCounts(neighbors, k)
+    table = containmentsOf(k)
+    induced = {}
+    for (name, edges) in sorted(GRAPHLETS[k], key=lambda g: -len(g[1])):
+        induced[name] = copies[name] - sum(
+            [table[(name, host)] * count
+             for (host, count) in induced.iteritems()])
+    return induced
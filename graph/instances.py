@@ -10,13 +10,19 @@ The \code{instances} module provides two broad classes of entity:
 '''
 
 import graph
-from math import floor
+import random
+from math import floor, log, sqrt
 try:
     from itertools import product
 except ImportError:
     from compatibility import product
 from operations import graphCartesianProduct
 
+# The dense instances below build a \code {graph.BitsetGraph} instead of
+# a \code {graph.Graph} when given the keyword \code {bitset = True}.  It
+# is smaller and faster for clique and triangle searches, but holds no
+# attributes and tracks nothing, so it is never built unasked.
+
 
 def generalizedPetersenGraph(n, k):
     '''
@@ -50,23 +56,43 @@ def oddGraph(k):
     return NotImplemented
 
 
-def completeGraph(*ns):
+def completeGraph(*ns, **options):
     '''
     Returns the complete graph $K_{n_1, n_2, \dots, n_k}$ when passed
-    the sequence \code {n_1, n_2, \dots, n_k}.
+    the sequence \code {n_1, n_2, \dots, n_k}.  With the keyword
+    \code {bitset = True}, it is built as a \code {graph.BitsetGraph}.
     '''
 
     # The folowing is to silence a spurious pylint warning:
     # pylint: disable-msg=W0142
 
+    bitset = options.pop('bitset', False)
+    if options:
+        raise TypeError("Unexpected keyword arguments: %s."
+                        % ', '.join(sorted(options)))
     if len(ns) == 1:
         if ns[0] == 1:
+            if bitset:
+                return graph.BitsetGraph(vertices=[1], edges=[])
             return graph.Graph(vertices=[1], edges=[])
         else:
-            return completeGraph(* ([1] * ns[0]))
+            return completeGraph(* ([1] * ns[0]), bitset=bitset)
 
     n = sum(ns)
     vertices = range(n)
+
+    # Each vertex is adjacent to every vertex outside its own part, so its
+    # row of the adjacency matrix is the complement of its part.
+
+    if bitset:
+        full = (1 << n) - 1
+        rows = []
+        start = 0
+        for k in ns:
+            rows.extend([full ^ ((1 << k) - 1) << start] * k)
+            start += k
+        return graph.BitsetGraph.fromBitsets(vertices, rows)
+
     edges = []
     for group in xrange(len(ns)):
         lo = sum(ns[:group - 1])
@@ -130,12 +156,12 @@ def dodecahedron():
     return generalizedPetersenGraph(10, 2)
 
 
-def icosahedron():
+def icosahedron(bitset=False):
     '''
-    Returns the graph of the icosahedron.
+    Returns the graph of the icosahedron, as a \code {graph.BitsetGraph}
+    if \code {bitset} is True.
     '''
-    return graph.fromAdjacencyMatrix(
-        ([0, 1, 1, 1, 1, 0, 0, 0, 1, 0, 0, 0],
+    M = ([0, 1, 1, 1, 1, 0, 0, 0, 1, 0, 0, 0],
          [1, 0, 1, 0, 0, 0, 1, 1, 1, 0, 0, 0],
          [1, 1, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0],
          [1, 0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 1],
@@ -146,12 +172,245 @@ def icosahedron():
          [1, 1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0],
          [0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 1, 1],
          [0, 0, 0, 0, 0, 1, 1, 1, 0, 1, 0, 1],
-         [0, 0, 0, 1, 1, 1, 0, 0, 0, 1, 1, 0]))
+         [0, 0, 0, 1, 1, 1, 0, 0, 0, 1, 1, 0])
+    if bitset:
+        rows = [sum(bit << j for (j, bit) in enumerate(row)) for row in M]
+        return graph.BitsetGraph.fromBitsets(range(12), rows)
+    return graph.Graph(vertices=range(12),
+                       edges=[(i, j) for i in xrange(12)
+                              for j in xrange(i + 1, 12) if M[i][j]])
 
 
 def gridGraph(m, n):
     return graphCartesianProduct(path(m), path(n))
 
+# The following functions construct random graphs.  Each family comes in
+# two flavours: a generator named \code {...Edges} that streams the edges
+# of the random graph one at a time without storing them, and a function
+# that builds the graph itself.  All of them take a \code {seed} keyword
+# so that the same parameters and seed always produce the same graph.
+
+
+def randomGraphEdges(n, p, seed=None):
+    '''
+    This is a generator that yields the edges of a random graph drawn from
+    the Erdos--Renyi model $G(n, p)$ on the vertices $0, 1, \dots,
+    n - 1$.  Rather than flipping a coin for each of the ${n \choose 2}$
+    pairs, we draw the gap to the next edge from a geometric distribution
+    (Batagelj and Brandes, 2005), so the running time is
+    $\mathcal{O}(n + m)$.
+    '''
+    if p <= 0 or n < 2:
+        return
+    if p >= 1:
+        for v in xrange(1, n):
+            for w in xrange(v):
+                yield (w, v)
+        return
+
+    rng = random.Random(seed)
+    logq = log(1.0 - p)
+    v = 1
+    w = -1
+    while v < n:
+        w += 1 + int(log(1.0 - rng.random()) / logq)
+        while w >= v and v < n:
+            w -= v
+            v += 1
+        if v < n:
+            yield (w, v)
+
+
+def randomGraph(n, p, seed=None, bitset=False):
+    '''
+    Returns a random graph from the model $G(n, p)$, in which each of
+    the ${n \choose 2}$ possible edges is present independently with
+    probability $p$, as a \code {graph.BitsetGraph} if \code {bitset} is
+    True.
+    '''
+    return [graph.Graph, graph.BitsetGraph][bool(bitset)](
+        vertices=xrange(n), edges=randomGraphEdges(n, p, seed=seed))
+
+
+def __pairFromIndex(k):
+    '''
+    Returns the $k$-th pair $(w, v)$ with $0 \leq w < v$ in the ordering
+    $(0, 1), (0, 2), (1, 2), (0, 3), \dots$.
+    '''
+    v = int((1 + sqrt(1 + 8 * k)) / 2)
+
+    # Floating point error can put $v$ off by one for very large $k$.
+
+    while v * (v - 1) / 2 > k:
+        v -= 1
+    while (v + 1) * v / 2 <= k:
+        v += 1
+    return (k - v * (v - 1) / 2, v)
+
+
+def randomGraphWithSizeEdges(n, m, seed=None):
+    '''
+    This is a generator that yields the edges of a random graph drawn
+    uniformly from all graphs on the vertices $0, 1, \dots, n - 1$ having
+    exactly $m$ edges (the model $G(n, m)$).
+    '''
+    N = n * (n - 1) / 2
+    if m < 0 or m > N:
+        raise ValueError("Parameters out of range.")
+    rng = random.Random(seed)
+
+    # When more than half of the possible edges are wanted, it is cheaper
+    # to choose the edges that are left out.
+
+    if 2 * m > N:
+        excluded = set(rng.sample(xrange(N), N - m))
+        for k in xrange(N):
+            if k not in excluded:
+                yield __pairFromIndex(k)
+    else:
+        for k in rng.sample(xrange(N), m):
+            yield __pairFromIndex(k)
+
+
+def randomGraphWithSize(n, m, seed=None, bitset=False):
+    '''
+    Returns a random graph from the model $G(n, m)$, as a
+    \code {graph.BitsetGraph} if \code {bitset} is True.
+    '''
+    return [graph.Graph, graph.BitsetGraph][bool(bitset)](
+        vertices=xrange(n), edges=randomGraphWithSizeEdges(n, m, seed=seed))
+
+
+def randomRegularGraphEdges(d, n, seed=None):
+    '''
+    This is a generator that yields the edges of a random $d$-regular
+    graph on the vertices $0, 1, \dots, n - 1$.  We use the pairing
+    algorithm of Steger and Wormald, which pairs up the $dn$ endpoints
+    at random, rejecting loops and multiple edges as it goes, and starts
+    over in the rare event that it gets stuck.
+    '''
+    if d < 0 or d >= n or (n * d) % 2:
+        raise ValueError("Parameters out of range.")
+    rng = random.Random(seed)
+
+    def attempt():
+        '''
+        Tries to build the edge set, returning None if we get stuck.
+        '''
+        edges = set()
+        points = [v for v in xrange(n) for i in xrange(d)]
+        while points:
+            remaining = {}
+            rng.shuffle(points)
+            for i in xrange(0, len(points), 2):
+                u, v = points[i], points[i + 1]
+                if u > v:
+                    u, v = v, u
+                if u != v and (u, v) not in edges:
+                    edges.add((u, v))
+                else:
+                    remaining[u] = remaining.get(u, 0) + 1
+                    remaining[v] = remaining.get(v, 0) + 1
+            if not remaining:
+                break
+
+            # Give up if none of the leftover endpoints can be paired.
+
+            left = sorted(remaining)
+            if not [1 for i, u in enumerate(left) for v in left[i + 1:]
+                    if (u, v) not in edges]:
+                return None
+            points = [v for v in remaining for i in xrange(remaining[v])]
+        return edges
+
+    edges = attempt()
+    while edges is None:
+        edges = attempt()
+    for e in sorted(edges):
+        yield e
+
+
+def randomRegularGraph(d, n, seed=None):
+    '''
+    Returns a random $d$-regular graph on $n$ vertices.
+    '''
+    return graph.Graph(vertices=xrange(n),
+                       edges=randomRegularGraphEdges(d, n, seed=seed))
+
+
+def BarabasiAlbertGraphEdges(n, k, seed=None):
+    '''
+    This is a generator that yields the edges of a random graph on the
+    vertices $0, 1, \dots, n - 1$ grown by the preferential attachment
+    process of Barabasi and Albert: each new vertex is joined to $k$
+    distinct existing vertices chosen with probability proportional to
+    their degrees.
+    '''
+    if k < 1 or k >= n:
+        raise ValueError("Parameters out of range.")
+    rng = random.Random(seed)
+
+    # Each vertex appears in \code {ends} once for every edge it is
+    # incident with, so a uniform choice from \code {ends} is a choice
+    # weighted by degree.
+
+    ends = []
+    targets = range(k)
+    for source in xrange(k, n):
+        for t in targets:
+            yield (t, source)
+        ends.extend(targets)
+        ends.extend([source] * k)
+        chosen = set()
+        while len(chosen) < k:
+            chosen.add(rng.choice(ends))
+        targets = sorted(chosen)
+
+
+def BarabasiAlbertGraph(n, k, seed=None):
+    '''
+    Returns a random preferential attachment graph on $n$ vertices in
+    which each vertex after the first $k$ arrives with $k$ edges.
+    '''
+    return graph.Graph(vertices=xrange(n),
+                       edges=BarabasiAlbertGraphEdges(n, k, seed=seed))
+
+
+def configurationModelEdges(degrees, seed=None):
+    '''
+    This is a generator that yields the edges of a random graph in which
+    vertex $i$ has degree \code {degrees[i]}, obtained from the
+    configuration model: each vertex gets as many endpoints as its
+    degree, and the endpoints are matched uniformly at random.  Since the
+    matching may produce loops and multiple edges, which our graphs do not
+    allow, these are discarded (the ``erased'' configuration model), so
+    degrees may come out slightly smaller than requested.
+    '''
+    degrees = list(degrees)
+    if sum(degrees) % 2 or [d for d in degrees if d < 0]:
+        raise ValueError("Not a valid degree sequence.")
+    rng = random.Random(seed)
+    points = [v for v, d in enumerate(degrees) for i in xrange(d)]
+    rng.shuffle(points)
+    seen = set()
+    for i in xrange(0, len(points), 2):
+        u, v = points[i], points[i + 1]
+        if u > v:
+            u, v = v, u
+        if u != v and (u, v) not in seen:
+            seen.add((u, v))
+            yield (u, v)
+
+
+def configurationModelGraph(degrees, seed=None):
+    '''
+    Returns a random graph with (approximately) the degree sequence
+    \code {degrees}.  See \code {configurationModelEdges}.
+    '''
+    degrees = list(degrees)
+    return graph.Graph(vertices=xrange(len(degrees)),
+                       edges=configurationModelEdges(degrees, seed=seed))
+
 # The following are listed on p. 12 of West as "The Graph Menagerie."
 # The menagierie is a set of graphs on $5$ or fewer vertices that
 # come up frequently enough in graph theory that they have names.
@@ -172,11 +431,20 @@ def claw():
 
 
 def paw():
-    return NotImplemented
+    '''
+    Returns the paw graph: a triangle with a pendant edge.
+    '''
+    return graph.Graph(vertices=range(4),
+                       edges=[(0, 1), (1, 2), (0, 2), (2, 3)])
 
 
 def kite():
-    return NotImplemented
+    '''
+    Returns the kite graph (also called the diamond), $K_4$ with one edge
+    removed: two triangles sharing an edge.
+    '''
+    return graph.Graph(vertices=range(4),
+                       edges=[(0, 1), (1, 2), (2, 3), (0, 3), (0, 2)])
 
 
 def house():
@@ -10,9 +10,16 @@ several common graph invariants.
 
 # pylint: disable-msg=W0401
 
-from graph import adjacencyMatrix
-from algorithms import DFS
-from combinatorics import binomial
+from graph import adjacencyMatrix, adjacencyBitsets, is_directed, bitCount
+from graph import is_outOfCore
+from isomorphism import canonicalFormOfLists
+from cache import isomorphismCached, memoized, memoizedValue
+from operations import complementBitsets
+from algorithms import DFS, bitsetMaximumClique, coreNumbers
+from directed import inOutLists, componentsOfLists, topologicalOrderOfLists
+from spectral import laplacian, smallestLaplacianEigenvalues
+from matching import bipartition, maximumMatching
+from coloring import edgeColoring, vertexColoring
 from math import floor
 
 
@@ -31,19 +38,29 @@ def size(G):
     return len(G.edges)
 
 
-def degrees(G):
+@memoized
+def degreeTable(G):
     '''
-    Returns a generator object that yields the degree of each vertex
-    of $G$, in no particular order.
+    Returns a dict mapping each vertex of $G$ to its degree, computed in a
+    single pass over the edges of $G$.
     '''
+    table = dict.fromkeys(G.vertices, 0)
+    for e in G.edges:
+        table[e[0]] += 1
+        table[e[1]] += 1
+    return table
 
-    def degree(v):
-        '''
-        Returns the degree of a single vertex $v$ from our graph $G$.
-        '''
-        return len([e for e in G.edges if v in e])
 
-    return (degree(v) for v in G.vertices)
+def degrees(G):
+    '''
+    Returns a generator object that yields the degree of each vertex
+    of $G$, in no particular order.  An out-of-core graph (see
+    \code {graph.is_outOfCore}) finds them itself.
+    '''
+    if is_outOfCore(G):
+        return G.degrees()
+    table = degreeTable(G)
+    return (table[v] for v in G.vertices)
 
 
 def degreeSequence(G):
@@ -53,18 +70,39 @@ def degreeSequence(G):
     return reversed(sorted(degrees(G)))
 
 
+@memoized
+def degreeRange(G):
+    '''
+    Returns the pair \code {(minDegree(G), maxDegree(G))}, found in a
+    single scan of the degrees, or by $G$ itself if it is out of core
+    (see \code {graph.is_outOfCore}).
+    '''
+    if is_outOfCore(G):
+        return G.degreeRange()
+    table = degreeTable(G)
+    if not table:
+        raise ValueError("The null graph has no vertex degrees.")
+    low = high = None
+    for d in table.itervalues():
+        if low is None or d < low:
+            low = d
+        if high is None or d > high:
+            high = d
+    return low, high
+
+
 def minDegree(G):
     '''
     Returns the smallest degree of any vertex in the vertex set of $G$.
     '''
-    return min(degrees(G))
+    return degreeRange(G)[0]
 
 
 def maxDegree(G):
     '''
     Returns the largest degree of any vertex in the vertex set of $G$.
     '''
-    return max(degrees(G))
+    return degreeRange(G)[1]
 
 
 def is_regular(G):
@@ -72,28 +110,81 @@ def is_regular(G):
     Returns True if and only if every vertex of $G$ has the same degree,
     otherwise returns False.
     '''
-    return minDegree(G) == maxDegree(G)
+    low, high = degreeRange(G)
+    return low == high
 
 
+@memoized
 def is_connected(G):
     '''
     Returns True if and only if $G$ is connected, otherwise returns False.
-    '''
+    A directed graph is taken to be connected if it is weakly connected.
+    If $G$ has a connectivity tracker (see \code {G.trackConnectivity}),
+    it is asked instead.
+    '''
+    if getattr(G, 'tracker', None) is not None:
+        return G.tracker.is_connected()
+    if is_directed(G):
+        return is_weaklyConnected(G)
     return len(list(DFS(G))) == order(G)
 
 
+@memoized
+def is_weaklyConnected(G):
+    '''
+    Returns True if every vertex of $G$ can be reached from every other
+    when the directions of the edges are ignored, otherwise False.
+    '''
+    vertices, successors, predecessors = inOutLists(G)
+    if not vertices:
+        return True
+    seen = set([0])
+    stack = [0]
+    while stack:
+        v = stack.pop()
+        for following in (successors[v], predecessors[v]):
+            for w in following:
+                if w not in seen:
+                    seen.add(w)
+                    stack.append(w)
+    return len(seen) == len(vertices)
+
+
+@memoized
+def is_stronglyConnected(G):
+    '''
+    Returns True if every vertex of $G$ can be reached from every other
+    along directed paths, otherwise False.
+    '''
+    vertices, successors, predecessors = inOutLists(G)
+    return len(componentsOfLists(successors)) <= 1
+
+
+@memoized
+def is_acyclic(G):
+    '''
+    Returns True if $G$ has no cycle -- for a directed graph, no directed
+    cycle, so that it can be sorted topologically -- otherwise False.
+    '''
+    if is_directed(G):
+        vertices, successors, predecessors = inOutLists(G)
+        return topologicalOrderOfLists(successors, predecessors) is not None
+    return size(G) == order(G) - numberOfComponents(G)
+
+
 def is_tree(G):
     '''
     Returns True if and only if $G$ is a tree, otherwise returns False.
     '''
-    return is_connected(G) and size(G) == order(G) - 1
+    return size(G) == order(G) - 1 and is_connected(G)
 
 
+@memoized
 def is_bipartite(G):
     '''
     Returns True if $G$ is bipartite, otherwise returns False.
     '''
-    return NotImplemented
+    return bipartition(G) is not None
 
 
 def is_triangleFree(G):
@@ -116,10 +207,25 @@ def is_triangleFree(G):
     # the same vertex.  Thus, we see that $G$ is triangle-free if and
     # only if $\trace (A^3) = 0$, where $A$ is the adjacency matrix of $G$.
 
+    triangles = memoizedValue(G, numberOfTriangles)
+    if triangles is not None:
+        return triangles == 0
+    if hasattr(G, 'adjacencyBitsets') and not is_directed(G):
+        return bitsetTriangleFree(adjacencyBitsets(G))
+    return cubeTrace(G) == 0
+
+
+@memoized
+def cubeTrace(G):
+    '''
+    Returns the trace of $A^3$, where $A$ is the adjacency matrix of $G$.
+    '''
     A = adjacencyMatrix(G)
-    return (A**3).trace() == 0
+    return (A**3).trace()
 
 
+@memoized
+@isomorphismCached
 def numberOfTriangles(G):
     '''
     Returns the number of triangles in $G$ by using the fact that the $(i,i)$
@@ -129,17 +235,95 @@ def numberOfTriangles(G):
     get the total number of triangles in the whole graph, we must note that if
     three vertices $v_1, v_2, v_3$ form a triangle, the trace counts this
     six times.  So, we correct for this by dividing by $6$.
+
+    A graph that keeps its own bit-packed adjacency matrix (such as a
+    \code {graph.BitsetGraph}) has its triangles counted by
+    \code {bitsetTriangles} instead.
     '''
+    if hasattr(G, 'adjacencyBitsets') and not is_directed(G):
+        return bitsetTriangles(adjacencyBitsets(G))
+    return cubeTrace(G) / 6
 
-    A = adjacencyMatrix(G)
-    return (A**3).trace() / 6
+
+def bitsetTriangles(rows):
+    '''
+    Returns the number of triangles of the undirected graph whose
+    bit-packed adjacency matrix is \code {rows}.  Each triangle $ijk$ with
+    $i < j < k$ is counted once, as a common neighbor $k$ of the edge $ij$
+    beyond $j$: a single \emph {and} of rows $i$ and $j$, and a count of
+    its bits.
+    '''
+    count = 0
+    for (i, row) in enumerate(rows):
+        later = row >> (i + 1)
+        while later:
+            low = later & -later
+            j = i + low.bit_length()
+            count += bitCount((row & rows[j]) >> (j + 1))
+            later ^= low
+    return count
+
+
+def bitsetTriangleFree(rows):
+    '''
+    Returns True if the undirected graph whose bit-packed adjacency matrix
+    is \code {rows} has no triangle, stopping at the first edge whose ends
+    have a common neighbor.
+    '''
+    for (i, row) in enumerate(rows):
+        later = row >> (i + 1)
+        while later:
+            low = later & -later
+            if row & rows[i + low.bit_length()]:
+                return False
+            later ^= low
+    return True
+
+
+def undirectedBitsets(G):
+    '''
+    Returns the bit-packed adjacency matrix of the underlying simple
+    undirected graph of $G$: the directions of edges are ignored and
+    loops are dropped.
+    '''
+    rows = adjacencyBitsets(G)
+    if is_directed(G):
+        original, rows = rows, list(rows)
+        for (i, row) in enumerate(original):
+            while row:
+                low = row & -row
+                rows[low.bit_length() - 1] |= 1 << i
+                row ^= low
+    return [row & ~(1 << i) for (i, row) in enumerate(rows)]
+
+
+@memoized
+@isomorphismCached
+def cliqueNumber(G):
+    '''
+    Returns the clique number of $G$, the largest number of pairwise
+    adjacent vertices, found by \code {algorithms.bitsetMaximumClique}.
+    '''
+    return len(bitsetMaximumClique(undirectedBitsets(G)))
+
+
+@memoized
+@isomorphismCached
+def degeneracy(G):
+    '''
+    Returns the degeneracy of $G$, the least $k$ such that every subgraph
+    of $G$ has a vertex of degree at most $k$, which is the largest core
+    number of a vertex (see \code {algorithms.coreNumbers}).
+    '''
+    return max(coreNumbers(G).values() or [0])
 
 
 def is_complete(G):
     '''
     Returns True if $G$ is a complete graph, otherwise False.
     '''
-    return size(G) == binomial(order(G), 2)
+    n = order(G)
+    return size(G) == n * (n - 1) / 2
 
 
 def is_empty(G):
@@ -149,6 +333,8 @@ def is_empty(G):
     return size(G) == 0
 
 
+@memoized
+@isomorphismCached
 def eigenvalues(G):
     '''
     Returns the eigenvalues of the adjacency matrix of $G$.
@@ -165,13 +351,46 @@ def eigenvalues(G):
     return dict([(int(k), eigenvals[k]) for k in eigenvals.keys()])
 
 
+@memoized
+@isomorphismCached
 def laplacianEigenvalues(G):
     '''
-    Returns the eigenvalues of the Laplacian matrix of $G$.
+    Returns the eigenvalues of the Laplacian matrix of $G$, as a dict
+    mapping each to its multiplicity, exactly.  Directions of edges and
+    loops are ignored.  This uses dense \code {sympy} matrices, so for
+    large graphs use \code {spectral.smallestLaplacianEigenvalues}.
     '''
-    return NotImplemented
+    import sympy
+    L = sympy.Matrix([[int(x) for x in row]
+                      for row in laplacian(G).toLists()])
+    eigenvals = L.eigenvals()
+
+    # As in \code {eigenvalues}, integer eigenvalues are made ordinary
+    # integers; the others are left as exact \code {sympy} numbers.
+
+    return dict([(int(k) if k.is_integer else k, eigenvals[k])
+                 for k in eigenvals.keys()])
 
 
+@memoized
+@isomorphismCached
+def algebraicConnectivity(G):
+    '''
+    Returns the algebraic connectivity of $G$: the second smallest
+    eigenvalue of its Laplacian matrix, which is positive if and only if
+    $G$ is connected, and is a lower bound for its vertex connectivity
+    unless $G$ is complete (Fiedler, 1973).  It is found numerically by
+    \code {spectral.smallestLaplacianEigenvalues}, so it works on large
+    graphs; graphs with fewer than two vertices have algebraic
+    connectivity $0$.
+    '''
+    if len(G.vertices) < 2:
+        return 0.0
+    return smallestLaplacianEigenvalues(G, 2)[1]
+
+
+@memoized
+@isomorphismCached
 def vertexConnectivity(G):
     '''
     Returns the vertex connectivity of $G$ -- the minimum number of vertices
@@ -180,6 +399,8 @@ def vertexConnectivity(G):
     return NotImplemented
 
 
+@memoized
+@isomorphismCached
 def edgeConnectivity(G):
     '''
     Returns the edge connectivity of $G$ -- the minimum number of edges
@@ -205,30 +426,54 @@ def radius(G):
     return NotImplemented
 
 
+@memoized
+@isomorphismCached
 def chromaticNumber(G):
     '''
     Returns the chromatic number of $G$, the minimum number of colors needed
     to color the vertices of $G$ such that no two vertices with the same
-    color are adjacent.
+    color are adjacent, found by \code {coloring.vertexColoring}.
     '''
-    return NotImplemented
+    colors = vertexColoring(G)
+    if not colors:
+        return 0
+    return max(colors.values()) + 1
 
 
+@memoized
+@isomorphismCached
 def edgeChromaticNumber(G):
     '''
     Returns the edge chromatic number of $G$, the minimum number of colors
     need to color the edges of $G$ such that no two edges with the same color
-    are adjacent.
+    are adjacent, found by \code {coloring.edgeColoring}, which raises
+    \code {ValueError} if a large graph cannot be settled without an
+    exhaustive search.
     '''
-    return NotImplemented
+    colors = edgeColoring(G)
+    if not colors:
+        return 0
+    return max(colors) + 1
+
+
+@memoized
+@isomorphismCached
+def matchingNumber(G):
+    '''
+    Returns the matching number of $G$, the largest number of edges no two
+    of which share an end, found by \code {matching.maximumMatching}.
+    '''
+    return len(maximumMatching(G))
 
 
+@memoized
+@isomorphismCached
 def independenceNumber(G):
     '''
     Returns the independence number of $G$, the size of a maximum independent
-    set in $G$.
+    set in $G$, which is the clique number of the complement of $G$.
     '''
-    return NotImplemented
+    return len(bitsetMaximumClique(complementBitsets(undirectedBitsets(G))))
 
 
 def is_eulerian(G):
@@ -239,6 +484,8 @@ def is_eulerian(G):
     return NotImplemented
 
 
+@memoized
+@isomorphismCached
 def is_hamiltonian(G):
     '''
     Returns True if $G$ has a hamiltonian (spanning) cycle, otherwise returns False.
@@ -248,9 +495,26 @@ def is_hamiltonian(G):
 
 def is_selfComplementary(G):
     '''
+    Returns True if $G$ is isomorphic to its complement, otherwise False.
     See West, p. 17., exercise 1.1.31.
     '''
-    return NotImplemented
+    # $G$ and its complement have the same size only if $G$ has half of
+    # the ${n \choose 2}$ possible edges, which rules out most graphs at
+    # once.  Otherwise we compare canonical forms.
+
+    n = order(G)
+    if 4 * size(G) != n * (n - 1):
+        return False
+
+    def lists(rows):
+        '''
+        Converts a bit-packed adjacency matrix into adjacency lists.
+        '''
+        return [[j for j in xrange(n) if row >> j & 1] for row in rows]
+
+    rows = adjacencyBitsets(G)
+    return canonicalFormOfLists(lists(rows)) == \
+        canonicalFormOfLists(lists(complementBitsets(rows)))
 
 
 def girth(G):
@@ -259,3 +523,149 @@ def girth(G):
     cycle in $G$.
     '''
     return NotImplemented
+
+
+@memoized
+def numberOfComponents(G):
+    '''
+    Returns the number of components of $G$, ignoring the directions of
+    any edges.
+    '''
+    if getattr(G, 'tracker', None) is not None:
+        return G.tracker.numberOfComponents()
+    return report(G, ['numberOfComponents'])['numberOfComponents']
+
+
+# The invariants that \code {report} knows how to compute, in the order in
+# which they appear in its result.
+
+reportable = ['order', 'size', 'degreeSequence', 'minDegree', 'maxDegree',
+              'is_regular', 'is_empty', 'is_complete', 'numberOfComponents',
+              'is_connected', 'is_tree', 'numberOfTriangles',
+              'is_triangleFree']
+
+# The invariants in \code {report} that need a traversal of the graph, and
+# those that need the triangle pass.
+
+traversalInvariants = set(['numberOfComponents', 'is_connected', 'is_tree'])
+triangleInvariants = set(['numberOfTriangles', 'is_triangleFree'])
+
+
+def scanEdges(G):
+    '''
+    Makes a single pass over the edges of $G$, returning the list of
+    degrees of \code {G.vertices} and the list of sets of (positions of)
+    neighbors of each vertex, ignoring the direction of any edges.
+    '''
+    index = dict((v, i) for (i, v) in enumerate(G.vertices))
+    degree = [0] * len(index)
+    neighbors = [set() for v in G.vertices]
+    for e in G.edges:
+        i = index[e[0]]
+        j = index[e[1]]
+        degree[i] += 1
+        degree[j] += 1
+        neighbors[i].add(j)
+        neighbors[j].add(i)
+    return degree, neighbors
+
+
+def componentCount(neighbors):
+    '''
+    Returns the number of components of the graph with adjacency sets
+    \code {neighbors}, found by a single traversal.
+    '''
+    seen = [False] * len(neighbors)
+    count = 0
+    for start in xrange(len(neighbors)):
+        if seen[start]:
+            continue
+        count += 1
+        seen[start] = True
+        stack = [start]
+        while stack:
+            for w in neighbors[stack.pop()]:
+                if not seen[w]:
+                    seen[w] = True
+                    stack.append(w)
+    return count
+
+
+def triangleCount(degree, neighbors):
+    '''
+    Returns the number of triangles of the graph with adjacency sets
+    \code {neighbors}.  Each edge is directed from its endpoint of lower
+    degree to the other (ties broken by position), so that every triangle
+    is counted exactly once, at its edge between the two lowest vertices,
+    as a common out-neighbor of both.  This takes
+    $\mathcal{O}(m^{3/2})$ time.
+    '''
+    rank = sorted(xrange(len(neighbors)), key=lambda v: (degree[v], v))
+    position = [0] * len(rank)
+    for (i, v) in enumerate(rank):
+        position[v] = i
+    forward = [set([w for w in ws if position[w] > position[v]])
+               for (v, ws) in enumerate(neighbors)]
+    count = 0
+    for (v, ws) in enumerate(forward):
+        for w in ws:
+            count += len(ws & forward[w])
+    return count
+
+
+def report(G, which=None):
+    '''
+    Returns a dict mapping the name of each invariant in \code {which}
+    (by default, every name in \code {reportable}) to its value on $G$.
+
+    Computing these one at a time would take several passes over the
+    edges of $G$.  Instead, we plan the smallest set of shared passes the
+    requested invariants need: a single scan of the edges to find the
+    degrees and adjacency sets, then, only if needed, a single traversal
+    for the connectivity invariants and a single pass counting triangles.
+    The values found are also remembered with $G$ (see
+    \code {cache.memoized}), so later calls to the individual invariants
+    are free.  Edge directions are ignored, and the degree invariants
+    are left out for the graph with no vertices.
+    '''
+    if which is None:
+        which = reportable
+    unknown = [name for name in which if name not in reportable]
+    if unknown:
+        raise ValueError("Cannot report %(names)s." %
+                         {'names': ', '.join(unknown)})
+    which = set(which)
+
+    n = order(G)
+    m = size(G)
+    result = {'order': n, 'size': m, 'is_empty': m == 0,
+              'is_complete': m == n * (n - 1) / 2}
+
+    degree, neighbors = scanEdges(G)
+    result['degreeSequence'] = sorted(degree, reverse=True)
+    if degree:
+        result['minDegree'] = min(degree)
+        result['maxDegree'] = max(degree)
+        result['is_regular'] = result['minDegree'] == result['maxDegree']
+
+    if which & traversalInvariants:
+        components = componentCount(neighbors)
+        result['numberOfComponents'] = components
+        result['is_connected'] = components <= 1
+        result['is_tree'] = components <= 1 and m == n - 1
+
+    if which & triangleInvariants:
+        triangles = triangleCount(degree, neighbors)
+        result['numberOfTriangles'] = triangles
+        result['is_triangleFree'] = triangles == 0
+
+    if hasattr(G, 'memo') and not is_directed(G):
+        memo = G.memo()
+        for name in ['is_connected', 'numberOfTriangles']:
+            if name in result:
+                memo[(name, ())] = result[name]
+        if degree:
+            memo[('degreeRange', ())] = (result['minDegree'],
+                                         result['maxDegree'])
+
+    return dict((name, result[name]) for name in which if name in result)
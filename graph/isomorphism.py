@@ -0,0 +1,255 @@
+'''
+The \code{isomorphism} module implements canonical labeling of graphs.  A
+\emph {canonical form} of $G$ is a graph isomorphic to $G$ that depends
+only on the isomorphism class of $G$, so two graphs are isomorphic if and
+only if their canonical forms are equal.  We compute canonical forms by
+color refinement followed by an individualization--refinement search, in
+the style of McKay's \code {nauty}.
+'''
+
+import hashlib
+
+import graph
+
+
+def integerNeighbors(G):
+    '''
+    Returns the list \code {neighbors}, where \code {neighbors[i]} lists
+    the positions in \code {G.vertices} of the vertices adjacent to
+    \code {G.vertices[i]}.
+    '''
+    index = dict((v, i) for (i, v) in enumerate(G.vertices))
+    adjacencies = graph.adjacencyLists(G)
+    return [[index[w] for w in adjacencies[v]] for v in G.vertices]
+
+
+def refinementRound(neighbors, colors):
+    '''
+    Performs one round of color refinement.  Each vertex is recolored by
+    its old color together with the sorted list of its neighbors' colors,
+    and the new colors are numbered in sorted order of these signatures,
+    so that the result does not depend on how the vertices happen to be
+    numbered.  Returns the new coloring and the sorted list of distinct
+    signatures.  A round costs $\mathcal{O}((n + m) \log n)$.
+    '''
+    signatures = [(colors[v], tuple(sorted([colors[w] for w in ws])))
+                  for (v, ws) in enumerate(neighbors)]
+    ordered = sorted(set(signatures))
+    ranks = dict((s, i) for (i, s) in enumerate(ordered))
+    return [ranks[s] for s in signatures], ordered
+
+
+def refine(neighbors, colors):
+    '''
+    Returns the coarsest equitable refinement of the vertex coloring
+    \code {colors} (a list of integers), in which any two vertices of the
+    same color have the same number of neighbors of each color.
+    '''
+    count = len(set(colors))
+    while True:
+        colors, ordered = refinementRound(neighbors, colors)
+        if len(ordered) == count:
+            return colors
+        count = len(ordered)
+
+
+def weisfeilerLehmanHash(G, rounds=None):
+    '''
+    Returns a hexadecimal fingerprint of $G$ computed by the
+    one-dimensional Weisfeiler--Lehman algorithm: starting from the
+    coloring by degree, we run rounds of color refinement (at most
+    \code {rounds} of them, if given, otherwise until the coloring is
+    stable) and digest the signatures and color class sizes seen in each
+    round.  Isomorphic graphs always get the same fingerprint; graphs with
+    the same fingerprint are very often, but not always, isomorphic.
+    '''
+    neighbors = integerNeighbors(G)
+    colors = [len(ws) for ws in neighbors]
+    digest = hashlib.sha1(repr((len(colors), graph.is_directed(G),
+                                sorted(colors))))
+    count = len(set(colors))
+    while rounds is None or rounds > 0:
+        colors, ordered = refinementRound(neighbors, colors)
+        sizes = [0] * len(ordered)
+        for c in colors:
+            sizes[c] += 1
+        digest.update(repr((ordered, sizes)))
+        if len(ordered) == count:
+            break
+        count = len(ordered)
+        if rounds is not None:
+            rounds -= 1
+    return digest.hexdigest()
+
+
+def individualize(colors, v):
+    '''
+    Returns a copy of \code {colors} in which $v$ is given a color of its
+    own, placed just before the rest of its old color class.
+    '''
+    c = colors[v]
+    return [2 * x + (x == c and u != v) for (u, x) in enumerate(colors)]
+
+
+def targetCell(colors):
+    '''
+    Returns the vertices of the first color class with more than one
+    vertex, or the empty list if the coloring is discrete.
+    '''
+    classes = {}
+    for (v, c) in enumerate(colors):
+        classes.setdefault(c, []).append(v)
+    for c in sorted(classes):
+        if len(classes[c]) > 1:
+            return classes[c]
+    return []
+
+
+def relabeledEdges(neighbors, colors, directed):
+    '''
+    Returns the sorted tuple of edges of the graph obtained by renaming
+    each vertex $v$ to \code {colors[v]}, where \code {colors} is discrete.
+    '''
+    edges = []
+    for (v, ws) in enumerate(neighbors):
+        for w in ws:
+            if directed or v < w:
+                i, j = colors[v], colors[w]
+                if not directed and j < i:
+                    i, j = j, i
+                edges.append((i, j))
+    edges.sort()
+    return tuple(edges)
+
+
+def closeOrbit(generators, reached, vertices):
+    '''
+    Adds to the set \code {reached} every vertex reachable from
+    \code {vertices} by repeatedly applying the permutations in
+    \code {generators} (given as lists).
+    '''
+    stack = list(vertices)
+    reached.update(stack)
+    while stack:
+        v = stack.pop()
+        for g in generators:
+            w = g[v]
+            if w not in reached:
+                reached.add(w)
+                stack.append(w)
+
+
+def canonicalSearch(neighbors, directed):
+    '''
+    Returns the pair \code {(form, colors)}, where \code {form} is the
+    canonical form of the graph with adjacency lists \code {neighbors} and
+    \code {colors} is the discrete coloring (\textit {i.e.\} relabeling)
+    that produces it.  Whenever refinement leaves a color class with more
+    than one vertex, we try individualizing each vertex of the first such
+    class in turn, and keep the least form found at the leaves of the
+    search tree.
+
+    Two leaves with the same form give an automorphism of the graph.  We
+    use the automorphisms found so far to skip any child of a search node
+    that an automorphism fixing the node maps onto a child we have already
+    explored, since its subtree can only repeat forms we have seen.
+    '''
+    best = {'form': None, 'colors': None, 'inverse': None}
+    automorphisms = []
+
+    def leaf(colors):
+        '''
+        Compares the relabeling \code {colors} with the best one so far.
+        '''
+        form = relabeledEdges(neighbors, colors, directed)
+        if best['form'] is None or form < best['form']:
+            inverse = [0] * len(colors)
+            for (v, c) in enumerate(colors):
+                inverse[c] = v
+            best.update(form=form, colors=colors, inverse=inverse)
+        elif form == best['form']:
+            inverse = best['inverse']
+            automorphisms.append([inverse[c] for c in colors])
+
+    def search(colors, prefix):
+        '''
+        Explores the subtree of the search below the coloring
+        \code {colors}, obtained by individualizing the vertices in
+        \code {prefix}.
+        '''
+        colors = refine(neighbors, colors)
+        cell = targetCell(colors)
+        if not cell:
+            leaf(colors)
+            return
+
+        # \code {orbit} holds the children we have explored, closed
+        # under the automorphisms found so far that fix \code {prefix}.
+
+        useful = []
+        known = 0
+        orbit = set()
+        for v in cell:
+            if len(automorphisms) > known:
+                useful.extend([g for g in automorphisms[known:]
+                               if all(g[u] == u for u in prefix)])
+                known = len(automorphisms)
+                closeOrbit(useful, orbit, list(orbit))
+            if v in orbit:
+                continue
+            closeOrbit(useful, orbit, [v])
+            search(individualize(colors, v), prefix + [v])
+
+    search([len(ws) for ws in neighbors], [])
+    return best['form'], best['colors']
+
+
+def canonicalLabeling(G):
+    '''
+    Returns a dict mapping each vertex of $G$ to an integer in
+    $\{0, 1, \dots, n - 1\}$, such that renaming the vertices of $G$
+    accordingly yields the canonical form of $G$.
+    '''
+    if not G.vertices:
+        return {}
+    colors = canonicalSearch(integerNeighbors(G), graph.is_directed(G))[1]
+    return dict((v, colors[i]) for (i, v) in enumerate(G.vertices))
+
+
+def canonicalFormOfLists(neighbors, directed=False):
+    '''
+    Returns the canonical form of the graph whose vertices are
+    $0, 1, \dots, n - 1$ and in which \code {neighbors[i]} lists the
+    vertices adjacent to $i$.  See \code {canonicalForm}.
+    '''
+    if not neighbors:
+        return (0, directed, ())
+    return (len(neighbors), directed, canonicalSearch(neighbors, directed)[0])
+
+
+def canonicalForm(G):
+    '''
+    Returns the canonical form of $G$, as a tuple \code {(n, directed,
+    edges)} where \code {edges} is a sorted tuple of pairs of integers in
+    $\{0, 1, \dots, n - 1\}$.  Graphs $G$ and $H$ are isomorphic if and
+    only if \code {canonicalForm(G) == canonicalForm(H)}.
+    '''
+    return canonicalFormOfLists(integerNeighbors(G), graph.is_directed(G))
+
+
+def canonicalHash(G):
+    '''
+    Returns a hexadecimal digest of the canonical form of $G$, which is
+    the same for isomorphic graphs and (with overwhelming probability)
+    different for non-isomorphic ones.
+    '''
+    return hashlib.sha1(repr(canonicalForm(G))).hexdigest()
+
+
+def is_isomorphic(G, H):
+    '''
+    Returns True if $G$ and $H$ are isomorphic, otherwise False.
+    '''
+    if len(G.vertices) != len(H.vertices) or len(G.edges) != len(H.edges):
+        return False
+    return canonicalForm(G) == canonicalForm(H)
@@ -0,0 +1,370 @@
+'''
+The \code{mapped} module stores graphs in a binary file format that can be
+loaded by memory-mapping the file, with no parsing and no copying.  Many
+processes can then share one copy of a large graph through the operating
+system's page cache, and loading takes the same time whatever the size of
+the graph.
+
+A file consists of a fixed header followed by sections of little-endian
+64-bit integers (or floats), each starting at a multiple of $8$ bytes:
+\begin{enumerate}
+    \item the CSR offsets: $n + 1$ integers, where the neighbors of vertex
+    $i$ are entries \code {offsets[i]} up to \code {offsets[i + 1]} of
+    \item the CSR targets, listing the (positions of the) neighbors of each
+    vertex in turn, both ends of an undirected edge appearing;
+    \item the edge sources and edge targets: $m$ integers each, giving the
+    ends of each edge in the order of \code {G.edges};
+    \item optionally, $m$ edge weights, as doubles; and
+    \item optionally, the table of vertex names, pickled.  If it is
+    missing, the vertices are $0, 1, \dots, n - 1$.
+\end{enumerate}
+'''
+
+import mmap
+import struct
+import cPickle as pickle
+
+import graph
+
+MAGIC = 'GRAPHBIN'
+FORMAT_VERSION = 1
+
+# The header holds the magic string, the format version, the flags, $n$,
+# $m$, and the offset and length in bytes of each of the six sections.
+
+HEADER = struct.Struct('<8sII' + 'QQ' + 'QQ' * 6)
+
+DIRECTED = 1
+WEIGHTED = 2
+LABELED = 4
+
+INT64 = struct.Struct('<q')
+DOUBLE = struct.Struct('<d')
+
+# The number of values packed by each call to \code {struct.pack} when
+# writing a section.
+
+CHUNK_VALUES = 65536
+
+
+def writeValues(f, code, values):
+    '''
+    Writes the sequence \code {values} to \code {f} as little-endian values
+    of the \code {struct} type \code {code}, returning the number of bytes
+    written.
+    '''
+    written = 0
+    for start in xrange(0, len(values), CHUNK_VALUES):
+        chunk = values[start:start + CHUNK_VALUES]
+        f.write(struct.pack('<%d%s' % (len(chunk), code), *chunk))
+        written += 8 * len(chunk)
+    return written
+
+
+def writeBinary(G, filename, weights=None):
+    '''
+    Writes $G$ to the file \code {filename} in the binary format described
+    above, for loading with \code {loadBinary}.  If \code {weights} is
+    given, it is a sequence of numbers, one for each edge in
+    \code {G.edges}, which is stored with the graph; by default, the
+    \code {'weight'} column of \code {G.edgeData} is stored, if there is
+    one.
+    '''
+    vertices = list(G.vertices)
+    n = len(vertices)
+    m = len(G.edges)
+    directed = graph.is_directed(G)
+    data = getattr(G, 'edgeData', None)
+    if weights is None and data is not None and 'weight' in data:
+        weights = data['weight']
+    if weights is not None and len(weights) != m:
+        raise ValueError("There must be exactly one weight per edge.")
+
+    index = dict((v, i) for (i, v) in enumerate(vertices))
+    sources = [index[e[0]] for e in G.edges]
+    targets = [index[e[1]] for e in G.edges]
+
+    offsets = [0] * (n + 1)
+    for i in sources:
+        offsets[i + 1] += 1
+    if not directed:
+        for j in targets:
+            offsets[j + 1] += 1
+    for i in xrange(n):
+        offsets[i + 1] += offsets[i]
+    position = offsets[:-1]
+    adjacent = [0] * offsets[n]
+    for (i, j) in zip(sources, targets):
+        adjacent[position[i]] = j
+        position[i] += 1
+        if not directed:
+            adjacent[position[j]] = i
+            position[j] += 1
+    del position
+
+    flags = 0
+    if directed:
+        flags |= DIRECTED
+    if weights is not None:
+        flags |= WEIGHTED
+    labels = ''
+    if vertices != range(n):
+        flags |= LABELED
+        labels = pickle.dumps(vertices, pickle.HIGHEST_PROTOCOL)
+
+    f = open(filename, 'wb')
+    try:
+        f.write('\0' * HEADER.size)
+        sections = []
+        for (code, values) in [('q', offsets), ('q', adjacent),
+                               ('q', sources), ('q', targets),
+                               ('d', weights or [])]:
+            sections.append((f.tell(), writeValues(f, code, values)))
+        f.write(labels)
+        sections.append((f.tell() - len(labels), len(labels)))
+        fields = [MAGIC, FORMAT_VERSION, flags, n, m]
+        for section in sections:
+            fields.extend(section)
+        f.seek(0)
+        f.write(HEADER.pack(*fields))
+    finally:
+        f.close()
+
+
+class MappedArray(object):
+    '''
+    This object is a read-only sequence of $8$-byte values stored in a
+    memory map, decoding each value only when it is asked for.
+    '''
+
+    def __init__(self, buffer, offset, length, code='q'):
+        self.__buffer = buffer
+        self.__offset = offset
+        self.__length = length
+        self.__code = code
+        self.__value = {'q': INT64, 'd': DOUBLE}[code]
+
+    def __len__(self):
+        return self.__length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self.__length)
+            if step != 1:
+                return [self[j] for j in xrange(start, stop, step)]
+            return self.slice(start, stop)
+        if i < 0:
+            i += self.__length
+        if not 0 <= i < self.__length:
+            raise IndexError("Index out of range.")
+        return self.__value.unpack_from(self.__buffer,
+                                        self.__offset + 8 * i)[0]
+
+    def __iter__(self):
+        for start in xrange(0, self.__length, CHUNK_VALUES):
+            for value in self.slice(start, start + CHUNK_VALUES):
+                yield value
+
+    def slice(self, start, stop):
+        '''
+        Returns the tuple of values from position \code {start} up to
+        \code {stop}, decoded in a single call.
+        '''
+        stop = min(stop, self.__length)
+        if stop <= start:
+            return ()
+        return struct.unpack_from('<%d%s' % (stop - start, self.__code),
+                                  self.__buffer, self.__offset + 8 * start)
+
+
+class IdentityLabels(object):
+    '''
+    This object is the read-only sequence $0, 1, \dots, n - 1$ of vertex
+    names used when a file stores no names of its own.
+    '''
+
+    def __init__(self, n):
+        self.__n = n
+
+    def __len__(self):
+        return self.__n
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.__n
+        if not 0 <= i < self.__n:
+            raise IndexError("Index out of range.")
+        return i
+
+    def __iter__(self):
+        return iter(xrange(self.__n))
+
+    def __contains__(self, v):
+        return isinstance(v, (int, long)) and 0 <= v < self.__n
+
+    def index(self, v):
+        '''
+        Returns the position of the vertex $v$.
+        '''
+        if v not in self:
+            raise ValueError("%r is not a vertex." % (v,))
+        return v
+
+
+class MappedEdges(object):
+    '''
+    This object is the read-only sequence of edges of a
+    \code {MappedGraph}, which makes an \code {Edge} object for an edge
+    only when it is asked for.
+    '''
+
+    def __init__(self, G):
+        self.__graph = G
+
+    def __len__(self):
+        return self.__graph.size
+
+    def __getitem__(self, i):
+        G = self.__graph
+        if i < 0:
+            i += G.size
+        vertices = G.vertices
+        return graph.Edge(vertices[G.edgeSources[i]],
+                          vertices[G.edgeTargets[i]],
+                          directed=G.directed)
+
+    def __iter__(self):
+        G = self.__graph
+        vertices = G.vertices
+        directed = G.directed
+        sources = G.edgeSources
+        targets = G.edgeTargets
+        for start in xrange(0, len(sources), CHUNK_VALUES):
+            stop = start + CHUNK_VALUES
+            for (i, j) in zip(sources.slice(start, stop),
+                              targets.slice(start, stop)):
+                yield graph.Edge(vertices[i], vertices[j], directed=directed)
+
+
+class MappedGraph(object):
+    '''
+    This object is a read-only graph backed by a memory-mapped file
+    written by \code {writeBinary}.  It provides \code {vertices} and
+    \code {edges} sequences like a \code {Graph}, so the functions of this
+    package accept it, and also answers neighborhood queries straight from
+    the CSR arrays in the file.
+    '''
+
+    def __init__(self, filename):
+        f = open(filename, 'rb')
+        try:
+            self.__buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        fields = HEADER.unpack_from(self.__buffer, 0)
+        if fields[0] != MAGIC:
+            raise ValueError("%s is not a binary graph file." % filename)
+        if fields[1] != FORMAT_VERSION:
+            raise ValueError("%s has unsupported format version %d."
+                             % (filename, fields[1]))
+        flags, n, m = fields[2:5]
+        sections = [fields[5 + 2 * k:7 + 2 * k] for k in xrange(6)]
+
+        self.directed = bool(flags & DIRECTED)
+        self.order = n
+        self.size = m
+        buffer = self.__buffer
+        self.offsets = MappedArray(buffer, sections[0][0], n + 1)
+        self.adjacent = MappedArray(buffer, sections[1][0],
+                                    sections[1][1] / 8)
+        self.edgeSources = MappedArray(buffer, sections[2][0], m)
+        self.edgeTargets = MappedArray(buffer, sections[3][0], m)
+        self.weights = None
+        if flags & WEIGHTED:
+            self.weights = MappedArray(buffer, sections[4][0], m, 'd')
+        self.__labels = None
+        self.__labelSection = sections[5] if flags & LABELED else None
+        self.__index = None
+        self.__memo = {}
+        self.__edges = MappedEdges(self)
+
+    @property
+    def vertices(self):
+        '''
+        The sequence of vertices, read from the file on first use.
+        '''
+        if self.__labels is None:
+            if self.__labelSection is None:
+                self.__labels = IdentityLabels(self.order)
+            else:
+                start, length = self.__labelSection
+                self.__labels = pickle.loads(
+                    self.__buffer[start:start + length])
+        return self.__labels
+
+    @property
+    def edges(self):
+        '''
+        The sequence of edges.
+        '''
+        return self.__edges
+
+    def position(self, v):
+        '''
+        Returns the position of the vertex $v$ in \code {vertices}.
+        '''
+        if self.__labelSection is None:
+            return self.vertices.index(v)
+        if self.__index is None:
+            self.__index = dict((u, i) for (i, u) in enumerate(self.vertices))
+        return self.__index[v]
+
+    def degree(self, v):
+        '''
+        Returns the number of neighbors of the vertex $v$.
+        '''
+        i = self.position(v)
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def neighbors(self, v):
+        '''
+        Returns the list of vertices adjacent to (or, in a directed graph,
+        from) the vertex $v$.
+        '''
+        i = self.position(v)
+        vertices = self.vertices
+        return [vertices[j] for j in
+                self.adjacent.slice(self.offsets[i], self.offsets[i + 1])]
+
+    def adjacencyLists(self):
+        '''
+        Returns the adjacency lists of the graph, as
+        \code {graph.adjacencyLists} would.
+        '''
+        vertices = self.vertices
+        offsets = list(self.offsets)
+        adjacent = self.adjacent
+        return dict((v, [vertices[j] for j in
+                         adjacent.slice(offsets[i], offsets[i + 1])])
+                    for (i, v) in enumerate(vertices))
+
+    def memo(self):
+        '''
+        Returns the dict in which values computed from the graph are
+        remembered (see \code {graph.Graph.memo}).  A mapped graph never
+        changes, so they are kept for as long as the graph is.
+        '''
+        return self.__memo
+
+    def close(self):
+        '''
+        Releases the memory map.  The graph may not be used afterwards.
+        '''
+        self.__buffer.close()
+
+
+def loadBinary(filename):
+    '''
+    Returns the \code {MappedGraph} stored in the file \code {filename}.
+    '''
+    return MappedGraph(filename)
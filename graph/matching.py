@@ -0,0 +1,285 @@
+'''
+The \code{matching} module finds bipartitions and maximum matchings.  A
+\emph {matching} is a set of edges no two of which share an end; it is
+\emph {maximum} if no matching has more edges.
+
+In a bipartite graph, maximum matchings are found by the algorithm of
+Hopcroft and Karp, which augments along a maximal set of shortest
+augmenting paths at once, taking $\mathcal{O}(m \sqrt{n})$ time.  In a
+general graph, an augmenting path may run around an odd cycle, and the
+algorithm of Edmonds finds one by shrinking such cycles (\emph
+{blossoms}) to single vertices, in $\mathcal{O}(n^3)$ time.
+Directions of edges and loops are ignored throughout.
+'''
+
+import collections
+
+from algorithms import undirectedNeighborSets
+
+unmatched = -1
+
+
+def bipartitionOfLists(neighbors):
+    '''
+    Returns a list giving each vertex of the graph with adjacency lists
+    \code {neighbors} the side, $0$ or $1$, it is on in a bipartition of
+    the graph, or None if the graph has an odd cycle and so is not
+    bipartite.  The first vertex of each component is put on side $0$.
+    '''
+    side = [unmatched] * len(neighbors)
+    for root in xrange(len(neighbors)):
+        if side[root] != unmatched:
+            continue
+        side[root] = 0
+        queue = collections.deque([root])
+        while queue:
+            v = queue.popleft()
+            for w in neighbors[v]:
+                if side[w] == unmatched:
+                    side[w] = 1 - side[v]
+                    queue.append(w)
+                elif side[w] == side[v]:
+                    return None
+    return side
+
+
+def bipartition(G):
+    '''
+    Returns a pair of lists of vertices of $G$ such that every edge joins
+    a vertex of the first to a vertex of the second, or None if there is
+    no such pair, \textit {i.e.}\ if $G$ has an odd cycle.
+    '''
+    vertices, neighbors = undirectedNeighborSets(G)
+    side = bipartitionOfLists(neighbors)
+    if side is None:
+        return None
+    return ([v for (v, s) in zip(vertices, side) if s == 0],
+            [v for (v, s) in zip(vertices, side) if s == 1])
+
+
+def hopcroftKarpOfLists(adjacent, rightCount):
+    '''
+    Returns the list giving, for each vertex $u$ on the left of a
+    bipartite graph, the vertex on the right it is matched to in a
+    maximum matching, or \code {unmatched}.  The left vertices are
+    $0, 1, \dots, l - 1$, the right ones $0, 1, \dots, r - 1$ (where $r$
+    is \code {rightCount}), and \code {adjacent[u]} lists the right
+    neighbors of $u$.
+
+    Each phase finds, by a breadth-first search from the unmatched left
+    vertices, the length of the shortest augmenting paths, and then
+    augments along a maximal set of disjoint paths of that length, found
+    by depth-first searches through the layers.  There are
+    $\mathcal{O}(\sqrt{n})$ phases.
+    '''
+    leftCount = len(adjacent)
+    matchLeft = [unmatched] * leftCount
+    matchRight = [unmatched] * rightCount
+
+    # A greedy matching makes a good start.
+
+    for u in xrange(leftCount):
+        for w in adjacent[u]:
+            if matchRight[w] == unmatched:
+                matchLeft[u] = w
+                matchRight[w] = u
+                break
+
+    while True:
+        layer = [unmatched] * leftCount
+        queue = collections.deque()
+        for u in xrange(leftCount):
+            if matchLeft[u] == unmatched:
+                layer[u] = 0
+                queue.append(u)
+        limit = None
+        while queue:
+            u = queue.popleft()
+            if limit is not None and layer[u] >= limit:
+                continue
+            for w in adjacent[u]:
+                x = matchRight[w]
+                if x == unmatched:
+                    if limit is None:
+                        limit = layer[u]
+                elif layer[x] == unmatched:
+                    layer[x] = layer[u] + 1
+                    queue.append(x)
+        if limit is None:
+            return matchLeft
+
+        following = [0] * leftCount
+        for root in xrange(leftCount):
+            if matchLeft[root] != unmatched or layer[root] != 0:
+                continue
+            path = [root]
+            through = []
+            while path:
+                x = path[-1]
+                if following[x] == len(adjacent[x]):
+
+                    # No augmenting path goes on from $x$ in this phase.
+
+                    layer[x] = unmatched
+                    path.pop()
+                    if through:
+                        through.pop()
+                    continue
+                w = adjacent[x][following[x]]
+                following[x] += 1
+                y = matchRight[w]
+                if y == unmatched:
+                    if layer[x] == limit:
+                        through.append(w)
+                        for (u, v) in zip(path, through):
+                            matchLeft[u] = v
+                            matchRight[v] = u
+                        for u in path:
+                            layer[u] = unmatched
+                        break
+                elif layer[y] == layer[x] + 1:
+                    path.append(y)
+                    through.append(w)
+
+
+def bipartiteMatching(G, left=None):
+    '''
+    Returns a maximum matching of the bipartite graph $G$, as a list of
+    pairs of vertices, the first of each pair being in \code {left} (by
+    default, the first side of \code {bipartition(G)}).  Raises
+    \code {ValueError} if $G$ is not bipartite.
+    '''
+    vertices, neighbors = undirectedNeighborSets(G)
+    if left is None:
+        side = bipartitionOfLists(neighbors)
+        if side is None:
+            raise ValueError("The graph is not bipartite.")
+    else:
+        left = set(left)
+        side = [0 if v in left else 1 for v in vertices]
+        for (v, ws) in enumerate(neighbors):
+            if [w for w in ws if side[w] == side[v]]:
+                raise ValueError("The sides given are not a bipartition.")
+    lefts = [v for v in xrange(len(vertices)) if side[v] == 0]
+    rights = [v for v in xrange(len(vertices)) if side[v] == 1]
+    position = dict((v, i) for (i, v) in enumerate(rights))
+    adjacent = [[position[w] for w in neighbors[v]] for v in lefts]
+    matchLeft = hopcroftKarpOfLists(adjacent, len(rights))
+    return [(vertices[lefts[u]], vertices[rights[w]])
+            for (u, w) in enumerate(matchLeft) if w != unmatched]
+
+
+def maximumMatchingOfLists(neighbors):
+    '''
+    Returns the list giving, for each vertex of the graph with adjacency
+    lists \code {neighbors}, the vertex it is matched to in a maximum
+    matching, or \code {unmatched}, by the blossom algorithm of Edmonds.
+
+    From each unmatched vertex in turn, a breadth-first search grows a
+    tree of alternating paths.  An edge between two outer vertices of the
+    tree closes an odd cycle, which is contracted by giving all its
+    vertices the same \code {base}; an edge to an unmatched vertex outside
+    the tree gives an augmenting path, which is then followed back,
+    through \code {parent} and the matching, to the root.
+    '''
+    n = len(neighbors)
+    match = [unmatched] * n
+    for v in xrange(n):
+        if match[v] == unmatched:
+            for w in neighbors[v]:
+                if match[w] == unmatched:
+                    match[v] = w
+                    match[w] = v
+                    break
+
+    def commonBase(a, b, base, parent):
+        '''
+        Returns the base of the blossom closed by the edge $ab$: the first
+        base on the path from $a$ to the root that is also on the path
+        from $b$.
+        '''
+        onPath = [False] * n
+        while True:
+            a = base[a]
+            onPath[a] = True
+            if match[a] == unmatched:
+                break
+            a = parent[match[a]]
+        while True:
+            b = base[b]
+            if onPath[b]:
+                return b
+            b = parent[match[b]]
+
+    def markBlossom(v, b, child, base, parent, inBlossom):
+        '''
+        Marks the bases on the path from $v$ down to the base $b$ as in
+        the blossom, pointing the path back towards \code {child}.
+        '''
+        while base[v] != b:
+            inBlossom[base[v]] = inBlossom[base[match[v]]] = True
+            parent[v] = child
+            child = match[v]
+            v = parent[match[v]]
+
+    def augmentingPath(root):
+        '''
+        Returns the unmatched vertex at the end of an augmenting path from
+        \code {root}, or \code {unmatched} if there is none, together with
+        the list of parents along the paths.
+        '''
+        outer = [False] * n
+        parent = [unmatched] * n
+        base = range(n)
+        outer[root] = True
+        queue = collections.deque([root])
+        while queue:
+            v = queue.popleft()
+            for w in neighbors[v]:
+                if base[v] == base[w] or match[v] == w:
+                    continue
+                if w == root or (match[w] != unmatched and
+                                 parent[match[w]] != unmatched):
+                    b = commonBase(v, w, base, parent)
+                    inBlossom = [False] * n
+                    markBlossom(v, b, w, base, parent, inBlossom)
+                    markBlossom(w, b, v, base, parent, inBlossom)
+                    for u in xrange(n):
+                        if inBlossom[base[u]]:
+                            base[u] = b
+                            if not outer[u]:
+                                outer[u] = True
+                                queue.append(u)
+                elif parent[w] == unmatched:
+                    parent[w] = v
+                    if match[w] == unmatched:
+                        return w, parent
+                    outer[match[w]] = True
+                    queue.append(match[w])
+        return unmatched, parent
+
+    for root in xrange(n):
+        if match[root] != unmatched:
+            continue
+        v, parent = augmentingPath(root)
+        while v != unmatched:
+            u = parent[v]
+            following = match[u]
+            match[v] = u
+            match[u] = v
+            v = following
+    return match
+
+
+def maximumMatching(G):
+    '''
+    Returns a maximum matching of $G$, as a list of pairs of vertices.
+    Bipartite graphs are matched by \code {hopcroftKarpOfLists}, and other
+    graphs by \code {maximumMatchingOfLists}.
+    '''
+    vertices, neighbors = undirectedNeighborSets(G)
+    if bipartitionOfLists(neighbors) is not None:
+        return bipartiteMatching(G)
+    match = maximumMatchingOfLists(neighbors)
+    return [(vertices[v], vertices[w]) for (v, w) in enumerate(match)
+            if v < w]
@@ -8,13 +8,345 @@ try:
 except ImportError:
     from compatibility import product
 
+import multiprocessing
+from math import log
+
 from combinatorics import pairs
 
-from graph import Graph, Edge
+from graph import Graph, BitsetGraph, Edge, edgeKeys, is_directed
+from graph import adjacencyLists, adjacencyBitsets
 
 
-def graphPower(G, n):
-    return NotImplemented
+# The dense method of \code {graphPower} stores $n^2$ bits, so we only
+# consider it for graphs of at most this many vertices.
+
+DENSE_POWER_LIMIT = 10000
+
+
+def integerAdjacencyLists(G):
+    '''
+    Returns the adjacency lists of $G$ with each vertex replaced by its
+    position in \code {G.vertices}.
+    '''
+    index = dict((v, i) for (i, v) in enumerate(G.vertices))
+    adjacencies = adjacencyLists(G)
+    return [[index[w] for w in adjacencies[v]] for v in G.vertices]
+
+
+def boundedBFS(neighbors, source, depth):
+    '''
+    Returns the list of vertices other than \code {source} at distance
+    at most \code {depth} from it, where \code {neighbors[i]} lists the
+    vertices adjacent to vertex $i$.
+    '''
+    seen = set([source])
+    frontier = [source]
+    while depth and frontier:
+        depth -= 1
+        nextFrontier = []
+        for v in frontier:
+            for w in neighbors[v]:
+                if w not in seen:
+                    seen.add(w)
+                    nextFrontier.append(w)
+        frontier = nextFrontier
+    seen.discard(source)
+    return list(seen)
+
+
+# The worker processes of \code {sparsePower} receive the adjacency lists
+# once, when the pool starts, rather than with every task.
+
+workerNeighbors = None
+
+
+def initializePowerWorker(neighbors):
+    '''
+    Stores the adjacency lists in a worker process.
+    '''
+    global workerNeighbors
+    workerNeighbors = neighbors
+
+
+def powerWorker(task):
+    '''
+    Runs \code {boundedBFS} from each source in a block of vertices.
+    '''
+    start, stop, depth = task
+    return [boundedBFS(workerNeighbors, v, depth)
+            for v in xrange(start, stop)]
+
+
+def sparsePower(neighbors, k, processes=None):
+    '''
+    Returns a list whose $i$-th entry lists the vertices within distance
+    $k$ of vertex $i$, by a depth-bounded breadth-first search from each
+    vertex.  If \code {processes} is given, the searches are shared out
+    among that many worker processes.
+    '''
+    n = len(neighbors)
+    if not processes or processes < 2:
+        return [boundedBFS(neighbors, v, k) for v in xrange(n)]
+
+    block = max(1, n / (4 * processes))
+    tasks = [(start, min(n, start + block), k)
+             for start in xrange(0, n, block)]
+    pool = multiprocessing.Pool(processes, initializePowerWorker,
+                                (neighbors,))
+    try:
+        balls = []
+        for result in pool.imap(powerWorker, tasks):
+            balls.extend(result)
+    finally:
+        pool.close()
+        pool.join()
+    return balls
+
+
+def booleanProduct(X, Y):
+    '''
+    Returns the boolean product of the bit-packed matrices $X$ and $Y$
+    (see \code {graph.adjacencyBitsets}): row $i$ of the product is the
+    bitwise or of the rows $Y_j$ for which bit $j$ of $X_i$ is set.
+    '''
+    product = []
+    for x in X:
+        row = 0
+        while x:
+            low = x & -x
+            row |= Y[low.bit_length() - 1]
+            x ^= low
+        product.append(row)
+    return product
+
+
+def densePower(rows, k):
+    '''
+    Returns the bit-packed matrix whose row $i$ marks the vertices within
+    distance $k$ of vertex $i$ (including $i$ itself), computed as the
+    boolean power $(A + I)^k$ by repeated squaring.
+    '''
+    R = [row | (1 << i) for (i, row) in enumerate(rows)]
+    result = None
+    while k:
+        if k & 1:
+            result = R if result is None else booleanProduct(result, R)
+        k >>= 1
+        if k:
+            R = booleanProduct(R, R)
+    return result
+
+
+def choosePowerMethod(G, k):
+    '''
+    Returns \code {'dense'} or \code {'sparse'}, whichever method of
+    computing the $k$-th power of $G$ should be cheaper.  The bounded
+    searches cost about $n d$ steps for each vertex reached, where $d$ is
+    the average degree, while each boolean squaring costs about one
+    (word-parallel) row operation per vertex reached, so the dense
+    method wins once the graph is dense or the $k$-balls cover much of it.
+    '''
+    n = len(G.vertices)
+    if n < 2 or n > DENSE_POWER_LIMIT:
+        return 'sparse'
+    d = 2.0 * len(G.edges) / n
+    density = d / (n - 1)
+    k = min(k, n - 1)
+
+    # $d^k$ overflows a float for large $k$, so compare logarithms.
+
+    if density >= 0.1 or (d > log(k, 2) + 1 and
+                          k * log(d) >= log(n / 2.0)):
+        return 'dense'
+    return 'sparse'
+
+
+def graphPower(G, n, method='auto', processes=None):
+    '''
+    Returns the $n$-th power $G^n$ of $G$, the graph on $V(G)$ in which
+    two vertices are adjacent if and only if their distance in $G$ is at
+    most $n$.
+
+    If \code {method} is \code {'sparse'}, we run a breadth-first search
+    of depth $n$ from every vertex, in \code {processes} worker processes
+    if that is given.  If it is \code {'dense'}, we raise the bit-packed
+    adjacency matrix to the $n$-th power by repeated squaring.  The
+    default, \code {'auto'}, picks one from the density of $G$ and $n$.
+    '''
+    if n < 1:
+        raise ValueError("The exponent must be a positive integer.")
+
+    # No distance exceeds the number of vertices less one, so higher
+    # powers are all the same.
+
+    n = max(1, min(n, len(G.vertices) - 1))
+    if method == 'auto':
+        method = choosePowerMethod(G, n)
+
+    vertices = G.vertices
+    directed = is_directed(G)
+    if method == 'dense':
+        rows = densePower(adjacencyBitsets(G), n)
+        balls = []
+        for (i, row) in enumerate(rows):
+            row &= ~(1 << i)
+            ball = []
+            while row:
+                low = row & -row
+                ball.append(low.bit_length() - 1)
+                row ^= low
+            balls.append(ball)
+    elif method == 'sparse':
+        balls = sparsePower(integerAdjacencyLists(G), n, processes)
+    else:
+        raise ValueError("Unknown method %(method)r." % {'method': method})
+
+    edges = [(vertices[i], vertices[j])
+             for (i, ball) in enumerate(balls)
+             for j in ball if directed or i < j]
+    return Graph(vertices=vertices, edges=edges, directed=directed)
+
+
+# A complement with more than this fraction of all possible edges is
+# returned as a lazy \code {ComplementView} rather than built outright.
+
+LAZY_COMPLEMENT_DENSITY = 0.5
+
+
+def complementBitsets(rows):
+    '''
+    Returns the bit-packed adjacency matrix (see
+    \code {graph.adjacencyBitsets}) of the complement of the graph whose
+    bit-packed adjacency matrix is \code {rows}.
+    '''
+    full = (1 << len(rows)) - 1
+    return [full ^ row ^ (1 << i) for (i, row) in enumerate(rows)]
+
+
+def bitsetEdges(rows, vertices, directed=False):
+    '''
+    This is a generator that yields the edges described by the bit-packed
+    adjacency matrix \code {rows}, as pairs of vertices from
+    \code {vertices}.
+    '''
+    for (i, row) in enumerate(rows):
+        if not directed:
+            row >>= i + 1
+            offset = i + 1
+        else:
+            offset = 0
+        while row:
+            low = row & -row
+            yield (vertices[i], vertices[offset + low.bit_length() - 1])
+            row ^= low
+
+
+class ComplementView(object):
+    '''
+    This object is a lazy view of the complement of a graph $G$.  The
+    complement of a sparse graph has almost all possible edges, so rather
+    than list them up front, the view keeps the sets of neighbors of $G$,
+    which take $\mathcal{O}(n + m)$ space, answers adjacency questions
+    from them, and only builds its \code {edges} list, or its bit-packed
+    adjacency matrix, the first time it is asked for.  The view reflects
+    $G$ as it was when the view was made.
+    '''
+
+    def __init__(self, G):
+        self.vertices = list(G.vertices)
+        self.directed = is_directed(G)
+        self.__index = dict((v, i) for (i, v) in enumerate(self.vertices))
+        self.__neighbors = [set() for v in self.vertices]
+        for e in G.edges:
+            i = self.__index[e[0]]
+            j = self.__index[e[1]]
+            self.__neighbors[i].add(j)
+            if not self.directed:
+                self.__neighbors[j].add(i)
+        self.__rows = None
+        self.__edges = None
+
+    def adjacent(self, u, v):
+        '''
+        Returns True if $u$ and $v$ are adjacent in the complement.
+        '''
+        i = self.__index[u]
+        j = self.__index[v]
+        return i != j and j not in self.__neighbors[i]
+
+    def neighbors(self, v):
+        '''
+        This is a generator that yields the neighbors of $v$ in the
+        complement.
+        '''
+        i = self.__index[v]
+        skipped = self.__neighbors[i]
+        for (j, w) in enumerate(self.vertices):
+            if j != i and j not in skipped:
+                yield w
+
+    def bitsets(self):
+        '''
+        Returns the bit-packed adjacency matrix of the complement, built on
+        first use.
+        '''
+        if self.__rows is None:
+            full = (1 << len(self.vertices)) - 1
+            rows = []
+            for (i, skipped) in enumerate(self.__neighbors):
+                row = full ^ (1 << i)
+                for j in skipped:
+                    row &= ~(1 << j)
+                rows.append(row)
+            self.__rows = rows
+        return self.__rows
+
+    @property
+    def edges(self):
+        '''
+        The list of edges of the complement, built on first use.
+        '''
+        if self.__edges is None:
+            edges = []
+            for (i, u) in enumerate(self.vertices):
+                skipped = self.__neighbors[i]
+                for j in xrange(0 if self.directed else i + 1,
+                                len(self.vertices)):
+                    if j != i and j not in skipped:
+                        edges.append(Edge(u, self.vertices[j],
+                                          directed=self.directed))
+            self.__edges = edges
+        return self.__edges
+
+
+def graphComplement(G, lazy=None):
+    '''
+    Returns the complement of $G$, the graph on $V(G)$ in which two
+    vertices are adjacent if and only if they are not adjacent in $G$.
+
+    The complement is computed with bitwise operations on the bit-packed
+    adjacency matrix of $G$.  If \code {lazy} is True, or if it is not
+    given and the complement has more than
+    \code {LAZY_COMPLEMENT_DENSITY} of all possible edges (that is, $G$
+    is sparse), a \code {ComplementView} is returned instead of a
+    \code {Graph}.  The complement of a \code {BitsetGraph} is another
+    \code {BitsetGraph}, made straight from the complemented rows.
+    '''
+    n = len(G.vertices)
+    directed = is_directed(G)
+    if isinstance(G, BitsetGraph):
+        return BitsetGraph.fromBitsets(G.vertices,
+                                       complementBitsets(G.rows),
+                                       directed=G.directed)
+    if lazy is None:
+        possible = n * (n - 1) / [2, 1][int(directed)]
+        lazy = possible - len(G.edges) > LAZY_COMPLEMENT_DENSITY * possible
+    if lazy:
+        return ComplementView(G)
+    rows = complementBitsets(adjacencyBitsets(G))
+    return Graph(vertices=G.vertices,
+                 edges=bitsetEdges(rows, G.vertices, directed),
+                 directed=directed)
 
 
 def graphCartesianProduct(G, H):
@@ -42,21 +374,194 @@ def graphTensorProduct(G, H):
     return NotImplemented
 
 
+# The set-theoretic operations below never compare \code {Edge} objects.
+# Instead, the vertices of both graphs are numbered from a shared table,
+# each edge becomes a single integer (see \code {graph.edgeKeys}), and the
+# resulting sorted arrays are combined by a linear merge.  The merged keys
+# are decoded back into vertex pairs as they are produced, so the edges of
+# the result are streamed straight into the new graph.
+
+
+def vertexTable(*vertexLists):
+    '''
+    Returns the pair \code {(labels, index)}, where \code {labels} is the
+    list of distinct vertices appearing in \code {vertexLists} (in order
+    of first appearance) and \code {index} maps each vertex to its
+    position in \code {labels}.
+    '''
+    labels = []
+    index = {}
+    for vertices in vertexLists:
+        for v in vertices:
+            if v not in index:
+                index[v] = len(labels)
+                labels.append(v)
+    return labels, index
+
+
+def mergeUnion(a, b):
+    '''
+    This is a generator that yields, in order, each integer occurring in
+    either of the sorted sequences \code {a} and \code {b}.
+    '''
+    i = j = 0
+    la, lb = len(a), len(b)
+    while i < la and j < lb:
+        x, y = a[i], b[j]
+        if x < y:
+            yield x
+            i += 1
+        elif y < x:
+            yield y
+            j += 1
+        else:
+            yield x
+            i += 1
+            j += 1
+    while i < la:
+        yield a[i]
+        i += 1
+    while j < lb:
+        yield b[j]
+        j += 1
+
+
+def mergeIntersection(a, b):
+    '''
+    This is a generator that yields, in order, each integer occurring in
+    both of the sorted sequences \code {a} and \code {b}.
+    '''
+    i = j = 0
+    la, lb = len(a), len(b)
+    while i < la and j < lb:
+        x, y = a[i], b[j]
+        if x < y:
+            i += 1
+        elif y < x:
+            j += 1
+        else:
+            yield x
+            i += 1
+            j += 1
+
+
+def mergeDifference(a, b):
+    '''
+    This is a generator that yields, in order, each integer occurring in
+    the sorted sequence \code {a} but not in the sorted sequence \code {b}.
+    '''
+    i = j = 0
+    la, lb = len(a), len(b)
+    while i < la and j < lb:
+        x, y = a[i], b[j]
+        if x < y:
+            yield x
+            i += 1
+        elif y < x:
+            j += 1
+        else:
+            i += 1
+            j += 1
+    while i < la:
+        yield a[i]
+        i += 1
+
+
+def decodeEdges(keys, labels):
+    '''
+    This is a generator that turns the edge keys produced by
+    \code {graph.edgeKeys} back into pairs of vertices from \code {labels}.
+    '''
+    n = len(labels)
+    for k in keys:
+        i, j = divmod(k, n)
+        yield (labels[i], labels[j])
+
+
+def combinedDirection(G, H):
+    '''
+    Returns True if the result of combining $G$ and $H$ should be a
+    directed graph, raising \code {TypeError} if one of them is directed
+    and the other is not.
+    '''
+    directedG, directedH = is_directed(G), is_directed(H)
+    if G.edges and H.edges and directedG != directedH:
+        raise TypeError("Cannot combine a directed and an undirected graph.")
+    return directedG or directedH
+
+
+def setOperation(G, H, vertices, merge):
+    '''
+    Returns the graph with vertex set \code {vertices} whose edges are
+    obtained by applying \code {merge} to the edge keys of $G$ and $H$.
+    '''
+    directed = combinedDirection(G, H)
+    labels, index = vertexTable(G.vertices, H.vertices)
+    edges = decodeEdges(merge(edgeKeys(G, index), edgeKeys(H, index)),
+                        labels)
+    return Graph(vertices=vertices, edges=edges, directed=directed)
+
+
+def disjointCopies(G, H):
+    '''
+    Returns the vertex and edge lists of copies of $G$ and $H$ with
+    disjoint vertex sets.  If $V(G)$ and $V(H)$ are already disjoint the
+    graphs are used as they are; otherwise each vertex $v$ of $G$ is
+    renamed $(0, v)$ and each vertex $v$ of $H$ is renamed $(1, v)$.
+    '''
+    if set(G.vertices).isdisjoint(H.vertices):
+        return (G.vertices, H.vertices,
+                [tuple(e) for e in G.edges], [tuple(e) for e in H.edges])
+    return ([(0, v) for v in G.vertices],
+            [(1, v) for v in H.vertices],
+            [((0, u), (0, v)) for (u, v) in map(tuple, G.edges)],
+            [((1, u), (1, v)) for (u, v) in map(tuple, H.edges)])
+
+
 def graphJoin(G, H):
-    return NotImplemented
+    '''
+    Returns the join of $G$ and $H$, obtained from their disjoint union
+    by adding every edge joining a vertex of $G$ to a vertex of $H$.
+    '''
+    directed = combinedDirection(G, H)
+    VG, VH, EG, EH = disjointCopies(G, H)
+    edges = EG + EH
+    edges.extend(product(VG, VH))
+    if directed:
+        edges.extend(product(VH, VG))
+    return Graph(vertices=VG + VH, edges=edges, directed=directed)
 
 
 def graphUnion(G, H):
-    return NotImplemented
+    '''
+    Returns the union of $G$ and $H$, the graph with vertex set
+    $V(G) \cup V(H)$ and edge set $E(G) \cup E(H)$.
+    '''
+    return setOperation(G, H, G.vertices + H.vertices, mergeUnion)
 
 
 def graphIntersection(G, H):
-    return NotImplemented
+    '''
+    Returns the intersection of $G$ and $H$, the graph with vertex set
+    $V(G) \cap V(H)$ and edge set $E(G) \cap E(H)$.
+    '''
+    vertices = set(G.vertices).intersection(H.vertices)
+    return setOperation(G, H, vertices, mergeIntersection)
 
 
 def graphDifference(G, H):
-    return NotImplemented
+    '''
+    Returns the difference $G - H$, the graph with vertex set $V(G)$ and
+    edge set $E(G) - E(H)$.
+    '''
+    return setOperation(G, H, G.vertices, mergeDifference)
 
 
 def graphSum(G, H):
-    return NotImplemented
+    '''
+    Returns the sum (or disjoint union) $G + H$, consisting of a copy of
+    $G$ and a copy of $H$ with disjoint vertex sets.
+    '''
+    directed = combinedDirection(G, H)
+    VG, VH, EG, EH = disjointCopies(G, H)
+    return Graph(vertices=VG + VH, edges=EG + EH, directed=directed)
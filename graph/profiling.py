@@ -0,0 +1,293 @@
+'''
+The \code{profiling} module measures where the time goes in the
+\code{graph} package.  While profiling is switched on, every public
+function of the \code {algorithms}, \code {invariants}, \code {subgraphs}
+and \code {operations} modules records its number of calls, its
+cumulative time and its self time (the time not spent in other profiled
+functions), along with counts of the items it processed, such as vertices
+visited or heap operations.
+
+Profiling is switched on by setting the environment variable
+\code {GRAPH_PROFILE} before the package is imported, in which case a
+summary is printed to standard error when the program exits (and, if
+\code {GRAPH_PROFILE_TRACE} names a file, a trace is written there), or
+for the duration of a \code {with session():} block.  It works by
+replacing the functions in those modules with instrumented copies, and
+putting the originals back afterwards, so when it is off it costs
+nothing at all.
+'''
+
+import atexit
+import inspect
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# The modules whose functions are instrumented.
+
+PROFILED_MODULES = ['algorithms', 'invariants', 'subgraphs', 'operations']
+
+# At most this many individual calls are kept for the trace.
+
+MAX_EVENTS = 1000000
+
+# The profile currently being recorded, or None when profiling is off.
+
+active = None
+
+
+class Profile(object):
+    '''
+    This object accumulates the measurements made while profiling is on.
+    \code {stats} maps the name of each profiled function to a dict with
+    the keys \code {calls}, \code {cumulative}, \code {self} and
+    \code {items}, the last being a dict of item counts.
+    '''
+
+    def __init__(self):
+        self.stats = {}
+        self.events = []
+        self.origin = time.time()
+        self.__stack = []
+
+    def record(self, name):
+        '''
+        Returns the statistics dict for the function \code {name}.
+        '''
+        try:
+            return self.stats[name]
+        except KeyError:
+            stats = self.stats[name] = {'calls': 0, 'cumulative': 0.0,
+                                        'self': 0.0, 'items': {}}
+            return stats
+
+    def enter(self, name, call=True):
+        '''
+        Notes that the function \code {name} has started (or, for a
+        generator, resumed) running.
+        '''
+        if call:
+            self.record(name)['calls'] += 1
+        self.__stack.append([name, time.time(), 0.0])
+
+    def exit(self):
+        '''
+        Notes that the most recently entered function has returned (or,
+        for a generator, yielded).
+        '''
+        name, start, children = self.__stack.pop()
+        now = time.time()
+        elapsed = now - start
+        stats = self.record(name)
+        stats['self'] += elapsed - children
+        if self.__stack:
+            self.__stack[-1][2] += elapsed
+
+        # The time of a recursive call is already counted in the
+        # cumulative time of the call that made it.
+
+        if not [frame for frame in self.__stack if frame[0] == name]:
+            stats['cumulative'] += elapsed
+        if len(self.events) < MAX_EVENTS:
+            self.events.append((name, start, elapsed, len(self.__stack)))
+
+    def count(self, item, n=1):
+        '''
+        Adds $n$ to the count of \code {item} for the function now running.
+        '''
+        if self.__stack:
+            items = self.record(self.__stack[-1][0])['items']
+            items[item] = items.get(item, 0) + n
+
+    def summary(self):
+        '''
+        Returns the statistics as a table, one line per function, with
+        the most expensive functions (by self time) first.
+        '''
+        lines = ['%-40s %8s %12s %12s  %s' % ('function', 'calls',
+                                              'cumulative', 'self',
+                                              'items')]
+        ranked = sorted(self.stats.iteritems(),
+                        key=lambda (name, stats): -stats['self'])
+        for (name, stats) in ranked:
+            items = ', '.join(['%s=%d' % pair
+                               for pair in sorted(stats['items'].items())])
+            lines.append('%-40s %8d %12.6f %12.6f  %s' % (
+                name, stats['calls'], stats['cumulative'], stats['self'],
+                items))
+        return '\n'.join(lines)
+
+    def chromeTrace(self):
+        '''
+        Returns the recorded calls in the Trace Event JSON format read by
+        the trace viewer of the Chrome browser (\code {chrome://tracing}).
+        '''
+        pid = os.getpid()
+        events = [{'name': name, 'cat': name.split('.')[0], 'ph': 'X',
+                   'ts': 1e6 * (start - self.origin), 'dur': 1e6 * elapsed,
+                   'pid': pid, 'tid': 0}
+                  for (name, start, elapsed, depth) in self.events]
+        return json.dumps({'traceEvents': events,
+                           'displayTimeUnit': 'ms'})
+
+
+def count(item, n=1):
+    '''
+    Adds $n$ to the count of \code {item} (such as \code {'vertices
+    visited'}) for the profiled function now running, if profiling is on.
+    '''
+    if active is not None:
+        active.count(item, n)
+
+
+def instrument(name, function):
+    '''
+    Returns an instrumented copy of \code {function}, recorded under the
+    name \code {name}.  The time of a generator is the time spent
+    producing its items, not the time between them.
+    '''
+    if inspect.isgeneratorfunction(function):
+
+        def instrumented(*args, **kwargs):
+            '''
+            Times each step of the generator.
+            '''
+            profile = active
+            if profile is None:
+                for item in function(*args, **kwargs):
+                    yield item
+                return
+            profile.enter(name)
+            try:
+                iterator = function(*args, **kwargs)
+            finally:
+                profile.exit()
+            while True:
+                profile.enter(name, call=False)
+                try:
+                    item = iterator.next()
+                except StopIteration:
+                    return
+                finally:
+                    profile.exit()
+                yield item
+    else:
+
+        def instrumented(*args, **kwargs):
+            '''
+            Times the call.
+            '''
+            profile = active
+            if profile is None:
+                return function(*args, **kwargs)
+            profile.enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.exit()
+
+    instrumented.__name__ = function.__name__
+    instrumented.__module__ = function.__module__
+    instrumented.__doc__ = function.__doc__
+    instrumented.original = function
+    return instrumented
+
+
+def packageModules():
+    '''
+    Returns the list of modules of this package that have been imported.
+    '''
+    prefix = __name__.rsplit('.', 1)[0] + '.'
+    return [module for (name, module) in sys.modules.items()
+            if name.startswith(prefix) and module is not None]
+
+
+def enable(profile=None):
+    '''
+    Switches profiling on, recording into \code {profile} (by default, a
+    new \code {Profile}), which is returned.
+    '''
+    global active
+    if active is not None:
+        raise RuntimeError("Profiling is already on.")
+    package = __name__.rsplit('.', 1)[0]
+    for name in PROFILED_MODULES:
+        __import__('%s.%s' % (package, name))
+
+    # A function may also have been imported into other modules by name,
+    # so we replace it wherever it is found.
+
+    replacements = {}
+    for name in PROFILED_MODULES:
+        module = sys.modules['%s.%s' % (package, name)]
+        for (attribute, value) in vars(module).items():
+            if inspect.isfunction(value) and \
+               value.__module__ == module.__name__ and \
+               not attribute.startswith('_'):
+                replacements[value] = instrument(
+                    '%s.%s' % (name, attribute), value)
+    for module in packageModules():
+        for (attribute, value) in vars(module).items():
+            if inspect.isfunction(value) and value in replacements:
+                setattr(module, attribute, replacements[value])
+
+    active = profile or Profile()
+    return active
+
+
+def disable():
+    '''
+    Switches profiling off, putting back the original functions, and
+    returns the \code {Profile} that was being recorded.
+    '''
+    global active
+    for module in packageModules():
+        for (attribute, value) in vars(module).items():
+            if inspect.isfunction(value) and hasattr(value, 'original'):
+                setattr(module, attribute, value.original)
+    profile, active = active, None
+    return profile
+
+
+@contextmanager
+def session(profile=None):
+    '''
+    Switches profiling on for the duration of a \code {with} block,
+    yielding the \code {Profile} being recorded.
+    '''
+    profile = enable(profile)
+    try:
+        yield profile
+    finally:
+        disable()
+
+
+def reportAtExit():
+    '''
+    Prints the summary of the profile switched on by \code {GRAPH_PROFILE}
+    and writes its trace, if asked to.
+    '''
+    if active is None:
+        return
+    profile = disable()
+    sys.stderr.write(profile.summary() + '\n')
+    filename = os.environ.get('GRAPH_PROFILE_TRACE')
+    if filename:
+        f = open(filename, 'w')
+        try:
+            f.write(profile.chromeTrace())
+        finally:
+            f.close()
+
+
+def enableFromEnvironment():
+    '''
+    Switches profiling on until the program exits if the environment
+    variable \code {GRAPH_PROFILE} is set.  The package calls this when it
+    is imported.
+    '''
+    if os.environ.get('GRAPH_PROFILE') and active is None:
+        enable()
+        atexit.register(reportAtExit)
@@ -0,0 +1,411 @@
+'''
+The \code{readwrite} module reads and writes graphs in several common file
+formats: edge lists, adjacency lists, Matrix Market coordinate files and
+the \code {dot} language of \code {graphviz}.
+
+The writers produce their output a chunk of lines at a time rather than
+building one large string, and the readers parse their input a line at a
+time, loading edges into the graph as they go, so neither ever holds more
+than the graph itself and one chunk of text.  Every function accepts
+either an open file object or a file name; file names ending in
+\code {.gz} are compressed or decompressed with \code {gzip}, and the
+readers also recognise compressed input from its first bytes.
+'''
+
+import gzip
+import itertools
+import re
+
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from StringIO import StringIO
+
+import graph
+
+# The number of lines the writers collect before each call to the
+# \code {write} method of the file.
+
+CHUNK_LINES = 4096
+
+GZIP_MAGIC = '\x1f\x8b'
+
+
+class FileWrapper(object):
+    '''
+    This object wraps a file object or file name for the duration of one
+    read or write.  Its \code {file} attribute is the file to use, and its
+    \code {close} method closes that file only if we opened it ourselves.
+    '''
+
+    def __init__(self, source, mode):
+        self.opened = None
+        if isinstance(source, basestring):
+            if source.endswith('.gz'):
+                self.opened = gzip.open(source, mode + 'b')
+            else:
+                self.opened = open(source, mode + 'b')
+                if 'r' in mode and self.opened.read(2) == GZIP_MAGIC:
+                    self.opened.close()
+                    self.opened = gzip.open(source, 'rb')
+                elif 'r' in mode:
+                    self.opened.seek(0)
+            self.file = self.opened
+        else:
+            self.file = source
+            if 'r' in mode and self.__compressed(source):
+                self.file = self.opened = gzip.GzipFile(fileobj=source,
+                                                        mode='rb')
+
+    def __compressed(self, source):
+        '''
+        Returns True if the file object \code {source} starts with the
+        \code {gzip} header, leaving its position unchanged.  Files that
+        cannot seek are assumed to be uncompressed.
+        '''
+        try:
+            start = source.tell()
+            magic = source.read(2)
+            source.seek(start)
+        except (AttributeError, IOError):
+            return False
+        return magic == GZIP_MAGIC
+
+    def close(self):
+        '''
+        Closes the file if we opened it.
+        '''
+        if self.opened is not None:
+            self.opened.close()
+
+
+def openForReading(source):
+    '''
+    Returns a \code {FileWrapper} for reading from \code {source}.
+    '''
+    return FileWrapper(source, 'r')
+
+
+def openForWriting(target):
+    '''
+    Returns a \code {FileWrapper} for writing to \code {target}.
+    '''
+    return FileWrapper(target, 'w')
+
+
+def writeLines(lines, target):
+    '''
+    Writes the strings produced by the iterable \code {lines} to
+    \code {target}, each followed by a newline, \code {CHUNK_LINES} at a
+    time.
+    '''
+    wrapper = openForWriting(target)
+    try:
+        write = wrapper.file.write
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == CHUNK_LINES:
+                chunk.append('')
+                write('\n'.join(chunk))
+                chunk = []
+        if chunk:
+            chunk.append('')
+            write('\n'.join(chunk))
+    finally:
+        wrapper.close()
+
+
+def readLines(source):
+    '''
+    This is a generator that yields the lines of \code {source} with
+    surrounding whitespace removed, skipping blank lines.
+    '''
+    wrapper = openForReading(source)
+    try:
+        for line in wrapper.file:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        wrapper.close()
+
+
+def parseLabel(token):
+    '''
+    Returns the vertex named by \code {token}: an integer if \code {token}
+    spells one, otherwise the string itself.
+    '''
+    try:
+        return int(token)
+    except ValueError:
+        return token
+
+
+def writeEdgeList(G, target):
+    '''
+    Writes $G$ to \code {target} as an edge list: one line
+    \code {u v} for each edge, followed by one line for each vertex that
+    is incident with no edge.  Vertex names may not contain whitespace.
+    '''
+
+    def lines():
+        '''
+        Generates the lines of the file.
+        '''
+        touched = set()
+        for e in G.edges:
+            touched.add(e[0])
+            touched.add(e[1])
+            yield '%s %s' % (e[0], e[1])
+        for v in G.vertices:
+            if v not in touched:
+                yield str(v)
+
+    writeLines(lines(), target)
+
+
+def readEdgeList(source, directed=False, parse=parseLabel):
+    '''
+    Returns the graph read from the edge list \code {source} (see
+    \code {writeEdgeList}).  Lines beginning with \code {\#} are ignored,
+    as is anything after the first two names on a line, such as a weight.
+    Vertex names are converted by \code {parse}.
+    '''
+    G = graph.Graph(directed=directed)
+
+    def edges():
+        '''
+        Generates the edges of the file, adding lone vertices as found.
+        '''
+        for line in readLines(source):
+            if line.startswith('#'):
+                continue
+            tokens = line.split()
+            if len(tokens) == 1:
+                G.addVertex(parse(tokens[0]))
+            else:
+                yield (parse(tokens[0]), parse(tokens[1]))
+
+    G.addEdges(edges())
+    return G
+
+
+def writeAdjacencyList(G, target):
+    '''
+    Writes $G$ to \code {target} as an adjacency list: one line
+    \code {v u_1 u_2 ... u_k} for each vertex $v$, listing its neighbors.
+    '''
+    adjacencies = graph.adjacencyLists(G)
+
+    def lines():
+        '''
+        Generates the lines of the file.
+        '''
+        for v in G.vertices:
+            yield ' '.join([str(v)] + [str(u) for u in adjacencies[v]])
+
+    writeLines(lines(), target)
+
+
+def readAdjacencyList(source, directed=False, parse=parseLabel):
+    '''
+    Returns the graph read from the adjacency list \code {source} (see
+    \code {writeAdjacencyList}).  For an undirected graph, an edge may be
+    listed under both of its ends or under just one.
+    '''
+
+    def entries():
+        '''
+        Generates a pair \code {(v, neighbors)} for each line of the file.
+        '''
+        for line in readLines(source):
+            if line.startswith('#'):
+                continue
+            tokens = [parse(token) for token in line.split()]
+            yield tokens[0], tokens[1:]
+
+    return graph.fromAdjacencyLists(entries(), directed=directed)
+
+
+def writeMatrixMarket(G, target):
+    '''
+    Writes the adjacency matrix of $G$ to \code {target} in the Matrix
+    Market coordinate format, as a pattern matrix.  Vertex
+    \code {G.vertices[i]} becomes row and column $i + 1$.  An undirected
+    graph is written as a symmetric matrix, listing each edge once.
+    '''
+    index = dict((v, i + 1) for (i, v) in enumerate(G.vertices))
+    directed = graph.is_directed(G)
+    n = len(index)
+
+    def lines():
+        '''
+        Generates the lines of the file.
+        '''
+        yield '%%%%MatrixMarket matrix coordinate pattern %s' % \
+              ['symmetric', 'general'][int(directed)]
+        yield '%d %d %d' % (n, n, len(G.edges))
+        for e in G.edges:
+            i, j = index[e[0]], index[e[1]]
+            if i < j and not directed:
+                i, j = j, i
+            yield '%d %d' % (i, j)
+
+    writeLines(lines(), target)
+
+
+def readMatrixMarket(source):
+    '''
+    Returns the graph whose adjacency matrix is the Matrix Market
+    coordinate file \code {source}, on the vertices $0, 1, \dots, n - 1$.
+    Symmetric matrices give undirected graphs and general ones directed
+    graphs; every stored entry is taken to be an edge, whatever its value,
+    except for entries on the diagonal.
+    '''
+    lines = readLines(source)
+    header = lines.next().split()
+    if len(header) < 5 or header[0] != '%%MatrixMarket' or \
+       header[2] != 'coordinate':
+        raise ValueError("Not a Matrix Market coordinate file.")
+    directed = header[4] == 'general'
+    for line in lines:
+        if not line.startswith('%'):
+            n = int(line.split()[0])
+            break
+    else:
+        raise ValueError("Not a Matrix Market coordinate file.")
+    G = graph.Graph(vertices=xrange(n), directed=directed)
+
+    def edges():
+        '''
+        Generates the edges of the file.
+        '''
+        for line in lines:
+            tokens = line.split()
+            i, j = int(tokens[0]) - 1, int(tokens[1]) - 1
+            if i != j:
+                yield (i, j)
+
+    G.addEdges(edges())
+    return G
+
+
+def dotID(v):
+    '''
+    Returns the vertex $v$ as a quoted \code {dot} identifier.
+    '''
+    return '"%s"' % str(v).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def writeDot(G, target, name='G'):
+    '''
+    Writes $G$ to \code {target} in the \code {dot} language of
+    \code {graphviz}.
+    '''
+    directed = graph.is_directed(G)
+    arrow = ['--', '->'][int(directed)]
+
+    def lines():
+        '''
+        Generates the lines of the file.
+        '''
+        yield '%s %s {' % (['graph', 'digraph'][int(directed)], dotID(name))
+        for v in G.vertices:
+            yield '  %s;' % dotID(v)
+        for e in G.edges:
+            yield '  %s %s %s;' % (dotID(e[0]), arrow, dotID(e[1]))
+        yield '}'
+
+    writeLines(lines(), target)
+
+
+# A \code {dot} identifier is a quoted string, a number or a name; we also
+# need the edge operators and the characters that delimit statements.
+
+DOT_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|(--|->)|([A-Za-z0-9_.\-]+)|'
+                       r'(\[[^\]]*\])|([{};=])')
+
+DOT_KEYWORDS = set(['graph', 'digraph', 'subgraph', 'node', 'edge',
+                    'strict'])
+
+
+def dotStatements(line):
+    '''
+    This is a generator that yields, for each node or edge statement on
+    the line \code {line}, the list of vertex names it mentions in order.
+    Attribute lists are skipped, as are attribute assignments and
+    statements starting with a keyword.
+    '''
+    chain = []
+    joined = skipping = assigned = False
+    for match in DOT_TOKEN.finditer(line):
+        quoted, operator, bare, attributes, delimiter = match.groups()
+        if assigned and (quoted is not None or bare is not None):
+            assigned = False
+        elif quoted is not None or bare is not None:
+            name = bare
+            if quoted is not None:
+                name = re.sub(r'\\(.)', r'\1', quoted)
+            if not (chain and joined):
+                if chain and not skipping:
+                    yield chain
+                chain = []
+                skipping = bare in DOT_KEYWORDS
+            chain.append(name)
+            joined = False
+        elif operator is not None:
+            joined = True
+        elif delimiter == '=':
+            skipping = assigned = True
+        elif delimiter is not None:
+            if chain and not skipping:
+                yield chain
+            chain = []
+            joined = skipping = assigned = False
+    if chain and not skipping:
+        yield chain
+
+
+def readDot(source, parse=parseLabel):
+    '''
+    Returns the graph described by the \code {dot} file \code {source}.
+    We understand node statements and (possibly chained) edge statements
+    such as those written by \code {writeDot}.  Attribute lists and
+    assignments are ignored; subgraphs are not supported, and a statement
+    may not span several lines.
+    '''
+    lines = readLines(source)
+    G = None
+    rest = ''
+    for line in lines:
+        if line.startswith('//') or line.startswith('#'):
+            continue
+        words = line.replace('{', ' ').split()
+        if 'digraph' in words[:2]:
+            G = graph.Graph(directed=True)
+        elif 'graph' in words[:2]:
+            G = graph.Graph(directed=False)
+        if '{' in line:
+            rest = line[line.index('{') + 1:]
+        break
+    if G is None:
+        raise ValueError("Not a dot graph.")
+
+    def edges():
+        '''
+        Generates the edges of the statements following the header, on
+        its own line and the remaining ones.
+        '''
+        for line in itertools.chain([rest], lines):
+            if line.startswith('//') or line.startswith('#'):
+                continue
+            for chain in dotStatements(line):
+                chain = [parse(name) for name in chain]
+                if len(chain) == 1:
+                    G.addVertex(chain[0])
+                for (u, v) in zip(chain, chain[1:]):
+                    yield (u, v)
+
+    G.addEdges(edges())
+    return G
@@ -0,0 +1,602 @@
+'''
+The \code{sharded} module stores graphs too large for memory, even in the
+compact form of \code {mapped}, as a directory of \emph {shards}: files
+each holding the adjacency lists (in CSR form, as in \code {mapped}) of a
+range of consecutive vertices.  A \code {ShardedGraph} memory-maps only as
+many shards at a time as fit in its memory budget, and its algorithms --
+breadth-first search, connected components and degree statistics -- read
+the shards one after another, in order, so that the disk is read
+sequentially.  Only arrays with a few bytes for each vertex are kept in
+memory; the edges never are.
+
+The vertices of a sharded graph are $0, 1, \dots, n - 1$.  A directory
+holds the file \code {index}, a header followed by the $s + 1$ vertex
+numbers at which the $s$ shards begin (and the last ends), and the files
+\code {shard-00000}, \code {shard-00001}, \dots, each holding the offsets
+of the adjacency lists of its vertices, counted from the start of the
+shard, followed by the lists themselves, all as little-endian 64-bit
+integers.  Both ends of an undirected edge appear, as in \code {mapped}.
+
+A \code {ShardedGraph} declares itself \emph {out of core} by its class
+attribute \code {outOfCore = True} (see \code {graph.is_outOfCore}).
+For such graphs, and only for them, \code {algorithms.BFS},
+\code {invariants.degrees} and \code {invariants.degreeRange} hand the
+work over to the methods \code {BFS}, \code {degrees} and
+\code {degreeRange} of the graph, which read its shards in order
+instead of building adjacency lists or a degree table in memory.  Any
+other out-of-core representation takes part by providing the same
+attribute and methods.
+'''
+
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+
+import graph
+from mapped import MappedArray, IdentityLabels, writeValues
+
+MAGIC = 'GRAPHSHD'
+FORMAT_VERSION = 1
+
+# The header of the index holds the magic string, the format version, the
+# flags, $n$, $m$ and the number of shards.
+
+HEADER = struct.Struct('<8sIIQQQ')
+
+DIRECTED = 1
+
+INT64 = struct.Struct('<q')
+
+DEFAULT_MEMORY_BUDGET = 256 * 2 ** 20
+
+# Shards are made small enough that this many fit in the memory budget at
+# once.
+
+SHARDS_IN_BUDGET = 4
+
+# The number of edges read from the temporary edge file at a time.
+
+CHUNK_EDGES = 65536
+
+
+def shardName(directory, k):
+    '''
+    Returns the name of the file of the $k$-th shard in \code {directory}.
+    '''
+    return os.path.join(directory, 'shard-%05d' % k)
+
+
+def shardBounds(degree, memoryBudget):
+    '''
+    Returns the list of vertices at which shards begin, followed by $n$,
+    for vertices with the given numbers of adjacency list entries, so that
+    each shard takes at most \code {memoryBudget / SHARDS_IN_BUDGET} bytes
+    (or holds a single vertex).
+    '''
+    limit = max(1, memoryBudget / (8 * SHARDS_IN_BUDGET))
+    bounds = [0]
+    entries = 0
+    for (i, d) in enumerate(degree):
+        if entries and entries + d + 1 > limit:
+            bounds.append(i)
+            entries = 0
+        entries += d + 1
+    bounds.append(len(degree))
+    return bounds
+
+
+def writeSharded(edges, n, directory, directed=False,
+                 memoryBudget=DEFAULT_MEMORY_BUDGET):
+    '''
+    Writes the graph on $0, 1, \dots, n - 1$ with the edges given by the
+    iterable \code {edges} (of pairs of integers) to \code {directory},
+    which is made if need be, for loading with \code {loadSharded}.
+    \code {edges} is read only once, so it may be a generator over a file
+    far larger than memory.
+
+    The edges are first copied to a temporary file, counting the degrees
+    as they go.  The degrees fix the shards and the place of every entry
+    in them, so the shard files are then made at their full size and
+    filled in one pass over the temporary file, entries being gathered in
+    memory up to half the budget and then written to the shards in order.
+    '''
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    degree = array('l', [0]) * n
+    spillName = os.path.join(directory, 'edges.tmp')
+    spill = open(spillName, 'wb')
+    m = 0
+    try:
+        buffered = array('l')
+        for (i, j) in edges:
+            if not (0 <= i < n and 0 <= j < n):
+                raise ValueError("(%r, %r) is not an edge on %d vertices."
+                                 % (i, j, n))
+            buffered.append(i)
+            buffered.append(j)
+            degree[i] += 1
+            if not directed:
+                degree[j] += 1
+            m += 1
+            if len(buffered) >= 2 * CHUNK_EDGES:
+                buffered.tofile(spill)
+                del buffered[:]
+        buffered.tofile(spill)
+    finally:
+        spill.close()
+
+    try:
+        bounds = shardBounds(degree, memoryBudget)
+
+        # Each shard is written with its offsets, and then \code {degree}
+        # becomes the list of the positions in their shards at which the
+        # next entries of each vertex go.
+
+        for k in xrange(len(bounds) - 1):
+            offsets = [0]
+            for i in xrange(bounds[k], bounds[k + 1]):
+                offsets.append(offsets[-1] + degree[i])
+            f = open(shardName(directory, k), 'wb')
+            try:
+                writeValues(f, 'q', offsets)
+                f.truncate(8 * (len(offsets) + offsets[-1]))
+            finally:
+                f.close()
+            for i in xrange(bounds[k], bounds[k + 1]):
+                degree[i] = len(offsets) + offsets[i - bounds[k]]
+
+        pending = {}
+        pendingCount = [0]
+        limit = max(1, memoryBudget / 2 / 16)
+
+        def flush():
+            '''
+            Writes the gathered entries to their shards, in order.
+            '''
+            for k in sorted(pending):
+                f = open(shardName(directory, k), 'r+b')
+                try:
+                    buffer = mmap.mmap(f.fileno(), 0)
+                finally:
+                    f.close()
+                entries = pending[k]
+                for p in xrange(0, len(entries), 2):
+                    i = entries[p]
+                    INT64.pack_into(buffer, 8 * degree[i], entries[p + 1])
+                    degree[i] += 1
+                buffer.close()
+            pending.clear()
+            pendingCount[0] = 0
+
+        def gather(i, j):
+            '''
+            Gathers the entry $j$ in the adjacency list of $i$.
+            '''
+            k = bisect.bisect_right(bounds, i) - 1
+            entries = pending.get(k)
+            if entries is None:
+                entries = pending[k] = array('l')
+            entries.append(i)
+            entries.append(j)
+            pendingCount[0] += 1
+            if pendingCount[0] >= limit:
+                flush()
+
+        spill = open(spillName, 'rb')
+        try:
+            while True:
+                chunk = array('l')
+                try:
+                    chunk.fromfile(spill, 2 * CHUNK_EDGES)
+                except EOFError:
+                    pass
+                if not chunk:
+                    break
+                for p in xrange(0, len(chunk), 2):
+                    i = chunk[p]
+                    j = chunk[p + 1]
+                    gather(i, j)
+                    if not directed:
+                        gather(j, i)
+        finally:
+            spill.close()
+        flush()
+    finally:
+        os.remove(spillName)
+
+    f = open(os.path.join(directory, 'index'), 'wb')
+    try:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION,
+                            DIRECTED if directed else 0, n, m,
+                            len(bounds) - 1))
+        writeValues(f, 'q', bounds)
+    finally:
+        f.close()
+
+
+def shardGraph(G, directory, memoryBudget=DEFAULT_MEMORY_BUDGET):
+    '''
+    Writes $G$ to \code {directory} with \code {writeSharded}.  Vertex $i$
+    of the sharded graph is \code {G.vertices[i]}.
+    '''
+    vertices = list(G.vertices)
+    index = dict((v, i) for (i, v) in enumerate(vertices))
+    writeSharded(((index[e[0]], index[e[1]]) for e in G.edges),
+                 len(vertices), directory, graph.is_directed(G),
+                 memoryBudget)
+
+
+class ShardedEdges(object):
+    '''
+    This object is the read-only sequence of edges of a
+    \code {ShardedGraph}, read from the shards in order as it is iterated
+    over.  Indexing it reads the shards up to the edge asked for, so it
+    is only quick near the start.
+    '''
+
+    def __init__(self, G):
+        self.__graph = G
+
+    def __len__(self):
+        return self.__graph.size
+
+    def __iter__(self):
+        G = self.__graph
+        directed = G.directed
+        for (i, row) in G.rows():
+            loops = 0
+            for j in row:
+                if directed or i < j:
+                    yield graph.Edge(i, j, directed=directed)
+                elif i == j:
+
+                    # Both ends of an undirected loop are in the list.
+
+                    loops += 1
+                    if loops % 2:
+                        yield graph.Edge(i, j, directed=directed)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Index out of range.")
+        for (k, e) in enumerate(self):
+            if k == i:
+                return e
+
+
+class ShardedComponents(object):
+    '''
+    This object answers the queries of an
+    \code {algorithms.ConnectivityTracker} for a \code {ShardedGraph},
+    which never changes, from the component of each vertex, found once.
+    '''
+
+    def __init__(self, labels, count):
+        self.labels = labels
+        self.count = count
+
+    def numberOfComponents(self):
+        '''
+        Returns the number of components of the graph.
+        '''
+        return self.count
+
+    def is_connected(self):
+        '''
+        Returns True if the graph is connected, otherwise False.
+        '''
+        return self.count <= 1
+
+    def componentOf(self, v):
+        '''
+        Returns the least vertex in the component containing $v$.
+        '''
+        return self.labels[v]
+
+    def connected(self, u, v):
+        '''
+        Returns True if $u$ and $v$ are in the same component, otherwise
+        False.
+        '''
+        return self.labels[u] == self.labels[v]
+
+    def components(self):
+        '''
+        Returns the components of the graph, as a list of lists of
+        vertices.
+        '''
+        members = {}
+        for (v, label) in enumerate(self.labels):
+            members.setdefault(label, []).append(v)
+        return [members[label] for label in sorted(members)]
+
+
+class ShardedGraph(object):
+    '''
+    This object is a read-only graph stored in a directory written by
+    \code {writeSharded}, keeping at most \code {memoryBudget} bytes of
+    shards mapped at once.  It provides \code {vertices} and \code {edges}
+    sequences like a \code {Graph}, and \code {algorithms.BFS},
+    \code {invariants.is_connected}, \code {invariants.numberOfComponents}
+    and the degree invariants use its own out-of-core methods below.
+    '''
+
+    outOfCore = True
+
+    def __init__(self, directory, memoryBudget=DEFAULT_MEMORY_BUDGET):
+        self.directory = directory
+        self.memoryBudget = memoryBudget
+        f = open(os.path.join(directory, 'index'), 'rb')
+        try:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or header[:8] != MAGIC:
+                raise ValueError("%s is not a sharded graph." % directory)
+            fields = HEADER.unpack(header)
+            if fields[1] != FORMAT_VERSION:
+                raise ValueError("%s has unsupported format version %d."
+                                 % (directory, fields[1]))
+            flags, n, m, count = fields[2:]
+            self.bounds = list(struct.unpack('<%dq' % (count + 1),
+                                             f.read(8 * (count + 1))))
+        finally:
+            f.close()
+        self.directed = bool(flags & DIRECTED)
+        self.order = n
+        self.size = m
+        self.shardCount = count
+        self.__mapped = OrderedDict()
+        self.__mappedBytes = 0
+        self.__labels = IdentityLabels(n)
+        self.__edges = ShardedEdges(self)
+        self.__memo = {}
+        self.__tracker = None
+
+    @property
+    def vertices(self):
+        '''
+        The sequence of vertices, $0, 1, \dots, n - 1$.
+        '''
+        return self.__labels
+
+    @property
+    def edges(self):
+        '''
+        The sequence of edges.
+        '''
+        return self.__edges
+
+    def shard(self, k):
+        '''
+        Returns the offsets and the entries of the $k$-th shard, as
+        \code {mapped.MappedArray}s, mapping it if need be.  The shards
+        used longest ago are let go to keep within the memory budget;
+        their maps are closed once nothing refers to them.
+        '''
+        if k in self.__mapped:
+            arrays = self.__mapped.pop(k)
+            self.__mapped[k] = arrays
+            return arrays[:2]
+        f = open(shardName(self.directory, k), 'rb')
+        try:
+            length = os.fstat(f.fileno()).st_size
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        count = self.bounds[k + 1] - self.bounds[k] + 1
+        offsets = MappedArray(buffer, 0, count)
+        entries = MappedArray(buffer, 8 * count, length / 8 - count)
+        while self.__mapped and \
+              self.__mappedBytes + length > self.memoryBudget:
+            evicted = self.__mapped.popitem(last=False)[1]
+            self.__mappedBytes -= evicted[2]
+        self.__mapped[k] = (offsets, entries, length)
+        self.__mappedBytes += length
+        return offsets, entries
+
+    def shardOf(self, v):
+        '''
+        Returns the number of the shard holding the vertex $v$.
+        '''
+        if not 0 <= v < self.order:
+            raise ValueError("%r is not a vertex." % (v,))
+        return bisect.bisect_right(self.bounds, v) - 1
+
+    def neighbors(self, v):
+        '''
+        Returns the list of vertices adjacent to (or, in a directed graph,
+        from) the vertex $v$.
+        '''
+        k = self.shardOf(v)
+        offsets, entries = self.shard(k)
+        i = v - self.bounds[k]
+        return list(entries.slice(offsets[i], offsets[i + 1]))
+
+    def degree(self, v):
+        '''
+        Returns the number of entries in the adjacency list of $v$: its
+        degree, or, in a directed graph, its out-degree.
+        '''
+        k = self.shardOf(v)
+        offsets, entries = self.shard(k)
+        i = v - self.bounds[k]
+        return offsets[i + 1] - offsets[i]
+
+    def rows(self):
+        '''
+        This is a generator that yields \code {(v, neighbors)} for each
+        vertex $v$ in turn, reading the shards in order.
+        '''
+        for k in xrange(self.shardCount):
+            offsets, entries = self.shard(k)
+            start = self.bounds[k]
+            offsets = offsets.slice(0, len(offsets))
+            for i in xrange(len(offsets) - 1):
+                yield start + i, entries.slice(offsets[i], offsets[i + 1])
+
+    def degrees(self):
+        '''
+        This is a generator that yields the degree of each vertex in turn,
+        counting both ends of every edge, as \code {invariants.degrees}
+        does.  In a directed graph, the in-degrees are first counted in a
+        pass over the shards.
+        '''
+        incoming = None
+        if self.directed:
+            incoming = array('l', [0]) * self.order
+            for (v, row) in self.rows():
+                for w in row:
+                    incoming[w] += 1
+        for k in xrange(self.shardCount):
+            offsets = self.shard(k)[0]
+            offsets = offsets.slice(0, len(offsets))
+            start = self.bounds[k]
+            for i in xrange(len(offsets) - 1):
+                d = offsets[i + 1] - offsets[i]
+                if incoming is not None:
+                    d += incoming[start + i]
+                yield d
+
+    def degreeStatistics(self):
+        '''
+        Returns a dict with the smallest, largest and mean degree (keys
+        \code {'min'}, \code {'max'} and \code {'mean'}) and the number
+        of vertices of each degree (\code {'histogram'}).
+        '''
+        histogram = {}
+        for d in self.degrees():
+            histogram[d] = histogram.get(d, 0) + 1
+        if not histogram:
+            raise ValueError("The null graph has no vertex degrees.")
+        return {'min': min(histogram), 'max': max(histogram),
+                'mean': float(sum([d * c for (d, c) in
+                                   histogram.iteritems()])) / self.order,
+                'histogram': histogram}
+
+    def degreeRange(self):
+        '''
+        Returns the pair of the smallest and largest degree, for
+        \code {invariants.degreeRange}.
+        '''
+        statistics = self.degreeStatistics()
+        return statistics['min'], statistics['max']
+
+    def BFS(self, start):
+        '''
+        This is a generator that yields the vertices reached from
+        \code {start} in a breadth-first search, for \code {algorithms.BFS}.
+
+        The search goes a level at a time.  The vertices of each level are
+        sorted, so that their adjacency lists are read shard by shard in
+        order, and those found to be new are marked in a bit array, the
+        only memory kept for every vertex.
+        '''
+        seen = bytearray((self.order + 7) / 8)
+        seen[start >> 3] |= 1 << (start & 7)
+        yield start
+        level = array('l', [start])
+        while level:
+            following = array('l')
+            k = None
+            for v in array('l', sorted(level)):
+                if k is None or v >= self.bounds[k + 1]:
+                    k = self.shardOf(v)
+                    offsets, entries = self.shard(k)
+                i = v - self.bounds[k]
+                for w in entries.slice(offsets[i], offsets[i + 1]):
+                    if not seen[w >> 3] & (1 << (w & 7)):
+                        seen[w >> 3] |= 1 << (w & 7)
+                        following.append(w)
+                        yield w
+            level = following
+
+    def componentLabels(self):
+        '''
+        Returns the array giving, for each vertex, the least vertex in its
+        component, and the number of components, found by a union find
+        over the edges, read shard by shard.  Directions of edges are
+        ignored.
+        '''
+        parent = array('l', xrange(self.order))
+
+        def find(v):
+            '''
+            Returns the root of the tree containing $v$, halving the path
+            to it on the way.
+            '''
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            return v
+
+        count = self.order
+        for (v, row) in self.rows():
+            for w in row:
+                if self.directed or v < w:
+                    x = find(v)
+                    y = find(w)
+                    if x != y:
+
+                        # The smaller root is kept, so that each root is
+                        # the least vertex of its component.
+
+                        if x < y:
+                            parent[y] = x
+                        else:
+                            parent[x] = y
+                        count -= 1
+        for v in xrange(self.order):
+            parent[v] = parent[parent[v]]
+        return parent, count
+
+    @property
+    def tracker(self):
+        '''
+        The components of the graph, as a \code {ShardedComponents}, which
+        \code {invariants.is_connected} and
+        \code {invariants.numberOfComponents} consult.  They are found the
+        first time they are asked for.
+        '''
+        if self.__tracker is None:
+            self.__tracker = ShardedComponents(*self.componentLabels())
+        return self.__tracker
+
+    def trackConnectivity(self):
+        '''
+        Returns \code {tracker}, as \code {Graph.trackConnectivity} does.
+        '''
+        return self.tracker
+
+    def adjacencyLists(self):
+        '''
+        Returns the adjacency lists of the graph, as
+        \code {graph.adjacencyLists} would.  This holds the whole graph in
+        memory, so is only for graphs that fit.
+        '''
+        return dict((v, list(row)) for (v, row) in self.rows())
+
+    def memo(self):
+        '''
+        Returns the dict in which values computed from the graph are
+        remembered.  A sharded graph never changes, so they are kept for
+        as long as the graph is.
+        '''
+        return self.__memo
+
+    def close(self):
+        '''
+        Lets go of the mapped shards.
+        '''
+        self.__mapped.clear()
+        self.__mappedBytes = 0
+
+
+def loadSharded(directory, memoryBudget=DEFAULT_MEMORY_BUDGET):
+    '''
+    Returns the \code {ShardedGraph} stored in \code {directory}.
+    '''
+    return ShardedGraph(directory, memoryBudget)
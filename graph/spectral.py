@@ -0,0 +1,524 @@
+'''
+The \code{spectral} module computes with the Laplacian matrix of a graph
+without ever forming it densely, so that it works on graphs far too large
+for the symbolic matrices of \code {sympy} used in \code {invariants}.
+
+The Laplacian of $G$ is $L = D - A$, where $D$ is the diagonal matrix of
+degrees and $A$ the adjacency matrix; the normalized Laplacian is
+$I - D^{-1/2} A D^{-1/2}$.  Both are stored as a \code {SparseMatrix},
+holding only the nonzero entries.  Their smallest eigenvalues are found by
+the method of Lanczos, which needs nothing but products of the matrix with
+vectors.  The second smallest eigenvalue of $L$ is the \emph {algebraic
+connectivity} of $G$, which is positive exactly when $G$ is connected,
+and the signs of an eigenvector for it (a \emph {Fiedler vector}) suggest
+a way of cutting $G$ in two with few edges between the halves.
+
+Directions of edges and loops are ignored, and parallel edges add their
+weights together.  All vectors are plain lists of floats.
+'''
+
+import math
+import random
+from array import array
+from operator import mul
+
+from algorithms import edgeWeights
+
+# The smallest eigenvalues are found one at a time.  The basis of each
+# search is never let grow past \code {BASIS_SIZE} vectors; it is then cut
+# back to the \code {KEPT_VECTORS} best approximations to eigenvectors
+# found so far, and the search goes on, unless its residual is already
+# within the tolerance.
+
+BASIS_SIZE = 30
+KEPT_VECTORS = 10
+
+
+class SparseMatrix(object):
+    '''
+    This object is an $n \times n$ matrix stored in compressed sparse row
+    form: the nonzero entries of row $i$ are \code {values[p]} in the
+    columns \code {indices[p]}, for \code {offsets[i] <= p <
+    offsets[i + 1]}.  A matrix made from a graph also records the
+    \code {vertices} its rows correspond to.
+    '''
+
+    def __init__(self, rows, vertices=None):
+        '''
+        Makes the matrix whose $i$-th row has the entries given by the
+        dict \code {rows[i]}, mapping columns to values.
+        '''
+        self.n = len(rows)
+        self.vertices = vertices
+        self.offsets = array('l', [0])
+        self.indices = array('l')
+        self.values = array('d')
+        for row in rows:
+            for j in sorted(row):
+                if row[j]:
+                    self.indices.append(j)
+                    self.values.append(row[j])
+            self.offsets.append(len(self.indices))
+
+    def multiply(self, x):
+        '''
+        Returns the product of the matrix with the vector $x$.
+        '''
+        offsets = self.offsets
+        indices = self.indices
+        values = self.values
+        y = [0.0] * self.n
+        for i in xrange(self.n):
+            total = 0.0
+            for p in xrange(offsets[i], offsets[i + 1]):
+                total += values[p] * x[indices[p]]
+            y[i] = total
+        return y
+
+    def entry(self, i, j):
+        '''
+        Returns the entry in row $i$ and column $j$.
+        '''
+        for p in xrange(self.offsets[i], self.offsets[i + 1]):
+            if self.indices[p] == j:
+                return self.values[p]
+        return 0.0
+
+    def toLists(self):
+        '''
+        Returns the matrix as a list of rows, each a list of numbers.
+        '''
+        return [[self.entry(i, j) for j in xrange(self.n)]
+                for i in xrange(self.n)]
+
+
+def weightedAdjacency(G, weight=None):
+    '''
+    Returns the list of vertices of $G$ and the list \code {adjacency},
+    where \code {adjacency[i]} is a dict mapping the position of each
+    neighbor of vertex $i$ to the total weight of the edges between them.
+    Every edge has weight $1$ unless \code {weight} is given, in which case
+    the weights are found by \code {algorithms.edgeWeights}.
+    '''
+    vertices = list(G.vertices)
+    index = dict((v, i) for (i, v) in enumerate(vertices))
+    weights = None if weight is None else edgeWeights(G, weight)
+    adjacency = [{} for v in vertices]
+    for (k, e) in enumerate(G.edges):
+        i = index[e[0]]
+        j = index[e[1]]
+        if i == j:
+            continue
+        w = 1 if weights is None else weights[k]
+        adjacency[i][j] = adjacency[i].get(j, 0) + w
+        adjacency[j][i] = adjacency[j].get(i, 0) + w
+    return vertices, adjacency
+
+
+def laplacianOfAdjacency(adjacency, subset=None, normalized=False):
+    '''
+    Returns the (normalized) Laplacian, as a \code {SparseMatrix}, of the
+    graph with weighted adjacency \code {adjacency} (see
+    \code {weightedAdjacency}), or of its subgraph induced by the list of
+    positions \code {subset}, whose $i$-th row belongs to
+    \code {subset[i]}.
+    '''
+    if subset is None:
+        subset = range(len(adjacency))
+    position = dict((v, i) for (i, v) in enumerate(subset))
+    neighbors = [dict((position[w], x) for (w, x) in adjacency[v].iteritems()
+                      if w in position) for v in subset]
+    degree = [float(sum(row.itervalues())) for row in neighbors]
+    rows = []
+    for (i, row) in enumerate(neighbors):
+        if normalized:
+            if not degree[i]:
+                rows.append({})
+                continue
+            entries = dict((j, -x / math.sqrt(degree[i] * degree[j]))
+                           for (j, x) in row.iteritems())
+            entries[i] = 1.0
+        else:
+            entries = dict((j, -float(x)) for (j, x) in row.iteritems())
+            entries[i] = degree[i]
+        rows.append(entries)
+    return SparseMatrix(rows)
+
+
+def laplacian(G, normalized=False, weight=None):
+    '''
+    Returns the Laplacian of $G$, or its normalized Laplacian if
+    \code {normalized} is True, as a \code {SparseMatrix} whose rows and
+    columns follow \code {G.vertices}.  The edges are weighted as in
+    \code {weightedAdjacency}.
+    '''
+    vertices, adjacency = weightedAdjacency(G, weight)
+    M = laplacianOfAdjacency(adjacency, normalized=normalized)
+    M.vertices = vertices
+    return M
+
+
+def dot(x, y):
+    '''
+    Returns the inner product of the vectors $x$ and $y$.
+    '''
+    return sum(map(mul, x, y))
+
+
+def subtractMultiple(x, c, y):
+    '''
+    Returns $x - cy$.
+    '''
+    return [a - c * b for (a, b) in zip(x, y)]
+
+
+def scaled(x, c):
+    '''
+    Returns $cx$.
+    '''
+    return [c * a for a in x]
+
+
+def symmetricEigenpairs(H):
+    '''
+    Returns the eigenvalues of the small dense symmetric matrix $H$, a
+    list of rows, in nondecreasing order, with a list of orthonormal
+    eigenvectors for them.  Householder reflections first bring $H$ to
+    the tridiagonal form $Q^T H Q$, whose eigenvectors are then found by
+    the QL method with implicit shifts, rotating the rows of $Q^T$ along.
+    '''
+    m = len(H)
+    A = [list(row) for row in H]
+    Q = [[float(i == j) for j in xrange(m)] for i in xrange(m)]
+    d = [0.0] * m
+    e = [0.0] * m
+    for i in xrange(m - 1, 0, -1):
+
+        # Reflect the leading $i \times i$ block so as to clear row $i$
+        # left of the diagonal, but for its last entry.
+
+        x = A[i][:i]
+        d[i] = A[i][i]
+        e[i] = x[-1]
+        if i == 1 or not any(x[:-1]):
+            continue
+        alpha = -math.copysign(math.sqrt(dot(x, x)), x[-1])
+        v = list(x)
+        v[-1] -= alpha
+        v = scaled(v, 1.0 / math.sqrt(dot(v, v)))
+        p = [dot(A[k][:i], v) for k in xrange(i)]
+        q = subtractMultiple(p, dot(v, p), v)
+        for k in xrange(i):
+            A[k][:i] = [a - 2 * (v[k] * b + q[k] * c)
+                        for (a, b, c) in zip(A[k][:i], q, v)]
+        e[i] = alpha
+        for row in Q:
+            row[:i] = subtractMultiple(row[:i], 2 * dot(row[:i], v), v)
+    d[0] = A[0][0]
+    Z = [list(column) for column in zip(*Q)]
+    e = e[1:] + [0.0]
+    for l in xrange(m):
+        while True:
+            for k in xrange(l, m - 1):
+                if abs(e[k]) <= 1e-16 * (abs(d[k]) + abs(d[k + 1])):
+                    break
+            else:
+                k = m - 1
+            if k == l:
+                break
+            g = (d[l + 1] - d[l]) / (2 * e[l])
+            r = math.hypot(g, 1.0)
+            g = d[k] - d[l] + e[l] / (g + math.copysign(r, g))
+            s = c = 1.0
+            p = 0.0
+            for i in xrange(k - 1, l - 1, -1):
+                f = s * e[i]
+                b = c * e[i]
+                r = math.hypot(f, g)
+                e[i + 1] = r
+                if r == 0.0:
+                    d[i + 1] -= p
+                    e[k] = 0.0
+                    break
+                s = f / r
+                c = g / r
+                g = d[i + 1] - p
+                r = (d[i] - g) * s + 2 * c * b
+                p = s * r
+                d[i + 1] = g + p
+                g = c * r - b
+                zi, zj = Z[i], Z[i + 1]
+                Z[i] = [c * x - s * y for (x, y) in zip(zi, zj)]
+                Z[i + 1] = [s * x + c * y for (x, y) in zip(zi, zj)]
+            else:
+                d[l] -= p
+                e[l] = g
+                e[k] = 0.0
+    order = sorted(xrange(m), key=lambda i: d[i])
+    return [d[i] for i in order], [Z[i] for i in order]
+
+
+def combinations(coefficients, basis):
+    '''
+    Returns the list of the sums of the vectors in \code {basis} with
+    the coefficients in each list in \code {coefficients}.
+    '''
+    rows = zip(*basis)
+    return [[sum(map(mul, s, row)) for row in rows] for s in coefficients]
+
+
+def lanczosSmallest(M, locked, tol, rng):
+    '''
+    Returns the smallest eigenvalue of the symmetric \code {SparseMatrix}
+    $M$ on the space orthogonal to the unit vectors in \code {locked},
+    with a unit eigenvector for it, to within the residual tolerance
+    \code {tol}.
+
+    The method of Lanczos builds an orthonormal basis $q_1, q_2, \dots$ of
+    the Krylov space spanned by $q_1, Mq_1, M^2q_1, \dots$, on which $M$
+    becomes the small matrix $H$; the eigenvalues of $H$ approach those
+    of $M$, the extreme ones first.  The basis is kept orthogonal to
+    itself and to \code {locked} by subtracting projections at every
+    step, which keeps copies of eigenvalues already found from
+    reappearing.  So that this costs no more than
+    $\mathcal{O}(n \cdot \mathrm{BASIS\_SIZE})$ a step, a full basis is
+    restarted \emph {thickly}: it is replaced by the eigenvectors for the
+    \code {KEPT_VECTORS} smallest eigenvalues of $H$, together with the
+    next vector of the search, and $H$ by the diagonal matrix of those
+    eigenvalues.
+    '''
+    n = M.n
+    dimension = n - len(locked)
+    q = [rng.random() - 0.5 for i in xrange(n)]
+    for u in locked:
+        q = subtractMultiple(q, dot(q, u), u)
+    q = scaled(q, 1.0 / math.sqrt(dot(q, q)))
+    basis = [q]
+    H = [[0.0]]
+    while True:
+        j = len(basis) - 1
+        w = M.multiply(basis[j])
+        for i in xrange(j, max(j - 2, -1), -1):
+            c = dot(w, basis[i])
+            w = subtractMultiple(w, c, basis[i])
+            H[i][j] = H[j][i] = c
+
+        # Beyond its projections on the last two vectors, which the method
+        # of Lanczos expects, $w$ should be nearly orthogonal to the basis
+        # already; a second pass is needed when the first cancels most of
+        # it, as it does once the search has nearly converged.
+
+        size = math.sqrt(dot(w, w))
+        for p in xrange(2):
+            for u in locked:
+                w = subtractMultiple(w, dot(w, u), u)
+            for (i, u) in enumerate(basis):
+                c = dot(w, u)
+                w = subtractMultiple(w, c, u)
+                H[i][j] = H[j][i] = H[i][j] + c
+            b = math.sqrt(dot(w, w))
+            if b > 0.7 * size:
+                break
+            size = b
+        m = len(basis)
+        last = m == dimension or b <= 1e-12 * max(1.0, abs(H[j][j]))
+        if last or m == BASIS_SIZE:
+            values, vectors = symmetricEigenpairs(H)
+            theta, s = values[0], vectors[0]
+            if last or b * abs(s[-1]) <= tol * max(1.0, abs(theta)):
+                vector = combinations([s], basis)[0]
+                return theta, scaled(vector, 1.0 / math.sqrt(dot(vector,
+                                                                 vector)))
+            if m == BASIS_SIZE:
+                basis = combinations(vectors[:KEPT_VECTORS], basis)
+                H = [[float(i == k) * values[i] for k in xrange(len(basis))]
+                     for i in xrange(len(basis))]
+                m = len(basis)
+        basis.append(scaled(w, 1.0 / b))
+        for row in H:
+            row.append(0.0)
+        H.append([0.0] * (m + 1))
+
+
+def componentsOfAdjacency(adjacency, subset):
+    '''
+    Returns the components of the subgraph induced by the list of
+    positions \code {subset}, as lists of indices into \code {subset}.
+    '''
+    position = dict((v, i) for (i, v) in enumerate(subset))
+    seen = [False] * len(subset)
+    components = []
+    for start in xrange(len(subset)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        component = [start]
+        stack = [start]
+        while stack:
+            for w in adjacency[subset[stack.pop()]]:
+                j = position.get(w)
+                if j is not None and not seen[j]:
+                    seen[j] = True
+                    component.append(j)
+                    stack.append(j)
+        components.append(component)
+    return components
+
+
+def subsetDegrees(adjacency, subset):
+    '''
+    Returns the list of the (weighted) degrees of the vertices of the
+    subgraph induced by the list of positions \code {subset}.
+    '''
+    members = set(subset)
+    return [float(sum([x for (w, x) in adjacency[v].iteritems()
+                       if w in members])) for v in subset]
+
+
+def nullVectors(degree, components, normalized):
+    '''
+    Returns an orthonormal basis of the eigenvectors for the eigenvalue
+    $0$ of the (normalized) Laplacian of a graph with the given degrees
+    and components: one vector for each component, constant on it (or,
+    for the normalized Laplacian, proportional to the square roots of the
+    degrees) and zero elsewhere.
+    '''
+    vectors = []
+    for component in components:
+        vector = [0.0] * len(degree)
+        for i in component:
+            if normalized and degree[i]:
+                vector[i] = math.sqrt(degree[i])
+            else:
+                vector[i] = 1.0
+        vectors.append(scaled(vector, 1.0 / math.sqrt(dot(vector, vector))))
+    return vectors
+
+
+def smallestEigenpairs(adjacency, subset, k, normalized, tol, seed):
+    '''
+    Returns the $k$ smallest eigenvalues of the (normalized) Laplacian of
+    the subgraph induced by \code {subset}, with unit eigenvectors, as a
+    list of pairs in nondecreasing order, together with the components of
+    the subgraph.  The eigenvalue $0$ is known exactly, with one
+    eigenvector for each component; the others are found one at a time by
+    \code {lanczosSmallest}, each eigenvector found being kept orthogonal
+    to the later searches, so that repeated eigenvalues are found as
+    often as they occur.
+    '''
+    M = laplacianOfAdjacency(adjacency, subset, normalized)
+    components = componentsOfAdjacency(adjacency, subset)
+    locked = nullVectors(subsetDegrees(adjacency, subset), components,
+                         normalized)
+    pairs = [(0.0, vector) for vector in locked]
+    rng = random.Random(seed)
+    while len(pairs) < min(k, M.n):
+        theta, vector = lanczosSmallest(M, locked, tol, rng)
+        pairs.append((theta, vector))
+        locked.append(vector)
+    return pairs[:k], components
+
+
+def smallestLaplacianEigenvalues(G, k, normalized=False, weight=None,
+                                 tol=1e-8, seed=0):
+    '''
+    Returns the list of the $k$ smallest eigenvalues of the Laplacian of
+    $G$ (or of its normalized Laplacian), in nondecreasing order, each to
+    within about \code {tol} times its size (or \code {tol}, if it is
+    less than $1$).  The edges are weighted as in
+    \code {weightedAdjacency}.
+    '''
+    vertices, adjacency = weightedAdjacency(G, weight)
+    pairs, components = smallestEigenpairs(adjacency, range(len(vertices)),
+                                           k, normalized, tol, seed)
+    return sorted([theta for (theta, vector) in pairs])
+
+
+def fiedlerOfAdjacency(adjacency, subset, normalized, tol, seed):
+    '''
+    Returns the second smallest eigenvalue of the Laplacian of the
+    subgraph induced by \code {subset} and an eigenvector for it
+    orthogonal to the constant vector (or, for the normalized Laplacian,
+    to the square roots of the degrees).
+    '''
+    pairs, components = smallestEigenpairs(adjacency, subset, 2, normalized,
+                                           tol, seed)
+    theta, vector = pairs[1]
+    if len(components) > 1:
+
+        # The subgraph is disconnected, so the eigenvalue is $0$, and we
+        # take the vector for the first component, less its projection on
+        # the vector for the whole subgraph.
+
+        degree = subsetDegrees(adjacency, subset)
+        whole = nullVectors(degree, [range(len(subset))], normalized)[0]
+        first = pairs[0][1]
+        vector = subtractMultiple(first, dot(first, whole), whole)
+    return theta, vector
+
+
+def fiedlerVector(G, normalized=False, weight=None, tol=1e-8, seed=0):
+    '''
+    Returns a Fiedler vector of $G$: an eigenvector for the second
+    smallest eigenvalue of the (normalized) Laplacian of $G$, as a dict
+    mapping each vertex to its entry.
+    '''
+    vertices, adjacency = weightedAdjacency(G, weight)
+    if len(vertices) < 2:
+        raise ValueError("A Fiedler vector needs at least two vertices.")
+    theta, vector = fiedlerOfAdjacency(adjacency, range(len(vertices)),
+                                       normalized, tol, seed)
+    return dict(zip(vertices, vector))
+
+
+def bisect(adjacency, subset, normalized, tol, seed):
+    '''
+    Splits the list of positions \code {subset} into two halves of equal
+    size (or sizes differing by $1$) by the order of the entries of a
+    Fiedler vector of the subgraph it induces.
+    '''
+    theta, vector = fiedlerOfAdjacency(adjacency, subset, normalized, tol,
+                                       seed)
+    if normalized:
+
+        # The eigenvector of the normalized Laplacian is scaled by the
+        # square roots of the degrees; undoing this gives the vector whose
+        # order is meaningful for cutting.
+
+        degree = subsetDegrees(adjacency, subset)
+        vector = [x / math.sqrt(d) if d else x
+                  for (x, d) in zip(vector, degree)]
+    ranked = sorted(xrange(len(subset)), key=vector.__getitem__)
+    half = len(subset) / 2
+    return ([subset[i] for i in ranked[:half]],
+            [subset[i] for i in ranked[half:]])
+
+
+def spectralPartition(G, k=2, normalized=False, weight=None, tol=1e-8,
+                      seed=0):
+    '''
+    Returns a partition of the vertices of $G$ into $k$ parts of nearly
+    equal size with few edges between them, as a list of $k$ lists of
+    vertices, by recursive spectral bisection: the largest part is split
+    in two at the median of a Fiedler vector of the subgraph it induces,
+    until there are $k$ parts.  Each part can be passed to
+    \code {subgraphs.vertexInducedSubgraph} for analysis of its own.
+    '''
+    vertices, adjacency = weightedAdjacency(G, weight)
+    if not 1 <= k <= max(1, len(vertices)):
+        raise ValueError("Cannot split %d vertices into %d parts."
+                         % (len(vertices), k))
+    parts = [range(len(vertices))]
+    while len(parts) < k:
+        largest = max(xrange(len(parts)), key=lambda i: len(parts[i]))
+        parts[largest:largest + 1] = list(bisect(adjacency, parts[largest],
+                                                 normalized, tol, seed))
+    return [[vertices[i] for i in part] for part in parts]
+
+
+def spectralBisection(G, normalized=False, weight=None, tol=1e-8, seed=0):
+    '''
+    Returns the pair of lists of vertices into which
+    \code {spectralPartition} splits $G$ for $k = 2$.
+    '''
+    return tuple(spectralPartition(G, 2, normalized, weight, tol, seed))
@@ -5,8 +5,8 @@ $G$.
 '''
 
 import graph
-from algorithms import DFS
-from invariants import order
+from algorithms import DFS, bitsetMaximumClique, coreNumbers
+from invariants import order, undirectedBitsets
 
 
 def graphCenter(G):
@@ -48,6 +48,26 @@ def edgeInducedSubgraph(G, edges):
     return graph.Graph(vertices=vertices, edges=edges)
 
 
+def maximumClique(G):
+    '''
+    Returns the subgraph of $G$ induced by a largest clique of $G$ (see
+    \code {algorithms.bitsetMaximumClique}), ignoring edge directions.
+    '''
+    vertices = list(G.vertices)
+    clique = bitsetMaximumClique(undirectedBitsets(G))
+    return vertexInducedSubgraph(G, [vertices[i] for i in clique])
+
+
+def kCore(G, k):
+    '''
+    Returns the $k$-core of $G$, its largest subgraph of minimum degree
+    at least $k$ (which may have no vertices), induced by the vertices of
+    core number at least $k$ (see \code {algorithms.coreNumbers}).
+    '''
+    core = coreNumbers(G)
+    return vertexInducedSubgraph(G, [v for v in G.vertices if core[v] >= k])
+
+
 def components(G):
     '''
     This is a generator that yields the components of $G$ -- that is,
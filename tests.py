@@ -14,8 +14,23 @@ This module contains unit tests
 # pylint: disable-msg=C0111
 # pylint: disable-msg=W0401
 
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 
+from StringIO import StringIO
+
+import benchmarks
+import graph.graph as graph
+
 # The first several test cases test both the construction of the graphs in
 # graph.instances and the functions in graph.invariants.  The beautiful
 # thing about this is that the functions that calculate invariants and the
@@ -24,6 +39,12 @@ import unittest
 
 from graph.instances import *
 from graph.invariants import *
+from graph.operations import *
+from graph.isomorphism import *
+from graph import cache
+from graph.algorithms import Dijkstra, Kruskal, Prim
+from graph.readwrite import *
+from graph.mapped import *
 
 # The following is to stop pylint from complaining about "too many
 # public methods":
@@ -135,6 +156,1276 @@ class PetersenGraphTestCase (unittest.TestCase):
         assert eigenvals [1]  == 5
         assert eigenvals [3]  == 1
 
+class RandomGraphTestCase (unittest.TestCase):
+
+    def testSeedIsReproducible (self):
+        assert list (randomGraphEdges (50, 0.1, seed = 7)) == \
+               list (randomGraphEdges (50, 0.1, seed = 7))
+
+    def testRandomGraphExtremes (self):
+        assert is_empty (randomGraph (10, 0, seed = 1))
+        assert is_complete (randomGraph (10, 1, seed = 1))
+
+    def testRandomGraphEdgesAreDistinct (self):
+        edges = list (randomGraphEdges (200, 0.05, seed = 3))
+        assert len (edges) == len (set (edges))
+        assert all (0 <= u < v < 200 for (u, v) in edges)
+
+    def testRandomGraphWithSize (self):
+        assert size (randomGraphWithSize (30, 100, seed = 2)) == 100
+        assert size (randomGraphWithSize (10, 40, seed = 2)) == 40
+
+    def testRandomRegularGraph (self):
+        G = randomRegularGraph (3, 20, seed = 5)
+        assert list (degreeSequence (G)) == [3] * 20
+
+    def testBarabasiAlbertGraph (self):
+        G = BarabasiAlbertGraph (50, 2, seed = 11)
+        assert order (G) == 50
+        assert size (G) == 2 * (50 - 2)
+        assert is_connected (G)
+
+    def testConfigurationModelGraph (self):
+        G = configurationModelGraph ([2] * 30, seed = 4)
+        assert maxDegree (G) <= 2
+
+class SetOperationsTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.P = path (4)
+        self.C = graph.Graph (vertices = range (4),
+                              edges = [(0, 1), (1, 2), (2, 3), (3, 0)])
+
+    def edgeSet (self, G):
+        return set (frozenset (e) for e in G.edges)
+
+    def testUnion (self):
+        G = graphUnion (self.P, path (6))
+        assert order (G) == 6
+        assert size (G) == 5
+
+    def testIntersection (self):
+        G = graphIntersection (self.C, self.P)
+        assert order (G) == 4
+        assert self.edgeSet (G) == self.edgeSet (self.P)
+
+    def testDifference (self):
+        G = graphDifference (self.C, self.P)
+        assert order (G) == 4
+        assert self.edgeSet (G) == set ([frozenset ([0, 3])])
+
+    def testEdgeOrientationIgnored (self):
+        Q = graph.Graph (vertices = range (4),
+                         edges = [(1, 0), (2, 1), (3, 2)])
+        assert is_empty (graphDifference (self.P, Q))
+
+    def testSum (self):
+        G = graphSum (self.P, self.P)
+        assert order (G) == 8
+        assert size (G) == 6
+        assert not is_connected (G)
+
+    def testJoin (self):
+        G = graphJoin (completeGraph (1), self.C)
+        assert order (G) == 5
+        assert size (G) == 8
+        assert maxDegree (G) == 4
+
+class GraphPowerTestCase (unittest.TestCase):
+
+    def edgeSet (self, G):
+        return set (frozenset (e) for e in G.edges)
+
+    def testPathSquare (self):
+        for method in ['sparse', 'dense']:
+            G = graphPower (path (5), 2, method = method)
+            assert size (G) == 4 + 3
+
+    def testMethodsAgree (self):
+        G = randomGraph (40, 0.08, seed = 12)
+        for k in [1, 2, 3]:
+            assert self.edgeSet (graphPower (G, k, method = 'sparse')) == \
+                   self.edgeSet (graphPower (G, k, method = 'dense'))
+
+    def testPowerOfPetersenIsComplete (self):
+        assert is_complete (graphPower (PetersenGraph(), 2))
+
+    def testHighPowers (self):
+        G = randomGraph (200, 0.065, seed = 1)
+        assert is_complete (graphPower (G, 300))
+        assert self.edgeSet (graphPower (path (5), 100)) == \
+               self.edgeSet (graphPower (path (5), 4))
+
+    def testParallelSparsePower (self):
+        G = randomGraph (60, 0.05, seed = 8)
+        assert self.edgeSet (graphPower (G, 2, method = 'sparse',
+                                         processes = 2)) == \
+               self.edgeSet (graphPower (G, 2, method = 'sparse'))
+
+def relabeled (G, seed):
+
+    # Returns a copy of $G$ with its vertices randomly permuted.
+
+    vertices = list (G.vertices)
+    shuffled = list (vertices)
+    random.Random (seed).shuffle (shuffled)
+    name = dict (zip (vertices, shuffled))
+    return graph.Graph (vertices = shuffled,
+                        edges = [(name [u], name [v])
+                                 for (u, v) in map (tuple, G.edges)])
+
+
+class IsomorphismTestCase (unittest.TestCase):
+
+    def testRelabeledGraphsAreIsomorphic (self):
+        for G in [PetersenGraph(), cube(), randomGraph (30, 0.2, seed = 1)]:
+            H = relabeled (G, 3)
+            assert canonicalForm (G) == canonicalForm (H)
+            assert canonicalHash (G) == canonicalHash (H)
+            assert is_isomorphic (G, H)
+
+    def testCanonicalLabelingGivesCanonicalForm (self):
+        G = relabeled (dodecahedron(), 5)
+        label = canonicalLabeling (G)
+        edges = tuple (sorted (tuple (sorted ((label [u], label [v])))
+                               for (u, v) in map (tuple, G.edges)))
+        assert canonicalForm (G) == (order (G), False, edges)
+
+    def testNonIsomorphicGraphs (self):
+        assert not is_isomorphic (cube(), octahedron())
+        assert not is_isomorphic (
+            randomRegularGraph (3, 10, seed = 1), PetersenGraph())
+
+    def testComplement (self):
+        G = graphComplement (PetersenGraph(), lazy = False)
+        assert size (G) == 45 - 15
+        assert is_regular (G)
+        view = graphComplement (PetersenGraph(), lazy = True)
+        assert is_isomorphic (view, G)
+        assert list (view.neighbors (0)) == \
+               [v for v in view.vertices if view.adjacent (0, v)]
+        assert view.bitsets () == \
+               [row & ~(1 << i) for (i, row)
+                in enumerate (graph.adjacencyBitsets (G))]
+        D = graph.Graph ([0, 1, 2], [(0, 1), (1, 2)], directed = True)
+        view = graphComplement (D, lazy = True)
+        assert view.adjacent (1, 0) and not view.adjacent (0, 1)
+        assert sorted ([tuple (e) for e in view.edges]) == \
+               [(0, 2), (1, 0), (2, 0), (2, 1)]
+        E = graph.Graph ([0, 1, 2], directed = True)
+        assert graph.is_directed (E)
+        assert size (graphComplement (E, lazy = False)) == 6
+
+    def testSelfComplementary (self):
+        assert is_selfComplementary (path (4))
+        assert is_selfComplementary (graph.Graph (
+            vertices = range (5),
+            edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 0)]))
+        assert not is_selfComplementary (PetersenGraph())
+        assert not is_selfComplementary (
+            graph.Graph (vertices = range (4),
+                         edges = [(0, 1), (0, 2), (0, 3)]))
+
+class InvariantCacheTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.cache = cache.enableInvariantCache (maxsize = 2)
+
+    def tearDown (self):
+        cache.disableInvariantCache()
+
+    def testWeisfeilerLehmanHash (self):
+        G = randomGraph (25, 0.2, seed = 9)
+        H = relabeled (G, 4)
+        assert weisfeilerLehmanHash (G) == weisfeilerLehmanHash (H)
+        assert weisfeilerLehmanHash (cube()) != \
+               weisfeilerLehmanHash (octahedron())
+
+    def testHitOnIsomorphicGraph (self):
+        assert numberOfTriangles (octahedron()) == 8
+        assert self.cache.misses == 1
+        G = relabeled (octahedron(), 2)
+        assert numberOfTriangles (G) == 8
+        assert self.cache.hits == 1
+
+    def testCollisionIsNotAHit (self):
+
+        # Regular graphs of the same degree and order cannot be told apart
+        # by color refinement, so these two share a fingerprint.
+
+        C6 = graph.Graph (vertices = range (6),
+                          edges = [(i, (i + 1) % 6) for i in range (6)])
+        twoTriangles = graphSum (triangle(), triangle())
+        assert weisfeilerLehmanHash (C6) == weisfeilerLehmanHash (twoTriangles)
+        assert numberOfTriangles (C6) == 0
+        assert numberOfTriangles (twoTriangles) == 2
+        assert self.cache.hits == 0
+
+    def testLeastRecentlyUsedEviction (self):
+        numberOfTriangles (path (3))
+        numberOfTriangles (path (4))
+        numberOfTriangles (path (5))
+        assert len (self.cache) == 2
+
+    def testPersistence (self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join (directory, 'invariants.cache')
+            numberOfTriangles (octahedron())
+            self.cache.save (filename)
+            restored = cache.InvariantCache (path = filename)
+            assert restored.get ('numberOfTriangles', octahedron()) == \
+                   (True, 8)
+        finally:
+            shutil.rmtree (directory)
+
+class MemoizationTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.G = path (4)
+
+    def testValuesAreRemembered (self):
+        assert is_connected (self.G)
+        assert ('is_connected', ()) in self.G.memo()
+        self.G.memo() [('is_connected', ())] = 'remembered'
+        assert is_connected (self.G) == 'remembered'
+
+    def testMutationInvalidates (self):
+        assert is_tree (self.G)
+        assert minDegree (self.G) == 1
+        version = self.G.version
+        self.G.addEdge (0, 3)
+        assert self.G.version > version
+        assert not is_tree (self.G)
+        assert is_regular (self.G)
+        assert numberOfTriangles (self.G) == 0
+        self.G.addEdge (0, 2)
+        assert numberOfTriangles (self.G) == 2
+
+    def testInPlaceChangesAreNoticed (self):
+        assert size (self.G) == 3 and is_tree (self.G)
+        self.G.edges.append (graph.Edge (0, 3))
+        assert not is_tree (self.G)
+
+    def testRemoval (self):
+        self.G.removeEdge (2, 1)
+        assert not is_connected (self.G)
+        self.G.removeVertex (3)
+        assert order (self.G) == 3
+        assert size (self.G) == 1
+        self.assertRaises (ValueError, self.G.removeEdge, 1, 2)
+
+    def testTriangleFreeReusesTriangleCount (self):
+        self.G.addEdge (0, 2)
+        self.G.memo() [('numberOfTriangles', ())] = 0
+        assert is_triangleFree (self.G)
+        self.G.memo().clear()
+        assert not is_triangleFree (self.G)
+
+    def testRememberedValuesAreNotShared (self):
+        table = degreeTable (self.G)
+        table [0] = 99
+        assert degreeTable (self.G) [0] == 1
+        assert maxDegree (self.G) < 99
+        from graph.directed import inOutLists
+        vertices, successors, predecessors = inOutLists (self.G)
+        self.assertRaises (AttributeError, getattr, successors [0],
+                           'append')
+
+class ReportTestCase (unittest.TestCase):
+
+    def testMatchesIndividualInvariants (self):
+        for G in [octahedron(), PetersenGraph(), path (5),
+                  graphSum (triangle(), path (3))]:
+            summary = report (G)
+            assert set (summary) == set (reportable)
+            assert summary ['order'] == order (G)
+            assert summary ['size'] == size (G)
+            assert summary ['degreeSequence'] == list (degreeSequence (G))
+            assert summary ['is_regular'] == is_regular (G)
+            assert summary ['is_complete'] == is_complete (G)
+            assert summary ['is_tree'] == is_tree (G)
+            assert summary ['numberOfTriangles'] == \
+                   numberOfTriangles (graph.Graph (G.vertices,
+                                                   map (tuple, G.edges)))
+
+    def testComponents (self):
+        summary = report (graphSum (triangle(), path (3)),
+                          ['numberOfComponents', 'is_connected'])
+        assert summary == {'numberOfComponents': 2, 'is_connected': False}
+
+    def testResultsAreRemembered (self):
+        G = octahedron()
+        report (G, ['numberOfTriangles'])
+        assert G.memo() [('numberOfTriangles', ())] == 8
+
+    def testUnknownInvariant (self):
+        self.assertRaises (ValueError, report, path (3), ['girth'])
+
+class ReadWriteTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.G = PetersenGraph()
+        self.G.addVertex (10)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown (self):
+        shutil.rmtree (self.directory)
+
+    def roundTrip (self, write, read, G):
+        out = StringIO()
+        write (G, out)
+        return read (StringIO (out.getvalue()))
+
+    def testEdgeList (self):
+        H = self.roundTrip (writeEdgeList, readEdgeList, self.G)
+        assert is_isomorphic (H, self.G)
+
+    def testAdjacencyList (self):
+        H = self.roundTrip (writeAdjacencyList, readAdjacencyList, self.G)
+        assert is_isomorphic (H, self.G)
+
+    def testMatrixMarket (self):
+        H = self.roundTrip (writeMatrixMarket, readMatrixMarket, self.G)
+        assert is_isomorphic (H, self.G)
+
+    def testDot (self):
+        H = self.roundTrip (writeDot, readDot, self.G)
+        assert is_isomorphic (H, self.G)
+        assert graph.dotString (path (2)).startswith ('graph "G" {')
+
+    def testDirectedDot (self):
+        G = graph.Graph (vertices = ['a', 'b c', 'd"'],
+                         edges = [('a', 'b c'), ('b c', 'd"')],
+                         directed = True)
+        H = self.roundTrip (writeDot, readDot, G)
+        assert set (H.vertices) == set (G.vertices)
+        assert H.edges == G.edges and is_directed (H)
+
+    def testHandWrittenDot (self):
+        H = readDot (StringIO ('digraph {\n  rankdir = LR;\n'
+                               '  node [shape=box];\n'
+                               '  a -> b -> c [color=red]; d\n}\n'))
+        assert sorted (H.vertices) == ['a', 'b', 'c', 'd']
+        assert size (H) == 2
+        H = readDot (StringIO ('graph G { a -- b; b -- c; }'))
+        assert sorted (H.vertices) == ['a', 'b', 'c']
+        assert size (H) == 2 and not is_directed (H)
+
+    def testMatrixMarketWithoutSize (self):
+        self.assertRaises (ValueError, readMatrixMarket, StringIO (
+            '%%MatrixMarket matrix coordinate pattern general\n% empty\n'))
+
+    def testGzipFiles (self):
+        filename = os.path.join (self.directory, 'petersen.txt.gz')
+        writeEdgeList (self.G, filename)
+        assert is_isomorphic (readEdgeList (filename), self.G)
+        plain = os.path.join (self.directory, 'petersen.txt')
+        os.rename (filename, plain)
+        assert is_isomorphic (readEdgeList (plain), self.G)
+        assert is_isomorphic (readEdgeList (open (plain, 'rb')), self.G)
+
+class MappedGraphTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join (self.directory, 'graph.bin')
+
+    def tearDown (self):
+        shutil.rmtree (self.directory)
+
+    def testIntegerVertices (self):
+        G = randomGraph (50, 0.1, seed = 6)
+        writeBinary (G, self.filename)
+        M = loadBinary (self.filename)
+        assert order (M) == 50 and size (M) == size (G)
+        assert list (M.edges) == G.edges
+        assert M.edges [3] == G.edges [3]
+        assert sorted (M.neighbors (7)) == \
+               sorted (graph.adjacencyLists (G) [7])
+        assert is_connected (M) == is_connected (G)
+        assert report (M) == report (G)
+        M.close()
+
+    def testLabelsAndWeights (self):
+        G = graph.Graph (vertices = ['a', 'b', 'c'],
+                         edges = [('a', 'b'), ('b', 'c')], directed = True)
+        writeBinary (G, self.filename, weights = [0.5, 2.0])
+        M = loadBinary (self.filename)
+        assert sorted (M.vertices) == ['a', 'b', 'c']
+        assert M.directed and M.neighbors ('b') == ['c']
+        assert list (M.weights) == [0.5, 2.0]
+        assert M.degree ('a') == 1
+        M.close()
+
+    def testReadOnly (self):
+        writeBinary (path (3), self.filename)
+        M = loadBinary (self.filename)
+        self.assertRaises (AttributeError, setattr, M, 'edges', [])
+        M.close()
+
+    def testBadFile (self):
+        open (self.filename, 'wb').write ('\0' * 256)
+        self.assertRaises (ValueError, loadBinary, self.filename)
+
+class AdjacencyListsTestCase (unittest.TestCase):
+
+    def testRoundTrip (self):
+        for G in [PetersenGraph(), cube(), path (1)]:
+            H = graph.fromAdjacencyLists (graph.adjacencyLists (G))
+            assert order (H) == order (G)
+            assert size (H) == size (G)
+            assert is_isomorphic (H, G)
+
+    def testGenerator (self):
+        entries = ((v, [(v + 1) % 5]) for v in range (5))
+        H = graph.fromAdjacencyLists (entries)
+        assert order (H) == 5 and size (H) == 5
+        assert is_regular (H)
+
+    def testEdgesListedOnce (self):
+        H = graph.fromAdjacencyLists ([(0, [1, 2]), (1, [2]), (2, [])])
+        assert is_complete (H) and size (H) == 3
+
+    def testDirected (self):
+        H = graph.fromAdjacencyLists ([(0, [1]), (1, [0])], directed = True)
+        assert size (H) == 2 and is_directed (H)
+
+class StartupTestCase (unittest.TestCase):
+
+    # Each check runs in a fresh interpreter, so that nothing imported by
+    # the other tests is already loaded.
+
+    def inFreshInterpreter (self, code):
+        directory = os.path.dirname (os.path.abspath (__file__))
+        output = subprocess.Popen ([sys.executable, '-c', code],
+                                   cwd = directory,
+                                   stdout = subprocess.PIPE).communicate() [0]
+        return output.split()
+
+    def testImportDoesNotLoadSympy (self):
+        assert self.inFreshInterpreter (
+            'import sys, graph\n'
+            'print "sympy" in sys.modules, "graph.invariants" in sys.modules'
+            ) == ['False', 'False']
+
+    def testSubmodulesLoadOnDemand (self):
+        assert self.inFreshInterpreter (
+            'import sys, graph\n'
+            'print graph.invariants.order (graph.Graph ([1, 2], [(1, 2)])),\n'
+            'print "sympy" in sys.modules'
+            ) == ['2', 'False']
+
+    def testImportIsFast (self):
+        elapsed = float (self.inFreshInterpreter (
+            'import time\n'
+            'start = time.time()\n'
+            'import graph\n'
+            'print time.time() - start') [0])
+        assert elapsed < 0.1
+
+class BitsetGraphTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.G = randomGraph (14, 0.5, seed = 4, bitset = True)
+        self.H = self.G.toGraph()
+
+    def testDenseInstances (self):
+        for G in [completeGraph (6, bitset = True),
+                  completeGraph (1, bitset = True),
+                  icosahedron (bitset = True), self.G,
+                  randomGraphWithSize (10, 30, seed = 1, bitset = True)]:
+            assert isinstance (G, graph.BitsetGraph)
+        assert list (degreeSequence (icosahedron (bitset = True))) == \
+               [5] * 12
+        K = completeGraph (3, 4, bitset = True)
+        assert size (K) == 12
+        assert graph.Edge (0, 3) in K.edges
+        assert graph.Edge (0, 1) not in K.edges
+        self.assertRaises (TypeError, completeGraph, 3, bitsets = True)
+
+    def testInstancesAreGraphsUnlessAsked (self):
+        for G in [completeGraph (6), completeGraph (1), octahedron(),
+                  icosahedron(), randomGraph (14, 0.5, seed = 4),
+                  randomGraphWithSize (10, 30, seed = 1)]:
+            assert type (G) is graph.Graph
+        assert sorted (map (sorted, icosahedron().edges)) == \
+               sorted (map (sorted, icosahedron (bitset = True).edges))
+
+        # Attributes and trackers, which a \code {BitsetGraph} lacks,
+        # work on the dense instances.
+
+        G = completeGraph (5)
+        G.edgeData.set ('weight', [abs (e [0] - e [1]) for e in G.edges])
+        assert sorted (abs (u - v) for (u, v) in Kruskal (G, 'weight')) == \
+               [1, 1, 1, 1]
+        G.addEdge (5, 0, weight = 2)
+        assert G.trackConnectivity().connected (0, 5)
+
+    def testSameAsGraph (self):
+        assert size (self.G) == size (self.H)
+        assert sorted (map (tuple, self.G.edges)) == \
+               sorted (tuple (sorted (e)) for e in self.H.edges)
+        assert graph.adjacencyBitsets (self.G) == \
+               graph.adjacencyBitsets (self.H)
+        assert numberOfTriangles (self.G) == numberOfTriangles (self.H)
+        assert is_triangleFree (self.G) == is_triangleFree (self.H)
+        assert is_isomorphic (self.G, self.H)
+        K = graph.toBitsetGraph (self.H)
+        assert K.rows == self.G.rows and size (K) == size (self.G)
+
+    def testMutation (self):
+        G = completeGraph (5, bitset = True)
+        version = G.version
+        G.addEdge (0, 1)
+        assert size (G) == 10 and G.version > version
+        G.removeEdge (1, 0)
+        assert size (G) == 9 and not is_complete (G)
+        self.assertRaises (ValueError, G.removeEdge, 0, 1)
+        G.removeVertex (0)
+        assert is_complete (G) and G.vertices == [1, 2, 3, 4]
+        assert sorted (G.neighbors (4)) == [1, 2, 3]
+        self.assertRaises (TypeError, G.addEdge, 2, 2)
+
+    def testDirected (self):
+        G = graph.BitsetGraph ([1, 2, 3], [(1, 2), (2, 3), (3, 1)],
+                               directed = True)
+        assert graph.is_directed (G) and size (G) == 3
+        assert cliqueNumber (G) == 3
+        G.removeVertex (2)
+        assert [tuple (e) for e in G.edges] == [(3, 1)]
+
+    def testComplement (self):
+        C = graphComplement (self.G)
+        assert isinstance (C, graph.BitsetGraph)
+        assert size (C) + size (self.G) == 14 * 13 / 2
+        assert size (graphComplement (completeGraph (7, bitset = True))) \
+               == 0
+
+    def testCliques (self):
+        assert cliqueNumber (completeGraph (6)) == 6
+        assert cliqueNumber (octahedron()) == 3
+        assert cliqueNumber (PetersenGraph()) == 2
+        assert cliqueNumber (graph.Graph ([1, 2], [])) == 1
+        for seed in range (10):
+            G = randomGraph (11, 0.5, seed = seed, bitset = True)
+            rows = G.rows
+            best = max (len (c) for k in range (1, 12)
+                        for c in itertools.combinations (range (11), k)
+                        if all (rows [i] >> j & 1 for (i, j)
+                                in itertools.combinations (c, 2)))
+            assert cliqueNumber (G) == best
+        from graph.subgraphs import maximumClique
+        assert is_complete (maximumClique (self.H))
+        assert order (maximumClique (self.H)) == cliqueNumber (self.G)
+
+class GraphletTestCase (unittest.TestCase):
+
+    def bruteForce (self, G, k):
+        from graph.algorithms import undirectedNeighborSets
+        from graph.graphlets import GRAPHLETS, shapeKey
+        vertices, neighbors = undirectedNeighborSets (G)
+        names = dict ((shapeKey (edges, k), name)
+                      for (name, edges) in GRAPHLETS [k])
+        counts = dict.fromkeys (names.values(), 0)
+        for S in itertools.combinations (range (len (vertices)), k):
+            edges = [(a, b) for (a, b) in itertools.combinations (range (k), 2)
+                     if S [b] in neighbors [S [a]]]
+            counts [names [shapeKey (edges, k)]] += 1
+        return counts
+
+    def testDegeneracyOrdering (self):
+        from graph.algorithms import degeneracyOrdering
+
+        # No vertex may have more later neighbors than the degeneracy,
+        # found here by repeatedly removing a vertex of least degree.
+
+        for G in [randomGraph (60, 0.1, seed = 3), PetersenGraph(),
+                  completeGraph (5), graph.Graph()]:
+            adjacencies = graph.adjacencyLists (G)
+            remaining = set (G.vertices)
+            degeneracy = 0
+            while remaining:
+                degree = dict ((v, len ([w for w in adjacencies [v]
+                                         if w in remaining]))
+                               for v in remaining)
+                v = min (remaining, key = degree.get)
+                degeneracy = max (degeneracy, degree [v])
+                remaining.remove (v)
+            order = degeneracyOrdering (G)
+            assert sorted (order) == sorted (G.vertices)
+            rank = dict ((v, i) for (i, v) in enumerate (order))
+            later = [len ([w for w in adjacencies [v] if rank [w] > rank [v]])
+                     for v in order]
+            assert max (later + [0]) == degeneracy
+
+    def testCliques (self):
+        from graph.graphlets import cliques, numberOfCliques
+        assert numberOfCliques (completeGraph (6), 3) == 20
+        assert numberOfCliques (completeGraph (6), 6) == 1
+        assert numberOfCliques (octahedron(), 4) == 0
+        assert numberOfCliques (PetersenGraph(), 2) == 15
+        for seed in range (4):
+            G = randomGraph (13, 0.4, seed = seed)
+            rows = graph.adjacencyBitsets (G)
+            for k in (3, 4):
+                expected = set (S for S in itertools.combinations (
+                    range (13), k) if all (rows [i] >> j & 1 for (i, j)
+                                           in itertools.combinations (S, 2)))
+                found = set (tuple (sorted (c)) for c in cliques (G, k))
+                assert found == expected
+                assert numberOfCliques (G, k) == len (expected)
+        self.assertRaises (ValueError, numberOfCliques, PetersenGraph(), 0)
+
+    def testGraphletCounts (self):
+        from graph.graphlets import graphletCounts
+        assert graphletCounts (paw()) ['paw'] == 1
+        assert graphletCounts (kite()) ['kite'] == 1
+        assert graphletCounts (claw()) ['claw'] == 1
+        assert graphletCounts (PetersenGraph()) ['cycle'] == 0
+        assert graphletCounts (PetersenGraph(), 3) ['triangle'] == 0
+        for seed in range (4):
+            G = randomGraph (12, 0.2 + 0.1 * seed, seed = seed)
+            for k in (3, 4):
+                assert graphletCounts (G, k) == self.bruteForce (G, k)
+        self.assertRaises (ValueError, graphletCounts, paw(), 5)
+
+class AttributeTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.G = graph.Graph (range (5), [(0, 1), (1, 2), (2, 3), (3, 4),
+                                          (4, 0), (0, 2)])
+        self.G.edgeData.set ('weight', [4, 1, 3, 2, 5, 2])
+
+    def weightOf (self, edges):
+        weights = self.G.edgeData ['weight']
+        total = 0
+        for (u, v) in edges:
+            total += weights [self.G.edges.index (graph.Edge (u, v))]
+        return total
+
+    def testColumns (self):
+        data = self.G.edgeData
+        assert data ['weight'].typecode == 'd'
+        assert data ['weight'].itemsize == 8
+        assert list (data.get ('weight', [1, 3])) == [1, 2]
+        data.add ('capacity', 'l', 7)
+        assert list (data ['capacity']) == [7] * 6
+        self.assertRaises (ValueError, data.set, 'weight', [1, 2])
+
+    def testAlignment (self):
+        self.G.addEdge (1, 5, weight = 9, capacity = 3)
+        data = self.G.edgeData
+        assert data ['weight'] [-1] == 9 and data ['capacity'] [-1] == 3
+        assert data ['capacity'] [0] == 0
+        self.G.removeEdge (2, 1)
+        assert list (data ['weight']) == [4, 3, 2, 5, 2, 9]
+        self.G.removeVertex (0)
+        assert list (self.G.edgeData ['weight']) == [3, 2, 9]
+        self.G.addEdges ([(2, 4), (4, 6)])
+        assert list (self.G.edgeData ['weight']) == [3, 2, 9, 0, 0]
+        self.G.vertexData.set ('label', range (len (self.G.vertices)), 'l')
+        self.G.addVertex (7)
+        assert self.G.vertexData ['label'] [-1] == 0
+        self.G.edges.append (graph.Edge (7, 6))
+        assert self.G.edgeData.length == len (self.G.edges)
+
+    def testDeletionInPlace (self):
+        del self.G.edges [0]
+        assert 'weight' not in self.G.edgeData
+        assert self.G.edgeData.length == 5
+        self.G.vertexData.set ('label', range (5), 'l')
+        self.G.vertices.remove (0)
+        self.G.vertices.append (0)
+        assert 'label' not in self.G.vertexData
+
+    def testSpanningTrees (self):
+        T = Kruskal (self.G)
+        P = Prim (self.G, 3)
+        assert len (T) == len (P) == 4
+        assert self.weightOf (T) == self.weightOf (P) == 8
+        assert self.weightOf (Kruskal (self.G, lambda e: 1)) > 8
+        assert len (Prim (path (5), 0)) == 4
+
+    def testDijkstra (self):
+        distance, previous = Dijkstra (self.G, 0)
+        assert distance == {0: 0, 1: 3, 2: 2, 3: 5, 4: 5}
+        assert previous [1] == 2 and previous [2] == 0
+        distance, previous = Dijkstra (PetersenGraph(), 0)
+        assert max (distance.values()) == 2
+        self.G.edgeData ['weight'] [0] = -1
+        self.assertRaises (ValueError, Dijkstra, self.G, 0)
+
+class DirectedTestCase (unittest.TestCase):
+
+    def setUp (self):
+
+        # Two 3-cycles joined by an edge, with a tail out of the second.
+
+        self.G = graph.Graph (range (7), [(0, 1), (1, 2), (2, 0), (2, 3),
+                                          (3, 4), (4, 5), (5, 3), (5, 6)],
+                              directed = True)
+        self.dag = graph.Graph (range (6), [(5, 2), (5, 0), (4, 0), (4, 1),
+                                            (2, 3), (3, 1)], directed = True)
+
+    def testComponents (self):
+        from graph.directed import stronglyConnectedComponents
+        components = stronglyConnectedComponents (self.G)
+        assert [sorted (c) for c in components] == [[6], [3, 4, 5],
+                                                    [0, 1, 2]]
+        assert len (stronglyConnectedComponents (self.dag)) == 6
+        assert len (stronglyConnectedComponents (PetersenGraph())) == 1
+
+    def testTopologicalSort (self):
+        from graph.directed import topologicalSort
+        order = topologicalSort (self.dag)
+        rank = dict ((v, i) for (i, v) in enumerate (order))
+        assert all ([rank [e [0]] < rank [e [1]] for e in self.dag.edges])
+        self.assertRaises (ValueError, topologicalSort, self.G)
+
+    def testCondensation (self):
+        from graph.directed import condensation, topologicalSort
+        C, components = condensation (self.G)
+        assert order (C) == 3 and size (C) == 2
+        assert sorted ([tuple (e) for e in C.edges]) == [(1, 0), (2, 1)]
+        assert topologicalSort (C) == [2, 1, 0]
+
+    def testReachability (self):
+        from graph.directed import inAdjacencyLists, reachable
+        assert reachable (self.G, 3) == set ([3, 4, 5, 6])
+        assert reachable (self.G, 3, reverse = True) == set ([0, 1, 2, 3,
+                                                              4, 5])
+        assert sorted (inAdjacencyLists (self.dag) [1]) == [3, 4]
+
+    def testConnectivity (self):
+        assert is_weaklyConnected (self.G) and is_connected (self.G)
+        assert not is_stronglyConnected (self.G)
+        self.G.addEdge (6, 0)
+        assert is_stronglyConnected (self.G)
+        H = graph.Graph ([0, 1, 2], [(1, 0), (2, 0)], directed = True)
+        assert is_connected (H) and not is_stronglyConnected (H)
+        assert is_acyclic (self.dag) and not is_acyclic (self.G)
+        assert is_acyclic (path (5)) and not is_acyclic (PetersenGraph())
+
+class SpectralTestCase (unittest.TestCase):
+
+    def testKnownSpectra (self):
+        from graph.spectral import smallestLaplacianEigenvalues
+        values = smallestLaplacianEigenvalues (path (10), 3)
+        for k in range (3):
+            assert abs (values [k] - (2 - 2 * math.cos (math.pi * k / 10))) \
+                   < 1e-6
+        values = smallestLaplacianEigenvalues (path (40), 40)
+        for k in range (40):
+            assert abs (values [k] - (2 - 2 * math.cos (math.pi * k / 40))) \
+                   < 1e-6
+        values = smallestLaplacianEigenvalues (PetersenGraph (), 10)
+        expected = [0] + [2] * 5 + [5] * 4
+        assert all ([abs (x - y) < 1e-6 for (x, y) in zip (values,
+                                                            expected)])
+        values = smallestLaplacianEigenvalues (completeGraph (5), 3,
+                                               normalized = True)
+        assert all ([abs (x - y) < 1e-6 for (x, y) in zip (values,
+                                                            [0, 1.25, 1.25])])
+
+    def testLaplacian (self):
+        from graph.spectral import laplacian
+        L = laplacian (completeGraph (3))
+        assert L.toLists () == [[2, -1, -1], [-1, 2, -1], [-1, -1, 2]]
+        assert laplacianEigenvalues (PetersenGraph ()) == {0: 1, 2: 5, 5: 4}
+
+    def testAlgebraicConnectivity (self):
+        assert abs (algebraicConnectivity (completeGraph (6)) - 6) < 1e-6
+        assert abs (algebraicConnectivity (cube ()) - 2) < 1e-6
+        G = graph.Graph (range (5), [(0, 1), (1, 2), (3, 4)])
+        assert algebraicConnectivity (G) == 0
+
+    def testLargeSparseGraph (self):
+
+        # The basis of each search is restarted when full, so a $60 \times
+        # 60$ grid takes seconds rather than most of a minute.
+
+        n = 60
+        G = graph.Graph (range (n * n),
+                         [(i, i + 1) for i in range (n * n) if i % n < n - 1] +
+                         [(i, i + n) for i in range (n * n - n)])
+        start = time.time()
+        value = algebraicConnectivity (G)
+        assert time.time() - start < 15
+        assert abs (value - (2 - 2 * math.cos (math.pi / n))) < 1e-9
+
+    def testPartition (self):
+        from graph.spectral import spectralBisection, spectralPartition
+        from graph.subgraphs import vertexInducedSubgraph
+
+        # Two 5-cliques joined by a single edge.
+
+        G = graph.Graph (range (10))
+        for clique in [range (5), range (5, 10)]:
+            G.addEdges (itertools.combinations (clique, 2))
+        G.addEdge (4, 5)
+        parts = spectralBisection (G)
+        assert sorted ([sorted (part) for part in parts]) == \
+               [range (5), range (5, 10)]
+        parts = spectralPartition (gridGraph (4, 8), 4)
+        assert sorted ([len (part) for part in parts]) == [8, 8, 8, 8]
+        assert sorted (sum (parts, [])) == sorted (gridGraph (4, 8).vertices)
+        assert all ([is_connected (vertexInducedSubgraph (G, part))
+                     for part in spectralPartition (G, 2)])
+
+class ConnectivityTrackerTestCase (unittest.TestCase):
+
+    def testIncremental (self):
+        G = graph.Graph (range (6))
+        tracker = G.trackConnectivity ()
+        assert G.trackConnectivity () is tracker
+        assert numberOfComponents (G) == 6 and not is_connected (G)
+        G.addEdge (0, 1)
+        G.addEdges ([(1, 2), (3, 4), (4, 6)])
+        assert numberOfComponents (G) == 3
+        assert tracker.connected (0, 2) and tracker.connected (3, 6)
+        assert not tracker.connected (2, 3)
+        assert sorted (map (sorted, tracker.components ())) == \
+               [[0, 1, 2], [3, 4, 6], [5]]
+        G.addEdges ([(2, 3), (5, 0)])
+        assert is_connected (G) and numberOfComponents (G) == 1
+
+    def testDeletion (self):
+        G = graph.Graph (range (6), [(i, (i + 1) % 6) for i in range (6)])
+        tracker = G.trackConnectivity ()
+        G.removeEdge (0, 1)
+        assert tracker.stale and is_connected (G)
+        G.removeEdge (3, 4)
+        assert not is_connected (G) and numberOfComponents (G) == 2
+        assert not tracker.stale
+        G.removeVertex (5)
+        assert numberOfComponents (G) == 3
+        G.edges.append (graph.Edge (4, 0))
+        assert numberOfComponents (G) == 2
+        G.addEdge (3, 4)
+        assert is_connected (G)
+
+    def testChangesBeforeAdditions (self):
+        G = graph.Graph (range (4), [(0, 1), (1, 2)])
+        G.trackConnectivity ()
+        G.edges.append (graph.Edge (2, 3))
+        G.addVertex (9)
+        G.addEdge (9, 0)
+        assert numberOfComponents (G) == 1
+
+        # A vertex added while the edges are being read is noted once.
+
+        G = graph.Graph ([0, 1])
+        G.trackConnectivity ()
+
+        def edges ():
+            yield (0, 1)
+            G.addVertex (5)
+            yield (1, 5)
+
+        G.addEdges (edges ())
+        assert numberOfComponents (G) == 1
+        assert G.tracker.connected (0, 5)
+
+    def testAgreement (self):
+        rng = random.Random (3)
+        G = graph.Graph (range (40))
+        G.trackConnectivity ()
+        for step in range (60):
+            G.addEdge (rng.randrange (40), rng.randrange (40))
+            H = graph.Graph (G.vertices, [tuple (e) for e in G.edges])
+            assert numberOfComponents (G) == numberOfComponents (H)
+
+class ShardedGraphTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown (self):
+        shutil.rmtree (self.directory)
+
+    def testOnlyOutOfCoreGraphsSearchThemselves (self):
+        from graph.algorithms import BFS
+
+        class Searchable (graph.Graph):
+            def BFS (self, start):
+                return iter (['not', 'a', 'vertex'])
+            def degrees (self):
+                return iter ([])
+
+        G = Searchable (range (3), [(0, 1), (1, 2)])
+        assert sorted (BFS (G, 0)) == [0, 1, 2]
+        assert sorted (degrees (G)) == [1, 1, 2]
+
+    def testRoundTrip (self):
+        from graph.sharded import loadSharded, shardGraph
+        G = randomGraph (200, 0.02, seed = 4)
+        shardGraph (G, self.directory, memoryBudget = 2048)
+        S = loadSharded (self.directory, memoryBudget = 2048)
+        assert S.shardCount > 1
+        assert order (S) == 200 and size (S) == size (G)
+        assert sorted ([tuple (sorted (e)) for e in S.edges]) == \
+               sorted ([tuple (sorted (e)) for e in G.edges])
+        assert sorted (S.neighbors (7)) == \
+               sorted (graph.adjacencyLists (G) [7])
+        S.close()
+
+    def testAlgorithms (self):
+        from graph.algorithms import BFS
+        from graph.sharded import loadSharded, writeSharded
+        G = randomGraph (300, 0.008, seed = 2)
+        writeSharded (((e [0], e [1]) for e in G.edges), 300, self.directory,
+                      memoryBudget = 1024)
+        S = loadSharded (self.directory, memoryBudget = 1024)
+        assert numberOfComponents (S) == numberOfComponents (G)
+        assert is_connected (S) == is_connected (G)
+        assert degreeRange (S) == degreeRange (G)
+        assert sorted (degrees (S)) == sorted (degrees (G))
+        assert sorted (BFS (S, 0)) == sorted (BFS (G, 0))
+        assert graph.is_outOfCore (S) and not graph.is_outOfCore (G)
+        assert S.tracker.connected (0, 0)
+        statistics = S.degreeStatistics ()
+        assert sum (statistics ['histogram'].values ()) == 300
+        assert abs (statistics ['mean'] - 2.0 * size (G) / 300) < 1e-9
+
+    def testDirectedAndLoops (self):
+        from graph.algorithms import BFS
+        from graph.sharded import loadSharded, shardGraph
+        D = graph.Graph (range (5), [(0, 1), (1, 2), (3, 3), (4, 0)],
+                         directed = True)
+        shardGraph (D, self.directory, memoryBudget = 64)
+        S = loadSharded (self.directory)
+        assert S.directed and list (S.edges) == D.edges
+        assert degreeRange (S) == degreeRange (D)
+        assert list (BFS (S, 0)) == [0, 1, 2]
+        assert numberOfComponents (S) == 2
+        U = graph.Graph (range (3), [(0, 0), (0, 1), (0, 1)])
+        shardGraph (U, os.path.join (self.directory, 'loops'))
+        S = loadSharded (os.path.join (self.directory, 'loops'))
+        assert list (S.edges) == U.edges
+        assert list (degrees (S)) == list (degrees (U))
+
+class EdgeColoringTestCase (unittest.TestCase):
+
+    def assertProper (self, G, colors):
+        seen = set ()
+        for (e, c) in zip (G.edges, colors):
+            for v in (e [0], e [1]):
+                assert (v, c) not in seen
+                seen.add ((v, c))
+
+    def testChromaticIndex (self):
+        assert edgeChromaticNumber (PetersenGraph ()) == 4
+        assert edgeChromaticNumber (completeGraph (5)) == 5
+        assert edgeChromaticNumber (completeGraph (6)) == 5
+        assert edgeChromaticNumber (cube ()) == 3
+        assert edgeChromaticNumber (graph.Graph (range (3))) == 0
+
+    def testMisraGries (self):
+        from graph.coloring import misraGriesColoring
+        for seed in range (10):
+            G = randomGraph (30, 0.3, seed = seed)
+            colors = misraGriesColoring (G)
+            self.assertProper (G, colors)
+            assert max (colors) <= maxDegree (G)
+        G = graph.Graph ([0, 1], [(0, 1), (1, 0)])
+        self.assertRaises (ValueError, misraGriesColoring, G)
+
+    def testRecoloring (self):
+        from graph.coloring import edgeColoring
+        G = randomRegularGraph (5, 400, seed = 1)
+        colors = edgeColoring (G)
+        self.assertProper (G, colors)
+        assert max (colors) + 1 == 5
+
+    def testSearchLimits (self):
+        from graph.coloring import edgeColoring
+
+        # The flower snarks are cubic, of class 2 and not overfull, so
+        # only a search could show it; for $J_{21}$ it is given up.
+
+        def flowerSnark (k):
+            edges = []
+            for i in range (k):
+                j = (i + 1) % k
+                edges += [(4 * i, 4 * i + 1), (4 * i, 4 * i + 2),
+                          (4 * i, 4 * i + 3), (4 * i + 1, 4 * j + 1)]
+                if i < k - 1:
+                    edges += [(4 * i + 2, 4 * j + 2),
+                              (4 * i + 3, 4 * j + 3)]
+            edges += [(4 * k - 2, 3), (4 * k - 1, 2)]
+            return graph.Graph (range (4 * k), edges)
+
+        assert edgeChromaticNumber (flowerSnark (5)) == 4
+        self.assertRaises (ValueError, edgeColoring, flowerSnark (21))
+
+    def testPendantPathsAreNotSearched (self):
+        from graph.coloring import edgeColoring, edgePairs
+
+        # Only the 12 edges of the Petersen graph less a vertex (of class
+        # 2) need a search; the path hung on it, or on $K_4$ less an edge
+        # (of class 1), does not.
+
+        P = PetersenGraph()
+        G = graph.Graph (list (P.vertices), [tuple (e) for e in P.edges])
+        G.removeVertex (0)
+        K = graph.Graph (range (4), [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3)])
+        for (G, delta) in [(G, 4), (K, 3)]:
+            u = [v for (v, d) in degreeTable (G).items() if d == 2][0]
+            for i in range (300):
+                G.addEdge (u, ('path', i))
+                u = ('path', i)
+            n, pairs = edgePairs (G)
+            colors = edgeColoring (G)
+            assert edgeChromaticNumber (G) == delta
+            assert len (set (colors)) == delta
+            ends = [(v, c) for ((i, j), c) in zip (pairs, colors)
+                    for v in (i, j)]
+            assert len (set (ends)) == len (ends)
+
+    def testBipartite (self):
+        from graph.coloring import bipartiteEdgeColoring
+        rng = random.Random (1)
+        G = graph.Graph (range (40), [(i, 20 + j) for i in range (20)
+                                      for j in range (20)
+                                      if rng.random () < 0.3])
+        colors = bipartiteEdgeColoring (G)
+        self.assertProper (G, colors)
+        assert max (colors) + 1 == maxDegree (G)
+        assert is_bipartite (G) and is_bipartite (cube ())
+        assert not is_bipartite (PetersenGraph ())
+        self.assertRaises (ValueError, bipartiteEdgeColoring,
+                           completeGraph (3))
+
+    def testMatchings (self):
+        from graph.matching import bipartiteMatching, maximumMatching
+        assert matchingNumber (PetersenGraph ()) == 5
+        assert matchingNumber (completeGraph (7)) == 3
+        assert matchingNumber (path (6)) == 3
+        M = maximumMatching (PetersenGraph ())
+        assert len (set ([v for e in M for v in e])) == 10
+        G = graph.Graph (range (6), [(0, 3), (0, 4), (1, 3), (2, 3)])
+        assert len (bipartiteMatching (G, left = [0, 1, 2])) == 2
+        self.assertRaises (ValueError, bipartiteMatching, G, [0, 3])
+
+class ApproxTestCase (unittest.TestCase):
+
+    def testTriangles (self):
+        from graph.approx import transitivityEstimate, triangleEstimate
+        G = randomGraph (200, 0.06, seed = 3)
+        triangles = numberOfTriangles (G)
+        for method in ('wedge', 'edge'):
+            estimate = triangleEstimate (G, 20000, method = method, seed = 1)
+            assert triangles in estimate
+            assert estimate.samples == 20000
+        self.assertRaises (ValueError, triangleEstimate, G, method = 'none')
+        estimate = transitivityEstimate (completeGraph (6), 500, seed = 1)
+        assert estimate.value == 1.0 and estimate.high == 1.0
+        assert transitivityEstimate (cube (), 500, seed = 1).value == 0
+
+    def testPrecision (self):
+        from graph.approx import averageClusteringEstimate
+        G = randomGraph (200, 0.06, seed = 3)
+        estimate = averageClusteringEstimate (G, 100000, precision = 0.1,
+                                              seed = 2)
+        assert estimate.samples < 100000
+        assert estimate.high - estimate.low <= 0.2 * estimate.value
+
+    def testDistances (self):
+        from graph.approx import distanceEstimates
+        estimates = distanceEstimates (hypercube (4), 10, seed = 1)
+        assert abs (float (estimates ['averageDistance']) - 32 / 15.0) \
+               < 1e-9
+        assert abs (float (estimates ['effectiveDiameter']) - 2.875) < 1e-9
+        G = randomGraph (150, 0.05, seed = 5)
+        lists = graph.adjacencyLists (G)
+        total = 0
+        for v in G.vertices:
+            distance = {v: 0}
+            queue = [v]
+            for u in queue:
+                for w in lists [u]:
+                    if w not in distance:
+                        distance [w] = distance [u] + 1
+                        queue.append (w)
+            total += sum (distance.values ())
+        assert is_connected (G)
+        exact = total / (150.0 * 149)
+        assert exact in distanceEstimates (G, 80, seed = 2) \
+               ['averageDistance']
+
+    def testDegreeSketch (self):
+        from graph.approx import degreeSketch
+        G = randomGraph (300, 0.05, seed = 6)
+        sketch = degreeSketch (G, 2000, seed = 1)
+        assert 2.0 * size (G) / order (G) in sketch ['mean']
+        assert abs (sum ([bin [2].value for bin in sketch ['bins']]) - 1) \
+               < 1e-9
+        assert degreeSketch (cube (), 50) ['quantiles'] [0.5] == 3
+
+class CoreDecompositionTestCase (unittest.TestCase):
+
+    def testCoreNumbers (self):
+        from graph.algorithms import coreNumbers
+        from graph.subgraphs import kCore
+
+        # A triangle with a pendant path: the triangle is the 2-core.
+
+        G = graph.Graph (range (5), [(0, 1), (1, 2), (0, 2), (2, 3), (3, 4)])
+        assert coreNumbers (G) == {0: 2, 1: 2, 2: 2, 3: 1, 4: 1}
+        assert sorted (kCore (G, 2).vertices) == [0, 1, 2]
+        assert order (kCore (G, 3)) == 0
+        assert degeneracy (G) == 2
+        assert degeneracy (PetersenGraph ()) == 3
+        assert degeneracy (completeGraph (6)) == 5
+        assert degeneracy (graph.Graph ()) == 0
+        G = randomGraph (80, 0.1, seed = 5)
+        core = coreNumbers (G)
+        for k in range (degeneracy (G) + 2):
+            H = kCore (G, k)
+            adjacencies = graph.adjacencyLists (H)
+            assert all ([len (adjacencies [v]) >= k for v in H.vertices])
+            assert order (H) == len ([v for v in core if core [v] >= k])
+
+    def testColoring (self):
+        from graph.coloring import vertexColoring
+        assert chromaticNumber (PetersenGraph ()) == 3
+        assert chromaticNumber (icosahedron ()) == 4
+        assert chromaticNumber (completeGraph (3, 4)) == 2
+        assert chromaticNumber (graph.Graph ([1], [])) == 1
+        assert chromaticNumber (graph.Graph ()) == 0
+
+        # The Mycielski graph of the 5-cycle is triangle free, so the
+        # clique bound is 2, but it needs 4 colors.
+
+        edges = [(i, (i + 1) % 5) for i in range (5)]
+        edges += [(5 + i, j) for (i, j) in edges] + \
+                 [(5 + j, i) for (i, j) in edges]
+        edges += [(10, 5 + i) for i in range (5)]
+        G = graph.Graph (range (11), edges)
+        assert cliqueNumber (G) == 2 and chromaticNumber (G) == 4
+        colors = vertexColoring (G)
+        assert all ([colors [e [0]] != colors [e [1]] for e in G.edges])
+        self.assertRaises (ValueError, vertexColoring,
+                           graph.Graph ([0], [(0, 0)]))
+
+    def testSearchesAreRemembered (self):
+        G = PetersenGraph ()
+        assert chromaticNumber (G) == 3 and independenceNumber (G) == 4
+        assert ('chromaticNumber', ()) in G.memo ()
+        assert ('independenceNumber', ()) in G.memo ()
+        G.memo () [('chromaticNumber', ())] = 'remembered'
+        assert chromaticNumber (G) == 'remembered'
+
+    def testIndependence (self):
+        assert independenceNumber (PetersenGraph ()) == 4
+        assert independenceNumber (completeGraph (6)) == 1
+        assert independenceNumber (completeGraph (3, 5)) == 5
+        assert independenceNumber (path (7)) == 4
+
+class BatchTestCase (unittest.TestCase):
+
+    def setUp (self):
+        self.graphs = [randomGraph (12, 0.3, seed = s) for s in range (40)]
+        self.graphs.append (graph.Graph (['a', 'b', 'c'], [('a', 'c')]))
+        self.expected = [(size (G), is_connected (G)) for G in self.graphs]
+
+    def testEncoding (self):
+        from graph import batch
+        for G in self.graphs [-2:]:
+            H = batch.decodeGraph (batch.encodeGraph (G))
+            assert list (H.vertices) == list (G.vertices)
+            assert [tuple (e) for e in H.edges] == \
+                   [tuple (e) for e in G.edges]
+        G = graph.Graph ([0, 1], directed = True)
+        assert batch.decodeGraph (batch.encodeGraph (G)).directed
+
+    def testOrdered (self):
+        from graph import batch
+        for workers in (1, 3):
+            assert list (batch.mapInvariants (
+                iter (self.graphs), ['size', is_connected],
+                workers = workers)) == self.expected
+
+    def testAsCompleted (self):
+        from graph import batch
+        results = list (batch.mapInvariants (self.graphs,
+                                             ['size', 'is_connected'],
+                                             workers = 2, ordered = False))
+        assert sorted (results) == list (enumerate (self.expected))
+
+    def testAsync (self):
+        from graph import batch
+        results = {}
+        thread = batch.mapInvariantsAsync (self.graphs, ['size'],
+                                           results.__setitem__, workers = 2)
+        thread.join()
+        assert thread.error is None
+        assert [results [i] [0] for i in range (len (self.graphs))] == \
+               [e [0] for e in self.expected]
+
+    def testUnknownInvariant (self):
+        from graph import batch
+        self.assertRaises (ValueError, list,
+                           batch.mapInvariants (self.graphs, ['girth?']))
+
+class ProfilingTestCase (unittest.TestCase):
+
+    def testSession (self):
+        from graph import algorithms, profiling, subgraphs
+        original = algorithms.DFS
+        with profiling.session() as profile:
+            assert algorithms.DFS is not original
+            assert subgraphs.DFS is algorithms.DFS
+            components = list (subgraphs.components (gridGraph (4, 4)))
+        assert algorithms.DFS is original and subgraphs.DFS is original
+        assert len (components) == 1
+        stats = profile.stats ['algorithms.DFS']
+        assert stats ['calls'] == 1
+        assert stats ['items'] == {'vertices visited': 16}
+        outer = profile.stats ['subgraphs.components']
+        assert outer ['cumulative'] >= outer ['self'] >= 0
+        assert outer ['cumulative'] >= stats ['cumulative']
+
+    def testDisabledByDefault (self):
+        from graph import profiling
+        assert profiling.active is None
+        profiling.count ('vertices visited')
+
+    def testReports (self):
+        from graph import invariants, profiling
+        with profiling.session() as profile:
+            invariants.is_connected (generalizedPetersenGraph (5, 2))
+        assert 'invariants.is_connected' in profile.summary()
+        trace = json.loads (profile.chromeTrace()) ['traceEvents']
+        assert 'invariants.is_connected' in [e ['name'] for e in trace]
+        assert all ([e ['ph'] == 'X' and e ['dur'] >= 0 for e in trace])
+
+class BenchmarkTestCase (unittest.TestCase):
+
+    def testRun (self):
+        results = benchmarks.run (quick = True, families = ['complete'],
+                                  operations = ['construction', 'size'],
+                                  out = None)
+        assert [r ['operation'] for r in results ['results']] == \
+               ['construction', 'size'] * 2
+        assert results ['results'] [1] ['edges'] == 6
+        assert all (r ['seconds'] >= 0 for r in results ['results'])
+
+    def testCompare (self):
+        old = {'results': [
+            {'family': 'grid', 'size': 4, 'operation': 'DFS', 'seconds': 1.0},
+            {'family': 'grid', 'size': 4, 'operation': 'BFS', 'seconds': 1.0},
+            {'family': 'grid', 'size': 4, 'operation': 'Prim',
+             'seconds': 1.0}]}
+        new = {'results': [
+            {'family': 'grid', 'size': 4, 'operation': 'DFS', 'seconds': 1.1},
+            {'family': 'grid', 'size': 4, 'operation': 'BFS', 'seconds': 2.0},
+            {'family': 'grid', 'size': 4, 'operation': 'Prim',
+             'error': 'timeout'}]}
+        assert benchmarks.compare (old, new) == [
+            ('grid', 4, 'BFS', 1.0, 2.0), ('grid', 4, 'Prim', 1.0, None)]
+
 def suite():
     tests = unittest.TestSuite(OctahedralGraphTestCase,
                                PetersenGraphTestCase)